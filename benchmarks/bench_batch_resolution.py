@@ -0,0 +1,99 @@
+"""
+Batch Resolution Benchmark - 抽象節點批次解析吞吐量
+比較逐一呼叫 AbstractNodeResolver.resolve 與 resolve_batch 解析整個目錄的時間
+
+使用方式：
+    python benchmarks/bench_batch_resolution.py [file_count] [workers]
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+# 確保可以找到模組
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.capability_engine.graph import GraphNode, NodeType, Implementation
+from src.capability_engine.resolver import AbstractNodeResolver, ResolutionContext, TypeDetector
+
+
+def make_docx() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        z.writestr("[Content_Types].xml", "<Types/>")
+        z.writestr("word/document.xml", "<w:document/>")
+    return buffer.getvalue()
+
+
+# 副檔名 -> 檔案內容（部分副檔名與內容不符，需檢測標頭）
+SAMPLES = {
+    ".pdf": b"%PDF-1.7\n" + b"0" * 4096,
+    ".docx": make_docx(),
+    ".html": b"<!DOCTYPE html><html><body>page</body></html>",
+    ".json": b'{"key": "value"}',
+    ".bin": b"%PDF-1.4\n" + b"1" * 4096,
+    ".txt": b"plain text\n" * 100,
+}
+
+
+def make_document_reader() -> GraphNode:
+    """25 個實現的文件讀取抽象節點（副檔名、MIME、URL 與表達式條件混合）"""
+    implementations = [
+        Implementation(id="pdf", skill_id="pdf-reader", priority=1, conditions=["application/pdf"]),
+        Implementation(id="docx", skill_id="docx-reader", priority=2, conditions=[TypeDetector.EXTENSION_MAP[".docx"]]),
+        Implementation(id="html", skill_id="web-reader", priority=3, conditions=["text/html", "https://*"]),
+        Implementation(id="json", skill_id="json-reader", priority=4, conditions=["application/json"]),
+    ]
+    for i in range(20):
+        implementations.append(Implementation(
+            id=f"ext{i}", skill_id=f"reader-{i}", priority=10 + i,
+            conditions=[f"*.ext{i}", f"application/x-format-{i}", f"mode == 'm{i}'"],
+        ))
+    implementations.append(
+        Implementation(id="text", skill_id="text-reader", priority=99, conditions=["default"])
+    )
+    return GraphNode(id="read_document", type=NodeType.ABSTRACT, implementations=implementations)
+
+
+def main(file_count: int = 10000, workers: int = 8) -> None:
+    node = make_document_reader()
+    extensions = list(SAMPLES)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(file_count):
+            ext = extensions[i % len(extensions)]
+            path = os.path.join(tmp, f"doc{i}{ext}")
+            with open(path, "wb") as f:
+                f.write(SAMPLES[ext])
+            paths.append(path)
+
+        # 兩種方式都使用新的解析器（冷快取）
+        started = time.perf_counter()
+        resolver = AbstractNodeResolver()
+        single = [
+            resolver.resolve(node, ResolutionContext(input_path=path, input_file=path))
+            for path in paths
+        ]
+        single_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        batch = AbstractNodeResolver().resolve_batch(node, paths, max_workers=workers)
+        batch_time = time.perf_counter() - started
+
+        assert [impl.id for impl in batch] == [impl.id for impl in single]
+
+    print(f"\n📂 {file_count} files, {len(node.implementations)} implementations")
+    print(f"  {'mode':<12} {'total ms':>10} {'inputs/s':>12}")
+    for mode, elapsed in (("per-input", single_time), (f"batch({workers})", batch_time)):
+        print(f"  {mode:<12} {elapsed * 1000:10.1f} {file_count / elapsed:12,.0f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
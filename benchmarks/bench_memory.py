@@ -0,0 +1,90 @@
+"""
+Memory Benchmark - 能力圖常駐記憶體
+量測載入大量能力圖（模擬 MCP Server 常駐的 registry）時每張圖的記憶體用量
+
+使用方式：
+    python benchmarks/bench_memory.py [graph_count] [nodes_per_graph]
+"""
+
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+# 確保可以找到模組
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.capability_engine.graph import CapabilityGraph as LegacyCapabilityGraph
+from src.capability_engine.domain import CapabilityGraph
+
+
+def make_graph_data(index: int, node_count: int) -> dict:
+    """產生一張典型的能力圖定義（skill 為主，夾雜抽象與分支節點）"""
+    nodes = [{"id": "start", "type": "control.start"}]
+    for i in range(node_count):
+        node_id = f"step{i}"
+        if i % 10 == 3:
+            nodes.append({
+                "id": node_id,
+                "type": "abstract",
+                "contract": {"inputs": ["input_path"], "outputs": ["content"], "capabilities": ["read"]},
+                "implementations": [
+                    {"id": "pdf", "skill_id": "pdf-reader", "priority": 1, "conditions": ["*.pdf"]},
+                    {"id": "web", "skill_id": "web-reader", "priority": 2, "conditions": ["http*"]},
+                    {"id": "text", "skill_id": "text-reader", "priority": 99, "conditions": ["default"]},
+                ],
+                "outputs": ["content"],
+            })
+        elif i % 10 == 7:
+            nodes.append({
+                "id": node_id,
+                "type": "control.branch",
+                "conditions": [
+                    {"name": "ok", "expression": "status == 'ok'", "target": f"step{i + 1}"},
+                    {"name": "default", "expression": "True", "target": f"step{i + 1}"},
+                ],
+            })
+        else:
+            nodes.append({"id": node_id, "type": "skill", "skill_id": f"skill-{i % 25}"})
+    nodes.append({"id": "end", "type": "control.end"})
+    
+    ids = [n["id"] for n in nodes]
+    return {
+        "id": f"capability-{index}",
+        "name": f"Capability {index}",
+        "nodes": nodes,
+        "legacy_edges": [{"from": a, "to": b} for a, b in zip(ids, ids[1:])],
+        "edges": [{"source": a, "target": b} for a, b in zip(ids, ids[1:])],
+    }
+
+
+def measure(label: str, loader, payloads: list[str]) -> float:
+    """以 tracemalloc 量測載入所有圖後常駐的位元組數"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    graphs = [loader(json.loads(p)) for p in payloads]  # 每張圖都是獨立解析的字串
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    per_graph = total / len(graphs)
+    print(f"  {label:<28} {per_graph / 1024:8.1f} KiB / graph")
+    return per_graph
+
+
+def main(graph_count: int = 300, node_count: int = 60) -> None:
+    payloads = [json.dumps(make_graph_data(i, node_count)) for i in range(graph_count)]
+    
+    print(f"📦 {graph_count} graphs × {node_count + 2} nodes")
+    measure(
+        "legacy CapabilityGraph",
+        lambda d: LegacyCapabilityGraph.from_dict({**d, "edges": d["legacy_edges"]}),
+        payloads,
+    )
+    measure("domain CapabilityGraph", CapabilityGraph.from_dict, payloads)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
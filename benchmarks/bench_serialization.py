@@ -0,0 +1,79 @@
+"""
+Serialization Benchmark - 能力圖載入時間
+比較 YAML、JSON 與二進位快照（to_bytes/from_bytes）的大小與載入時間
+
+使用方式：
+    python benchmarks/bench_serialization.py [nodes_per_graph] [repeat]
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+# 確保可以找到模組
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from bench_memory import make_graph_data
+from src.capability_engine.graph import CapabilityGraph as LegacyCapabilityGraph
+from src.capability_engine.domain import CapabilityGraph
+from src.capability_engine.domain.services import decode_snapshot
+
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def best_of(repeat: int, fn) -> float:
+    """取多次執行中的最短時間（毫秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def compare(label: str, kind: str, graph_cls, graph, repeat: int) -> None:
+    data = graph.to_dict()
+    yaml_text = yaml.safe_dump(data, allow_unicode=True, sort_keys=False)
+    json_text = json.dumps(data, ensure_ascii=False)
+    blob = graph.to_bytes()
+    assert graph_cls.from_bytes(blob).to_dict() == data
+    
+    print(f"\n📦 {label}: {len(data['nodes'])} nodes")
+    print(f"  {'format':<10} {'size':>10} {'parse ms':>10} {'load ms':>10}")
+    rows = [
+        ("yaml", len(yaml_text.encode()),
+         lambda: yaml.load(yaml_text, Loader=YAML_LOADER),
+         lambda: graph_cls.from_dict(yaml.load(yaml_text, Loader=YAML_LOADER))),
+        ("yaml(py)", len(yaml_text.encode()),
+         lambda: yaml.safe_load(yaml_text),
+         lambda: graph_cls.from_dict(yaml.safe_load(yaml_text))),
+        ("json", len(json_text.encode()),
+         lambda: json.loads(json_text),
+         lambda: graph_cls.from_dict(json.loads(json_text))),
+        ("binary", len(blob),
+         lambda: decode_snapshot(blob, kind),
+         lambda: graph_cls.from_bytes(blob)),
+    ]
+    for name, size, parse, load in rows:
+        print(f"  {name:<10} {size:>10,} {best_of(repeat, parse):10.2f} {best_of(repeat, load):10.2f}")
+
+
+def main(node_count: int = 2000, repeat: int = 5) -> None:
+    data = make_graph_data(0, node_count)
+    compare(
+        "legacy CapabilityGraph",
+        "legacy",
+        LegacyCapabilityGraph,
+        LegacyCapabilityGraph.from_dict({**data, "edges": data["legacy_edges"]}),
+        repeat,
+    )
+    compare("domain CapabilityGraph", "domain", CapabilityGraph, CapabilityGraph.from_dict(data), repeat)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -39,7 +39,7 @@ from .graph import GraphNode as LegacyGraphNode
 from .graph import GraphEdge as LegacyGraphEdge
 from .adaptive import AdaptiveGraphEngine
 from .resolver import NodeResolver, AbstractNodeResolver
-from .fallback import FallbackChain, FallbackStrategy
+from .fallback import BackoffPolicy, FallbackChain, FallbackStrategy, RetryBudget
 
 # === DDD 架構匯出 ===
 
@@ -95,6 +95,8 @@ __all__ = [
     "AbstractNodeResolver",
     "FallbackChain",
     "FallbackStrategy",
+    "BackoffPolicy",
+    "RetryBudget",
     # Domain - Value Objects
     "NodeType",
     "EdgeType",
@@ -12,10 +12,15 @@ from datetime import datetime
 
 from .graph import (
     CapabilityGraph, GraphNode, GraphEdge, 
-    NodeType, EdgeType, ExecutionStatus
+    NodeType, EdgeType, ExecutionStatus, Implementation
 )
 from .resolver import AbstractNodeResolver, ResolutionContext
-from .fallback import FallbackChain, FallbackResult, ExecutionError, create_standard_fallback_chain
+from .fallback import (
+    CircuitBreakerRegistry, FallbackChain, FallbackResult, ExecutionError,
+    create_standard_fallback_chain, remaining_time,
+)
+from .domain.services.compiler import CompiledCondition, CompiledGraph
+from .domain.services.statistics import SkillStatsStore
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -35,6 +40,8 @@ class ExecutionStep:
     error: ExecutionError | None = None
     fallback_used: bool = False
     retry_count: int = 0
+    latency: float | None = None  # 技能執行時間（秒，不含後繼節點）
+    hedged: list[str] = field(default_factory=list)  # 對沖執行啟動的技能（依啟動順序）
     
     @property
     def duration(self) -> float | None:
@@ -49,6 +56,7 @@ class ExecutionTrace:
     """執行軌跡"""
     graph_id: str
     started_at: datetime
+    graph_fingerprint: str = ""
     finished_at: datetime | None = None
     status: ExecutionStatus = ExecutionStatus.PENDING
     steps: list[ExecutionStep] = field(default_factory=list)
@@ -61,11 +69,21 @@ class ExecutionTrace:
     failed_nodes: int = 0
     skipped_nodes: int = 0
     total_retries: int = 0
+    resolution_cache_hits: int = 0
+    resolution_cache_misses: int = 0
     
     @property
     def success(self) -> bool:
         return self.status == ExecutionStatus.COMPLETED
     
+    @property
+    def resolution_cache_hit_rate(self) -> float | None:
+        """抽象節點解析快取命中率（沒有解析時為 None）"""
+        total = self.resolution_cache_hits + self.resolution_cache_misses
+        if total:
+            return self.resolution_cache_hits / total
+        return None
+    
     @property
     def duration(self) -> float | None:
         if self.finished_at:
@@ -86,7 +104,12 @@ class SkillExecutor(Protocol):
         inputs: dict[str, Any],
         context: dict[str, Any],
     ) -> dict[str, Any]:
-        """執行 Skill 並返回輸出"""
+        """
+        執行 Skill 並返回輸出
+        
+        context 包含 node_id，以及 deadline_remaining：本次嘗試剩餘的秒數
+        （受節點 timeout 與 Fallback 鏈全局期限限制），逾時後執行會被取消。
+        """
         ...
     
     def is_available(self, skill_id: str) -> bool:
@@ -123,20 +146,46 @@ class AdaptiveGraphEngine:
     2. 自動 Fallback 處理
     3. 執行軌跡追蹤
     4. 用戶互動支援
+    5. 提供 skill_stats 時記錄技能延遲與成功率，並據以排序抽象節點的候選實現
+    6. 提供 circuit_breakers 時，斷路器開啟的技能不參與抽象節點解析；
+       斷路器掛在 fallback_chain 上，共用同一個鏈的引擎共用同一組斷路器，
+       鏈已掛有其他註冊表時拋出 ValueError（不會靜默取代）
+    7. resolution_strategy 為 "hedge" 的抽象節點以對沖方式執行：
+       首選實現超過 hedge_delay（未指定時為其歷史 p95）未完成時，
+       同時啟動下一個候選，採用第一個成功的結果並取消其餘執行
     """
     
+    DEFAULT_HEDGE_DELAY = 1.0  # 秒；沒有歷史統計時的對沖延遲
+    
     def __init__(
         self,
         graph: CapabilityGraph,
         skill_executor: SkillExecutor,
         interaction_handler: InteractionHandler | None = None,
         fallback_chain: FallbackChain | None = None,
+        compiled: CompiledGraph | None = None,
+        skill_stats: SkillStatsStore | None = None,
+        exploration_rate: float = 0.0,
+        circuit_breakers: CircuitBreakerRegistry | None = None,
+        hedge_delay: float | None = None,
+        max_hedges: int = 1,
     ):
         self.graph = graph
+        self.compiled = compiled or graph.compile()
         self.skill_executor = skill_executor
         self.interaction_handler = interaction_handler
         self.fallback_chain = fallback_chain or create_standard_fallback_chain()
-        self.resolver = AbstractNodeResolver()
+        if circuit_breakers is not None:
+            current = self.fallback_chain.circuit_breakers
+            if current is not None and current is not circuit_breakers:
+                raise ValueError("fallback_chain already has a different circuit breaker registry")
+            self.fallback_chain.circuit_breakers = circuit_breakers
+        self.skill_stats = skill_stats
+        self.hedge_delay = hedge_delay
+        self.max_hedges = max_hedges
+        self.resolver = AbstractNodeResolver(
+            skill_stats=skill_stats, exploration_rate=exploration_rate
+        )
         
         # 執行狀態
         self._trace: ExecutionTrace | None = None
@@ -147,6 +196,21 @@ class AdaptiveGraphEngine:
         self._on_node_start: Callable[[str, NodeType], None] | None = None
         self._on_node_complete: Callable[[str, ExecutionStatus], None] | None = None
         self._on_variable_set: Callable[[str, Any], None] | None = None
+        
+        # 節點類型 -> 處理器（取代逐一比較的 if/elif 分派）
+        self._handlers: dict[NodeType, Callable[[int, GraphNode, ExecutionStep], Awaitable[Any]]] = {
+            NodeType.START: self._handle_start,
+            NodeType.END: self._handle_end,
+            NodeType.SKILL: self._handle_skill,
+            NodeType.ABSTRACT: self._handle_abstract,
+            NodeType.BRANCH: self._handle_branch,
+            NodeType.MERGE: self._handle_merge,
+            NodeType.LOOP_START: self._handle_loop_start,
+            NodeType.LOOP_END: self._handle_loop_end,
+            NodeType.CONFIRM: self._handle_interaction,
+            NodeType.SELECT: self._handle_interaction,
+            NodeType.INPUT: self._handle_interaction,
+        }
     
     # ─────────────────────────────────────────────────────────────
     # 回調設定
@@ -192,22 +256,23 @@ class AdaptiveGraphEngine:
         self._trace = ExecutionTrace(
             graph_id=self.graph.id,
             started_at=datetime.now(),
-            total_nodes=len(self.graph.nodes),
+            graph_fingerprint=self.compiled.fingerprint,
+            total_nodes=self.compiled.node_count,
         )
         
         # 找到起始節點
-        start_node = self.graph.get_start_node()
-        if not start_node:
+        start = self.compiled.start
+        if start < 0:
             raise ValueError("Graph must have a start node")
         
         try:
             # 開始執行
-            await self._execute_node(start_node.id)
+            await self._execute_node(start)
             
             # 標記完成
             self._trace.status = ExecutionStatus.COMPLETED
             self._trace.variables = self._variables.copy()
-            
+        
         except Exception as e:
             self._trace.status = ExecutionStatus.FAILED
             raise
@@ -218,11 +283,10 @@ class AdaptiveGraphEngine:
         
         return self._trace
     
-    async def _execute_node(self, node_id: str) -> Any:
-        """執行單一節點"""
-        node = self.graph.get_node(node_id)
-        if not node:
-            raise ValueError(f"Node not found: {node_id}")
+    async def _execute_node(self, index: int) -> Any:
+        """執行單一節點（以編譯後的節點索引）"""
+        node = self.compiled.nodes[index]
+        node_id = node.id
         
         # 記錄路徑
         self._trace.path.append(node_id)
@@ -242,11 +306,14 @@ class AdaptiveGraphEngine:
             self._on_node_start(node_id, node.type)
         
         try:
-            result = await self._execute_node_by_type(node, step)
+            handler = self._handlers.get(self.compiled.node_types[index])
+            if handler is None:
+                raise ValueError(f"Unknown node type: {node.type}")
+            result = await handler(index, node, step)
             step.status = ExecutionStatus.COMPLETED
             step.result = result
             self._trace.executed_nodes += 1
-            
+        
         except Exception as e:
             step.status = ExecutionStatus.FAILED
             step.error = ExecutionError.from_exception(e, node_id, node.skill_id)
@@ -261,55 +328,26 @@ class AdaptiveGraphEngine:
         
         return result
     
-    async def _execute_node_by_type(self, node: GraphNode, step: ExecutionStep) -> Any:
-        """根據節點類型執行"""
-        
-        if node.type == NodeType.START:
-            return await self._handle_start(node)
-        
-        elif node.type == NodeType.END:
-            return await self._handle_end(node)
-        
-        elif node.type == NodeType.SKILL:
-            return await self._handle_skill(node, step)
-        
-        elif node.type == NodeType.ABSTRACT:
-            return await self._handle_abstract(node, step)
-        
-        elif node.type == NodeType.BRANCH:
-            return await self._handle_branch(node)
-        
-        elif node.type == NodeType.MERGE:
-            return await self._handle_merge(node)
-        
-        elif node.type == NodeType.LOOP_START:
-            return await self._handle_loop_start(node)
-        
-        elif node.type == NodeType.LOOP_END:
-            return await self._handle_loop_end(node)
-        
-        elif node.type in (NodeType.CONFIRM, NodeType.SELECT, NodeType.INPUT):
-            return await self._handle_interaction(node)
-        
-        else:
-            raise ValueError(f"Unknown node type: {node.type}")
+    async def _execute_successor(self, index: int, default: Any = None) -> Any:
+        """執行第一個後繼節點；沒有後繼時回傳 default"""
+        successor = self.compiled.first_successor(index)
+        if successor is not None:
+            return await self._execute_node(successor)
+        return default
     
     # ─────────────────────────────────────────────────────────────
     # 各類型節點處理
     # ─────────────────────────────────────────────────────────────
     
-    async def _handle_start(self, node: GraphNode) -> Any:
+    async def _handle_start(self, index: int, node: GraphNode, step: ExecutionStep) -> Any:
         """處理開始節點"""
-        successors = self.graph.get_successors(node.id)
-        if successors:
-            return await self._execute_node(successors[0])
-        return None
+        return await self._execute_successor(index)
     
-    async def _handle_end(self, node: GraphNode) -> Any:
+    async def _handle_end(self, index: int, node: GraphNode, step: ExecutionStep) -> Any:
         """處理結束節點"""
         return self._variables.copy()
     
-    async def _handle_skill(self, node: GraphNode, step: ExecutionStep) -> Any:
+    async def _handle_skill(self, index: int, node: GraphNode, step: ExecutionStep) -> Any:
         """處理 Skill 節點"""
         if not node.skill_id:
             raise ValueError(f"Skill node {node.id} has no skill_id")
@@ -319,17 +357,16 @@ class AdaptiveGraphEngine:
         
         # 使用 Fallback 執行
         async def execute_skill():
-            return await self.skill_executor.execute(
-                node.skill_id,
-                inputs,
-                {"node_id": node.id},
-            )
+            return await self._execute_attempt(node.skill_id, inputs, {"node_id": node.id})
         
+        started = time.perf_counter()
         result = await self.fallback_chain.execute_with_fallback(
             execute_skill,
             node_id=node.id,
             skill_id=node.skill_id,
+            attempt_timeout=node.timeout,
         )
+        step.latency = time.perf_counter() - started  # 含重試
         
         step.fallback_used = result.strategy_used.value != "retry" or result.retries > 0
         step.retry_count = result.retries
@@ -345,28 +382,46 @@ class AdaptiveGraphEngine:
                     self._set_variable(output_name, result[output_name])
         
         # 繼續執行
-        successors = self.graph.get_successors(node.id)
-        if successors:
-            return await self._execute_node(successors[0])
-        
-        return result
+        return await self._execute_successor(index, result)
     
-    async def _handle_abstract(self, node: GraphNode, step: ExecutionStep) -> Any:
+    async def _handle_abstract(self, index: int, node: GraphNode, step: ExecutionStep) -> Any:
         """處理抽象節點（動態解析）"""
         
+        implementations = self.compiled.implementations[index]  # 已按優先級排序
+        
+        # 斷路器開啟的技能視為已嘗試過，不參與解析
+        breakers = self.fallback_chain.circuit_breakers
+        open_circuits = [
+            impl.skill_id for impl in implementations
+            if breakers is not None and breakers.is_open(impl.skill_id)
+        ]
+        
         # 建立解析上下文
         context = ResolutionContext(
             input_path=self._variables.get("input_path"),
             input_type=self._variables.get("input_type"),
             available_skills=[
-                impl.skill_id for impl in node.implementations
+                impl.skill_id for impl in implementations
                 if self.skill_executor.is_available(impl.skill_id)
+                and impl.skill_id not in open_circuits
             ],
+            previous_attempts=open_circuits,
             variables=self._variables,
         )
         
-        # 解析抽象節點
-        implementation = self.resolver.resolve(node, context)
+        # 解析抽象節點（相同輸入特徵的解析結果會被快取，例如迴圈中的重複解析）
+        hedging = node.resolution_strategy == "hedge"
+        if hedging:
+            ranked, cache_hit = self.resolver.rank_memoized(node, context, self.compiled.fingerprint)
+            implementation = ranked[0] if ranked else None
+        else:
+            implementation, cache_hit = self.resolver.resolve_memoized(
+                node, context, self.compiled.fingerprint
+            )
+        if cache_hit:
+            self._trace.resolution_cache_hits += 1
+        else:
+            self._trace.resolution_cache_misses += 1
         
         if not implementation:
             # 需要用戶選擇
@@ -388,21 +443,16 @@ class AdaptiveGraphEngine:
         step.skill_id = implementation.skill_id
         inputs = {k: self._variables.get(k) for k in self._variables}
         
-        available_impls = [impl.skill_id for impl in node.implementations]
-        
-        async def execute_implementation():
-            return await self.skill_executor.execute(
-                implementation.skill_id,
-                inputs,
-                {"node_id": node.id, "abstract": True},
+        if hedging and len(ranked) > 1:
+            result, implementation, latency = await self._execute_hedged(
+                node, step, ranked[:1 + self.max_hedges], inputs, open_circuits
             )
-        
-        result = await self.fallback_chain.execute_with_fallback(
-            execute_implementation,
-            node_id=node.id,
-            skill_id=implementation.skill_id,
-            available_implementations=available_impls,
-        )
+        else:
+            result, latency = await self._execute_implementation(
+                node, implementation, inputs, open_circuits
+            )
+        step.skill_id = result.final_skill or implementation.skill_id  # 實際執行的實現
+        step.latency = latency
         
         step.fallback_used = True
         step.retry_count = result.retries
@@ -417,33 +467,138 @@ class AdaptiveGraphEngine:
                 self._set_variable(output_name, result)
         
         # 繼續執行
-        successors = self.graph.get_successors(node.id)
-        if successors:
-            return await self._execute_node(successors[0])
+        return await self._execute_successor(index, result)
+    
+    async def _execute_implementation(
+        self,
+        node: GraphNode,
+        implementation: Implementation,
+        inputs: dict[str, Any],
+        excluded: list[str],
+    ) -> tuple[FallbackResult, float]:
+        """
+        以 Fallback 執行單一實現，返回結果與執行時間（含重試與切換）
         
-        return result
+        Fallback 鏈切換實現時，依 _fallback_order 的順序執行其他技能。
+        """
+        async def execute_implementation(skill_id: str):
+            return await self._execute_attempt(skill_id, inputs, {"node_id": node.id, "abstract": True})
+        
+        started = time.perf_counter()
+        result = await self.fallback_chain.execute_with_fallback(
+            None,
+            node_id=node.id,
+            skill_id=implementation.skill_id,
+            available_implementations=self._fallback_order(node, implementation, excluded),
+            attempt_timeout=node.timeout,
+            implementation_factory=execute_implementation,
+        )
+        return result, time.perf_counter() - started
     
-    async def _handle_branch(self, node: GraphNode) -> Any:
+    def _fallback_order(
+        self, node: GraphNode, implementation: Implementation, excluded: list[str]
+    ) -> list[str]:
+        """
+        實現失敗時的替代順序：實現指定的 fallbacks，
+        再依解析器排序（統計或優先級）的其他實現；只保留可用的技能
+        """
+        order = [implementation.skill_id, *implementation.fallbacks]
+        order.extend(impl.skill_id for impl in self.resolver.rank_fallbacks(node, excluded))
+        return [
+            skill_id for skill_id in dict.fromkeys(order)
+            if skill_id == implementation.skill_id or self.skill_executor.is_available(skill_id)
+        ]
+    
+    async def _execute_hedged(
+        self,
+        node: GraphNode,
+        step: ExecutionStep,
+        candidates: list[Implementation],
+        inputs: dict[str, Any],
+        excluded: list[str],
+    ) -> tuple[FallbackResult, Implementation, float]:
+        """
+        對沖執行：依序啟動候選，採用第一個成功的結果
+        
+        最後啟動的實現超過對沖延遲仍未完成，或所有執行中的實現都失敗時，
+        啟動下一個候選；返回時取消仍在執行的實現（被取消者不計入統計）。
+        各候選的 Fallback 不會切換到其他對沖候選。全部失敗時返回最後一個失敗結果。
+        """
+        remaining = list(candidates)
+        running: dict[asyncio.Task, Implementation] = {}
+        
+        def launch() -> Implementation:
+            impl = remaining.pop(0)
+            others = [c.skill_id for c in candidates if c is not impl]
+            task = asyncio.ensure_future(
+                self._execute_implementation(node, impl, inputs, excluded + others)
+            )
+            running[task] = impl
+            step.hedged.append(impl.skill_id)
+            return impl
+        
+        last = launch()
+        failure: tuple[FallbackResult, Implementation, float] | None = None
+        try:
+            while running:
+                done, _ = await asyncio.wait(
+                    running,
+                    timeout=self._hedge_delay(last) if remaining else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:  # 對沖延遲已過
+                    last = launch()
+                    continue
+                for task in done:
+                    impl = running.pop(task)
+                    result, latency = task.result()
+                    if result.success:
+                        return result, impl, latency
+                    failure = (result, impl, latency)
+                if not running and remaining:
+                    last = launch()
+            return failure
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+    
+    def _hedge_delay(self, implementation: Implementation) -> float:
+        """啟動下一個候選前的等待時間：指定值，或該實現的歷史 p95"""
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        if self.skill_stats is not None:
+            p95 = self.skill_stats.get(implementation.skill_id).p95
+            if p95 is not None:
+                return p95
+        return self.DEFAULT_HEDGE_DELAY
+    
+    async def _handle_branch(self, index: int, node: GraphNode, step: ExecutionStep) -> Any:
         """處理分支節點"""
-        if not node.conditions:
+        conditions = self.compiled.branches[index]
+        if not conditions:
             raise ValueError(f"Branch node {node.id} has no conditions")
         
         # 評估條件
-        for condition in node.conditions:
-            if self._evaluate_condition(condition.expression):
-                return await self._execute_node(condition.target)
+        for condition in conditions:
+            if self._evaluate_condition(condition):
+                return await self._execute_branch_target(condition)
         
         # 預設：第一個分支
-        return await self._execute_node(node.conditions[0].target)
+        return await self._execute_branch_target(conditions[0])
+    
+    async def _execute_branch_target(self, condition: CompiledCondition) -> Any:
+        """執行分支目標節點"""
+        if condition.target_index < 0:
+            raise ValueError(f"Node not found: {condition.target}")
+        return await self._execute_node(condition.target_index)
     
-    async def _handle_merge(self, node: GraphNode) -> Any:
+    async def _handle_merge(self, index: int, node: GraphNode, step: ExecutionStep) -> Any:
         """處理合併節點"""
-        successors = self.graph.get_successors(node.id)
-        if successors:
-            return await self._execute_node(successors[0])
-        return None
+        return await self._execute_successor(index)
     
-    async def _handle_loop_start(self, node: GraphNode) -> Any:
+    async def _handle_loop_start(self, index: int, node: GraphNode, step: ExecutionStep) -> Any:
         """處理迴圈開始節點"""
         max_iterations = node.max_iterations
         
@@ -452,14 +607,14 @@ class AdaptiveGraphEngine:
             self._set_variable("_iteration_count", i + 1)
             
             # 執行迴圈體
-            successors = self.graph.get_successors(node.id)
-            if successors:
-                await self._execute_node(successors[0])
+            await self._execute_successor(index)
             
-            # 檢查是否應該退出（由 loop_end 設定）
+            # 檢查是否應該退出（由 loop_end 設定，或迴圈邊的 exit_condition 成立）
             if self._variables.get("_loop_exit"):
                 self._variables.pop("_loop_exit", None)
                 break
+            if any(exit.test(self._variables) for exit in self.compiled.loop_exits[index]):
+                break
         
         # 清理迴圈變數
         self._variables.pop("_iteration", None)
@@ -467,12 +622,12 @@ class AdaptiveGraphEngine:
         
         return None
     
-    async def _handle_loop_end(self, node: GraphNode) -> Any:
+    async def _handle_loop_end(self, index: int, node: GraphNode, step: ExecutionStep) -> Any:
         """處理迴圈結束節點"""
         # loop_end 通常不需要特殊處理，由 loop_start 控制流程
         return None
     
-    async def _handle_interaction(self, node: GraphNode) -> Any:
+    async def _handle_interaction(self, index: int, node: GraphNode, step: ExecutionStep) -> Any:
         """處理互動節點"""
         if not self.interaction_handler:
             raise ValueError("Interaction handler not set")
@@ -493,33 +648,46 @@ class AdaptiveGraphEngine:
         self._set_variable(output_name, result)
         
         # 繼續執行
-        successors = self.graph.get_successors(node.id)
-        if successors:
-            return await self._execute_node(successors[0])
-        
-        return result
+        return await self._execute_successor(index, result)
     
     # ─────────────────────────────────────────────────────────────
     # 輔助方法
     # ─────────────────────────────────────────────────────────────
     
+    async def _execute_attempt(self, skill_id: str, inputs: dict[str, Any], context: dict[str, Any]) -> Any:
+        """
+        Fallback 鏈中的單次技能執行，以該次的成敗與耗時更新技能統計
+        
+        單次嘗試逾時記為失敗；被外部取消（如對沖落敗）的執行不計入統計。
+        """
+        started = time.perf_counter()
+        try:
+            result = await self.skill_executor.execute(
+                skill_id, inputs, {**context, "deadline_remaining": remaining_time()}
+            )
+        except asyncio.CancelledError:
+            if remaining_time() == 0.0:
+                self._record_attempt(skill_id, False, started)
+            raise
+        except Exception:
+            self._record_attempt(skill_id, False, started)
+            raise
+        self._record_attempt(skill_id, True, started)
+        return result
+    
+    def _record_attempt(self, skill_id: str, success: bool, started: float) -> None:
+        if self.skill_stats is not None:
+            self.skill_stats.record(skill_id, success, time.perf_counter() - started)
+    
     def _set_variable(self, name: str, value: Any):
         """設定變數"""
         self._variables[name] = value
         if self._on_variable_set:
             self._on_variable_set(name, value)
     
-    def _evaluate_condition(self, expression: str) -> bool:
-        """評估條件表達式"""
-        try:
-            # 建立安全的評估環境
-            safe_vars = self._variables.copy()
-            
-            # 簡化實作：直接 eval
-            # 生產環境應使用 ast 或專用表達式引擎
-            return eval(expression, {"__builtins__": {}}, safe_vars)
-        except Exception:
-            return False
+    def _evaluate_condition(self, condition: CompiledCondition) -> bool:
+        """評估條件表達式（載入時已編譯，直接讀取目前的變數，不複製）"""
+        return condition.test(self._variables)
     
     def get_current_state(self) -> dict[str, Any]:
         """取得當前執行狀態"""
@@ -544,6 +712,7 @@ def create_engine(
     skill_executor: SkillExecutor,
     interaction_handler: InteractionHandler | None = None,
     fallback_mode: str = "standard",
+    skill_stats: SkillStatsStore | None = None,
 ) -> AdaptiveGraphEngine:
     """
     建立自適應圖執行引擎
@@ -553,6 +722,7 @@ def create_engine(
         skill_executor: Skill 執行器
         interaction_handler: 互動處理器
         fallback_mode: Fallback 模式 (standard, aggressive, conservative)
+        skill_stats: 技能執行統計（提供時依實際表現排序抽象節點的實現）
     
     Returns:
         AdaptiveGraphEngine: 執行引擎
@@ -575,4 +745,5 @@ def create_engine(
         skill_executor=skill_executor,
         interaction_handler=interaction_handler,
         fallback_chain=fallback_chain,
+        skill_stats=skill_stats,
     )
@@ -6,9 +6,17 @@ Application - Services - Node Resolver
 from __future__ import annotations
 from typing import Any, Protocol, Optional, List, Dict
 
+from ...domain.services.expression import is_valid_expression
+from ...domain.services.validation import ValidationReport, reachability_issues, validation_cache
+
 
 class SkillRegistry(Protocol):
-    """技能註冊表協議"""
+    """
+    技能註冊表協議
+    
+    註冊表可另外提供 rank_skills(capabilities) 與 find_skills_by_extension(ext)
+    （見 infrastructure.skills.InMemorySkillRegistry），NodeResolverService 會優先使用。
+    """
     def get_skill(self, skill_id: str) -> Optional[Dict[str, Any]]:
         ...
     
@@ -36,6 +44,17 @@ class NodeResolverService:
             "http://": "web-reader",
             "https://": "web-reader",
         }
+        self._build_detector_index()
+    
+    def _build_detector_index(self) -> None:
+        """將偵測規則分為副檔名表與前綴清單（保留原本的規則順序作為優先序）"""
+        self._extension_rules: Dict[str, tuple] = {}
+        self._prefix_rules: List[tuple] = []
+        for order, (pattern, skill_id) in enumerate(self._type_detectors.items()):
+            if pattern.startswith("."):
+                self._extension_rules.setdefault(pattern, (order, skill_id))
+            else:
+                self._prefix_rules.append((order, pattern, skill_id))
     
     async def resolve(
         self,
@@ -79,17 +98,18 @@ class NodeResolverService:
                 "reason": "URL input detected",
             }
         
-        # 2. 從能力要求找匹配的技能
+        # 2. 從能力要求找匹配的技能（涵蓋最多契約能力者優先）
         if capabilities and self.skill_registry:
-            for cap in capabilities:
-                skills = self.skill_registry.find_skills_by_capability(cap)
-                if skills:
-                    # 選擇第一個匹配的
-                    return {
-                        "skill_id": skills[0]["id"],
-                        "confidence": 0.8,
-                        "reason": f"Matched capability: {cap}",
-                    }
+            ranked = self._rank_skills(capabilities)
+            if ranked:
+                skill, covered = ranked[0]
+                label = "capability" if len(covered) == 1 else "capabilities"
+                return {
+                    "skill_id": skill["id"],
+                    # 完全涵蓋時與單一能力匹配相同（0.8），部分涵蓋依比例降低
+                    "confidence": round(0.8 * len(covered) / len(set(capabilities)), 3),
+                    "reason": f"Matched {label}: {', '.join(covered)}",
+                }
         
         # 3. 使用預設
         if "read" in inputs or any("read" in cap for cap in capabilities):
@@ -105,17 +125,91 @@ class NodeResolverService:
             "reason": "No matching skill found",
         }
     
+    async def resolve_batch(
+        self,
+        contract: Dict[str, Any],
+        contexts: List[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """
+        批次解析同一契約的多個輸入
+        
+        依檔案類型/URL 分組：檔案類型可判斷的輸入直接產生結果，
+        其餘每組只執行一次 resolve（能力查詢與預設選擇與輸入無關）。
+        
+        Returns:
+            與 contexts 順序相同的解析結果
+        """
+        results: List[Dict[str, Any]] = []
+        shared: Dict[tuple, Dict[str, Any]] = {}
+        for context in contexts:
+            if "input_file" in context:
+                file_path = context["input_file"]
+                skill_id = self._detect_by_file_type(file_path)
+                if skill_id:
+                    results.append({
+                        "skill_id": skill_id,
+                        "confidence": 0.9,
+                        "reason": f"Auto-detected from file type: {file_path}",
+                    })
+                    continue
+            
+            key = ("input_url" in context,)
+            if key not in shared:
+                shared[key] = await self.resolve(contract, {"input_url": True} if key[0] else {})
+            results.append(dict(shared[key]))
+        return results
+    
+    def _rank_skills(self, capabilities: List[str]) -> List[tuple]:
+        """
+        依涵蓋的契約能力數排序候選技能
+        
+        註冊表提供 rank_skills 時直接使用其反向索引；
+        否則逐一查詢 find_skills_by_capability 並以相同規則排序。
+        
+        Returns:
+            [(技能, 涵蓋的能力清單)]
+        """
+        rank_skills = getattr(self.skill_registry, "rank_skills", None)
+        if rank_skills is not None:
+            return rank_skills(capabilities)
+        
+        coverage: Dict[str, list] = {}  # skill_id -> [技能, 涵蓋的能力, 最早能力序, 註冊序]
+        for order, capability in enumerate(dict.fromkeys(capabilities)):
+            for rank, skill in enumerate(self.skill_registry.find_skills_by_capability(capability)):
+                entry = coverage.setdefault(skill["id"], [skill, [], order, rank])
+                entry[1].append(capability)
+        
+        ranked = sorted(coverage.values(), key=lambda e: (-len(e[1]), e[2], e[3]))
+        return [(skill, covered) for skill, covered, _, _ in ranked]
+    
     def _detect_by_file_type(self, file_path: str) -> Optional[str]:
-        """根據檔案類型偵測技能"""
+        """根據檔案類型偵測技能（副檔名查表，同時符合多條規則時以規則順序為準）"""
         file_path_lower = file_path.lower()
         
-        for pattern, skill_id in self._type_detectors.items():
-            if pattern.startswith("."):
-                if file_path_lower.endswith(pattern):
-                    return skill_id
-            else:
-                if file_path_lower.startswith(pattern):
-                    return skill_id
+        best: Optional[tuple] = None
+        segment = file_path_lower.rsplit("/", 1)[-1]
+        dot = segment.find(".")
+        while dot >= 0:
+            rule = self._extension_rules.get(segment[dot:])
+            if rule and (best is None or rule < best):
+                best = rule
+            dot = segment.find(".", dot + 1)
+        
+        for order, prefix, skill_id in self._prefix_rules:
+            if best is not None and order > best[0]:
+                break
+            if file_path_lower.startswith(prefix):
+                return skill_id
+        
+        if best is not None:
+            return best[1]
+        
+        # 內建規則之外，使用註冊表的副檔名索引
+        find_by_extension = getattr(self.skill_registry, "find_skills_by_extension", None)
+        if find_by_extension is not None and "." in segment:
+            skills = find_by_extension(segment[segment.rfind("."):])
+            if skills:
+                return skills[0]["id"]
         
         return None
 
@@ -131,12 +225,23 @@ class GraphValidatorService:
         """
         驗證圖結構
         
+        結果以圖的內容指紋記憶化，未變更的圖不會重複驗證。
+        
         Returns:
             驗證結果
                 - valid: 是否有效
                 - errors: 錯誤列表
                 - warnings: 警告列表
+                - unreachable: 從起始節點不可達的節點
+                - dead_ends: 無法到達結束節點的節點
         """
+        report = validation_cache.get_or_compute(
+            ("domain", graph.fingerprint), lambda: self._validate(graph),
+        )
+        return report.to_dict()
+    
+    def _validate(self, graph) -> ValidationReport:
+        """單次走訪節點與邊，再以正反向可達性分析"""
         errors: List[str] = []
         warnings: List[str] = []
         
@@ -156,25 +261,47 @@ class GraphValidatorService:
         if graph.has_cycle():
             warnings.append("Graph contains cycles (may be intentional for loops)")
         
-        # 4. 檢查孤立節點
-        all_nodes = set(n.id for n in graph.nodes())
-        connected = set()
-        
-        for edge in graph.edges():
-            connected.add(edge.source)
-            connected.add(edge.target)
+        # 4. 單次走訪節點：孤立節點、抽象節點實現、分支條件目標
+        orphans = set()
+        branch_targets: Dict[str, List[str]] = {}
+        branch_sources: Dict[str, List[str]] = {}
+        for node in graph.nodes():
+            if not graph.in_degree(node.id) and not graph.out_degree(node.id):
+                orphans.add(node.id)
+            if node.is_abstract() and not node.implementations:
+                warnings.append(f"Abstract node '{node.id}' has no implementations")
+            for c in node.conditions:
+                if not is_valid_expression(c.expression):
+                    warnings.append(
+                        f"Branch '{node.id}' condition '{c.name}' has an invalid expression"
+                    )
+                if graph.get_node(c.target) is None:
+                    warnings.append(
+                        f"Branch '{node.id}' condition '{c.name}' targets unknown node '{c.target}'"
+                    )
+                    continue
+                branch_targets.setdefault(node.id, []).append(c.target)
+                branch_sources.setdefault(c.target, []).append(node.id)
         
-        orphans = all_nodes - connected
         if orphans:
             errors.append(f"Graph has orphan nodes: {orphans}")
         
-        # 5. 檢查抽象節點是否有實現
-        for node in graph.nodes():
-            if node.is_abstract() and not node.implementations:
-                warnings.append(f"Abstract node '{node.id}' has no implementations")
+        # 5. 可達性：不可達節點與死路
+        unreachable, dead_ends = reachability_issues(
+            (n.id for n in graph.nodes()),
+            [n.id for n in start_nodes],
+            [n.id for n in end_nodes],
+            lambda n: [s.id for s in graph.get_successors(n)] + branch_targets.get(n, []),
+            lambda n: [p.id for p in graph.get_predecessors(n)] + branch_sources.get(n, []),
+        )
+        if unreachable:
+            warnings.append(f"Unreachable nodes: {unreachable}")
+        if dead_ends:
+            warnings.append(f"Nodes that cannot reach an end node: {dead_ends}")
         
-        return {
-            "valid": len(errors) == 0,
-            "errors": errors,
-            "warnings": warnings,
-        }
+        return ValidationReport(
+            errors=tuple(errors),
+            warnings=tuple(warnings),
+            unreachable=tuple(unreachable),
+            dead_ends=tuple(dead_ends),
+        )
@@ -4,6 +4,7 @@ Application - Use Cases - Execute Capability
 """
 
 from __future__ import annotations
+from collections import ChainMap
 from dataclasses import dataclass, field
 from typing import Any, Protocol
 from datetime import datetime
@@ -11,6 +12,7 @@ import uuid
 
 from ...domain.entities import CapabilityGraph, GraphNode
 from ...domain.value_objects import NodeType, ExecutionStatus
+from ...domain.services.compiler import CompiledCondition, CompiledGraph
 
 
 class SkillExecutor(Protocol):
@@ -54,6 +56,7 @@ class ExecutionTrace:
     steps: list[ExecutionStep] = field(default_factory=list)
     start_time: datetime = field(default_factory=datetime.now)
     end_time: datetime | None = None
+    graph_fingerprint: str = ""
     
     def add_step(self, step: ExecutionStep) -> None:
         self.steps.append(step)
@@ -62,6 +65,7 @@ class ExecutionTrace:
         return {
             "execution_id": self.execution_id,
             "capability_id": self.capability_id,
+            "graph_fingerprint": self.graph_fingerprint,
             "status": self.status.value,
             "steps": [
                 {
@@ -102,7 +106,7 @@ class ExecuteCapabilityUseCase:
     
     async def execute(
         self,
-        graph: CapabilityGraph,
+        graph: CapabilityGraph | CompiledGraph,
         inputs: dict[str, Any],
         options: dict[str, Any] | None = None,
     ) -> dict[str, Any]:
@@ -110,7 +114,7 @@ class ExecuteCapabilityUseCase:
         執行能力圖
         
         Args:
-            graph: 能力圖
+            graph: 能力圖（或已編譯的能力圖，可供多個並行執行共用）
             inputs: 執行輸入
             options: 執行選項
                 - auto_resolve: 是否自動解析抽象節點
@@ -122,12 +126,14 @@ class ExecuteCapabilityUseCase:
         options = options or {}
         auto_resolve = options.get("auto_resolve", True)
         skip_confirmation = options.get("skip_confirmation", False)
+        compiled = graph if isinstance(graph, CompiledGraph) else graph.compile()
         
         # 建立執行追蹤
         trace = ExecutionTrace(
             execution_id=str(uuid.uuid4()),
-            capability_id=graph.id,
+            capability_id=compiled.graph_id,
             status=ExecutionStatus.RUNNING,
+            graph_fingerprint=compiled.fingerprint,
         )
         
         # 執行上下文
@@ -139,14 +145,13 @@ class ExecuteCapabilityUseCase:
         
         try:
             # 找到起始節點
-            start_nodes = graph.find_start_nodes()
-            if not start_nodes:
+            if not compiled.entry_points:
                 raise ValueError("No start node found in graph")
             
             # 從起始節點開始執行
-            for start_node in start_nodes:
+            for start in compiled.entry_points:
                 await self._execute_node(
-                    graph, start_node, context, trace,
+                    compiled, start, context, trace,
                     auto_resolve, skip_confirmation
                 )
             
@@ -173,14 +178,15 @@ class ExecuteCapabilityUseCase:
     
     async def _execute_node(
         self,
-        graph: CapabilityGraph,
-        node: GraphNode,
+        graph: CompiledGraph,
+        index: int,
         context: dict[str, Any],
         trace: ExecutionTrace,
         auto_resolve: bool,
         skip_confirmation: bool,
     ) -> None:
-        """執行單個節點"""
+        """執行單個節點（以編譯後的節點索引）"""
+        node: GraphNode = graph.nodes[index]
         step = ExecutionStep(
             node_id=node.id,
             node_type=node.type.value,
@@ -214,9 +220,10 @@ class ExecuteCapabilityUseCase:
             
             elif node.type == NodeType.ABSTRACT:
                 # 抽象節點 - 需要解析
-                if auto_resolve and node.implementations:
-                    # 自動選擇第一個實現
-                    impl = node.get_available_implementations()[0]
+                implementations = graph.implementations[index]
+                if auto_resolve and implementations:
+                    # 自動選擇第一個實現（編譯時已按優先級排序）
+                    impl = implementations[0]
                     step.resolved_skill = impl.skill_id
                     
                     if self.skill_executor:
@@ -229,22 +236,20 @@ class ExecuteCapabilityUseCase:
             
             elif node.type == NodeType.BRANCH:
                 # 分支節點 - 評估條件
-                selected_target = await self._evaluate_branch(
-                    node, context
+                selected = await self._evaluate_branch(
+                    graph, index, context
                 )
-                step.outputs = {"selected": selected_target}
+                step.outputs = {"selected": selected.target if selected else None}
                 
                 # 只執行選中的分支
-                if selected_target:
-                    target_node = graph.get_node(selected_target)
-                    if target_node:
-                        step.status = ExecutionStatus.COMPLETED
-                        step.end_time = datetime.now()
-                        await self._execute_node(
-                            graph, target_node, context, trace,
-                            auto_resolve, skip_confirmation
-                        )
-                        return
+                if selected and selected.target_index >= 0:
+                    step.status = ExecutionStatus.COMPLETED
+                    step.end_time = datetime.now()
+                    await self._execute_node(
+                        graph, selected.target_index, context, trace,
+                        auto_resolve, skip_confirmation
+                    )
+                    return
             
             elif node.type == NodeType.CONFIRM:
                 # 確認節點
@@ -270,7 +275,7 @@ class ExecuteCapabilityUseCase:
             elif node.type == NodeType.LOOP:
                 # 迴圈節點
                 await self._execute_loop(
-                    graph, node, context, trace,
+                    graph, index, context, trace,
                     auto_resolve, skip_confirmation
                 )
             
@@ -278,8 +283,7 @@ class ExecuteCapabilityUseCase:
             step.end_time = datetime.now()
             
             # 執行後繼節點
-            successors = graph.get_successors(node.id)
-            for successor in successors:
+            for successor in graph.successors(index):
                 await self._execute_node(
                     graph, successor, context, trace,
                     auto_resolve, skip_confirmation
@@ -293,45 +297,42 @@ class ExecuteCapabilityUseCase:
     
     async def _evaluate_branch(
         self,
-        node: GraphNode,
+        graph: CompiledGraph,
+        index: int,
         context: dict[str, Any],
-    ) -> str | None:
+    ) -> CompiledCondition | None:
         """評估分支條件"""
-        for condition in node.conditions:
-            # 簡單的條件評估
-            expr = condition.expression
-            
-            # 支援基本的條件語法
+        conditions = graph.branches[index]
+        
+        scope = self._evaluation_scope(context)
+        
+        for condition in conditions:
+            # 支援基本的條件語法（編譯時已預先解析）
             # file_type == 'pdf'
             # count > 10
-            # has_error == true
-            
-            try:
-                # 準備評估環境
-                eval_context = {
-                    **context.get("inputs", {}),
-                    **context.get("outputs", {}),
-                    **context.get("variables", {}),
-                }
-                
-                # 安全評估（生產環境應使用更安全的方式）
-                result = eval(expr, {"__builtins__": {}}, eval_context)
-                
-                if result:
-                    return condition.target
-            except Exception:
-                continue
+            # result.status == 'ok'
+            if condition.test(scope):
+                return condition
         
-        # 沒有匹配的條件，返回第一個條件的目標（default）
-        if node.conditions:
-            return node.conditions[-1].target
+        # 沒有匹配的條件，返回最後一個條件的目標（default）
+        if conditions:
+            return conditions[-1]
         
         return None
     
+    @staticmethod
+    def _evaluation_scope(context: dict[str, Any]) -> ChainMap:
+        """條件評估環境：variables > outputs > inputs，直接串接原映射不複製"""
+        return ChainMap(
+            context.get("variables", {}),
+            context.get("outputs", {}),
+            context.get("inputs", {}),
+        )
+    
     async def _execute_loop(
         self,
-        graph: CapabilityGraph,
-        node: GraphNode,
+        graph: CompiledGraph,
+        index: int,
         context: dict[str, Any],
         trace: ExecutionTrace,
         auto_resolve: bool,
@@ -339,16 +340,14 @@ class ExecuteCapabilityUseCase:
     ) -> None:
         """執行迴圈"""
         iteration = 0
-        max_iterations = node.max_iterations
+        max_iterations = graph.nodes[index].max_iterations
         
         while iteration < max_iterations:
             iteration += 1
             context["variables"]["loop_iteration"] = iteration
             
             # 執行迴圈體（後繼節點）
-            successors = graph.get_successors(node.id)
-            
-            for successor in successors:
+            for successor in graph.successors(index):
                 await self._execute_node(
                     graph, successor, context, trace,
                     auto_resolve, skip_confirmation
@@ -357,3 +356,6 @@ class ExecuteCapabilityUseCase:
             # 檢查終止條件
             if context.get("variables", {}).get("loop_break", False):
                 break
+            scope = self._evaluation_scope(context)
+            if any(exit.test(scope) for exit in graph.loop_exits[index]):
+                break
@@ -6,11 +6,12 @@ Domain - Entities - Graph Edge
 from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any
+import sys
 
 from ..value_objects import EdgeType
 
 
-@dataclass
+@dataclass(slots=True)
 class GraphEdge:
     """
     圖邊（實體）
@@ -47,8 +48,8 @@ class GraphEdge:
     def from_dict(cls, data: dict) -> "GraphEdge":
         """從字典建立"""
         return cls(
-            source=data["source"],
-            target=data["target"],
+            source=sys.intern(data["source"]),
+            target=sys.intern(data["target"]),
             type=EdgeType(data.get("type", "sequence")),
             label=data.get("label"),
             weight=data.get("weight", 1),
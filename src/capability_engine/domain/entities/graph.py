@@ -4,12 +4,17 @@ Domain - Entities - Capability Graph
 """
 
 from __future__ import annotations
+from collections import Counter
 from dataclasses import dataclass, field
 from typing import Any, Iterator
 
 from .node import GraphNode
 from .edge import GraphEdge
 from ..value_objects import NodeType, ComplexityMetrics, ComplexityLevel
+from ..services.compiler import CompiledGraph, compile_graph
+from ..services.fingerprint import ContentHash, GraphRefs, graph_refs, track_node, untrack_node
+from ..services.snapshot import decode_snapshot, encode_snapshot
+from ..services.topology import ComponentAnalysis, analyze_components, longest_path_length
 
 
 @dataclass
@@ -28,7 +33,39 @@ class CapabilityGraph:
     version: str = "1.0.0"
     
     _nodes: dict[str, GraphNode] = field(default_factory=dict)
-    _edges: list[GraphEdge] = field(default_factory=list)
+    _edges: dict[int, GraphEdge] = field(default_factory=dict)
+    
+    # 邊索引：node_id -> {edge_key: None}（保留加入順序），由 add_edge / remove_node 維護
+    # 只為有邊的節點建立索引，節省大量常駐圖的記憶體；移除單一邊為 O(1)
+    _out_edges: dict[str, dict[int, None]] = field(default_factory=dict, repr=False)
+    _in_edges: dict[str, dict[int, None]] = field(default_factory=dict, repr=False)
+    _next_edge_key: int = field(default=0, repr=False)
+    _compiled: CompiledGraph | None = field(default=None, repr=False)
+    
+    # 增量維護的複雜度計數，結構變更時只讓深度與快取失效
+    _type_counts: Counter[NodeType] = field(default_factory=Counter, repr=False)
+    _loop_iterations: Counter[int] = field(default_factory=Counter, repr=False)
+    _max_depth: int | None = field(default=None, repr=False)
+    _complexity: ComplexityMetrics | None = field(default=None, repr=False)
+    _content: ContentHash = field(default_factory=ContentHash, repr=False)
+    _refs: GraphRefs = field(default=(), repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        nodes, edges = self._nodes, self._edges
+        self._nodes = {}
+        self._edges = {}
+        self._out_edges = {}
+        self._in_edges = {}
+        self._type_counts = Counter()
+        self._loop_iterations = Counter()
+        self._max_depth = 0
+        self._complexity = None
+        self._content = ContentHash()
+        self._refs = graph_refs(self)
+        for node in nodes.values():
+            self.add_node(node)
+        for edge in (edges.values() if isinstance(edges, dict) else edges):
+            self.add_edge(edge)
     
     # === 節點操作 ===
     
@@ -37,17 +74,97 @@ class CapabilityGraph:
         if node.id in self._nodes:
             raise ValueError(f"Node {node.id} already exists")
         self._nodes[node.id] = node
+        track_node(node, self._refs)
+        self._count_node(node, 1)
+        self._content.add("node", node.to_dict())
+        self._compiled = None
+        self._complexity = None
+        # 新節點尚無邊，自成一條長度為 1 的路徑
+        if self._max_depth is not None:
+            self._max_depth = max(self._max_depth, 1)
     
     def get_node(self, node_id: str) -> GraphNode | None:
         """取得節點"""
         return self._nodes.get(node_id)
     
     def remove_node(self, node_id: str) -> None:
-        """移除節點（同時移除相關邊）"""
+        """移除節點（同時移除相關邊，只觸及該節點的關聯邊）"""
         if node_id not in self._nodes:
             return
-        del self._nodes[node_id]
-        self._edges = [e for e in self._edges if e.source != node_id and e.target != node_id]
+        node = self._nodes.pop(node_id)
+        untrack_node(node, self._refs)
+        self._count_node(node, -1)
+        self._content.remove("node", node.to_dict())
+        self._invalidate_structure()
+        
+        for key in self._out_edges.pop(node_id, ()):
+            edge = self._edges.pop(key, None)
+            if edge is not None:
+                self._content.remove("edge", edge.to_dict())
+                if edge.target != node_id:
+                    self._unlink(self._in_edges, edge.target, key)
+        
+        for key in self._in_edges.pop(node_id, ()):
+            edge = self._edges.pop(key, None)
+            if edge is not None:
+                self._content.remove("edge", edge.to_dict())
+                self._unlink(self._out_edges, edge.source, key)
+    
+    def _count_node(self, node: GraphNode, delta: int) -> None:
+        self._type_counts[node.type] += delta
+        if node.type == NodeType.LOOP:
+            self._loop_iterations[node.max_iterations] += delta
+            if not self._loop_iterations[node.max_iterations]:
+                del self._loop_iterations[node.max_iterations]
+    
+    def _invalidate_structure(self) -> None:
+        self._compiled = None
+        self._complexity = None
+        self._max_depth = None
+    
+    def _node_changing(self, node: GraphNode, name: str) -> None:
+        """節點欄位即將重新指定：移除舊內容的計數與雜湊"""
+        if self._nodes.get(node.id) is not node:
+            return
+        if name == "id":
+            raise ValueError(f"Node {node.id} belongs to graph {self.id}; remove it before changing its id")
+        self._count_node(node, -1)
+        self._content.remove("node", node.to_dict())
+    
+    def _node_changed(self, node: GraphNode, name: str) -> None:
+        """節點欄位已重新指定：加入新內容並讓快取失效（類型變更另需重算深度）"""
+        if self._nodes.get(node.id) is not node:
+            return
+        self._count_node(node, 1)
+        self._content.add("node", node.to_dict())
+        if name == "type":
+            self._invalidate_structure()
+        else:
+            self._compiled = None
+            self._complexity = None
+    
+    def invalidate(self) -> None:
+        """
+        原地修改節點序列欄位的元素或邊的屬性（端點除外）後，重建計數、內容雜湊與快取
+        
+        重新指定節點欄位會自動通知，不需呼叫。
+        """
+        self._type_counts = Counter()
+        self._loop_iterations = Counter()
+        self._content = ContentHash()
+        for node in self._nodes.values():
+            self._count_node(node, 1)
+            self._content.add("node", node.to_dict())
+        for edge in self._edges.values():
+            self._content.add("edge", edge.to_dict())
+        self._invalidate_structure()
+    
+    @staticmethod
+    def _unlink(index: dict[str, dict[int, None]], node_id: str, key: int) -> None:
+        keys = index[node_id]
+        del keys[key]
+        if not keys:
+            del index[node_id]
     
     def nodes(self) -> Iterator[GraphNode]:
         """迭代所有節點"""
@@ -65,96 +182,126 @@ class CapabilityGraph:
             raise ValueError(f"Source node {edge.source} not found")
         if edge.target not in self._nodes:
             raise ValueError(f"Target node {edge.target} not found")
-        self._edges.append(edge)
+        key = self._next_edge_key
+        self._next_edge_key += 1
+        self._edges[key] = edge
+        self._out_edges.setdefault(edge.source, {})[key] = None
+        self._in_edges.setdefault(edge.target, {})[key] = None
+        self._content.add("edge", edge.to_dict())
+        self._invalidate_structure()
     
     def get_edges_from(self, node_id: str) -> list[GraphEdge]:
         """取得從節點出發的所有邊"""
-        return [e for e in self._edges if e.source == node_id]
+        return [self._edges[k] for k in self._out_edges.get(node_id, ())]
     
     def get_edges_to(self, node_id: str) -> list[GraphEdge]:
         """取得指向節點的所有邊"""
-        return [e for e in self._edges if e.target == node_id]
+        return [self._edges[k] for k in self._in_edges.get(node_id, ())]
     
     def edges(self) -> Iterator[GraphEdge]:
         """迭代所有邊"""
-        return iter(self._edges)
+        return iter(self._edges.values())
     
     @property
     def edge_count(self) -> int:
         return len(self._edges)
     
+    def in_degree(self, node_id: str) -> int:
+        """節點入度"""
+        return len(self._in_edges.get(node_id, ()))
+    
+    def out_degree(self, node_id: str) -> int:
+        """節點出度"""
+        return len(self._out_edges.get(node_id, ()))
+    
     # === 拓撲操作 ===
     
     def find_start_nodes(self) -> list[GraphNode]:
         """找到起始節點（入度為 0 或類型為 START）"""
-        targets = {e.target for e in self._edges}
         return [
             node for node in self._nodes.values()
-            if node.type == NodeType.START or node.id not in targets
+            if node.type == NodeType.START or node.id not in self._in_edges
         ]
     
     def find_end_nodes(self) -> list[GraphNode]:
         """找到結束節點（出度為 0 或類型為 END）"""
-        sources = {e.source for e in self._edges}
         return [
             node for node in self._nodes.values()
-            if node.type == NodeType.END or node.id not in sources
+            if node.type == NodeType.END or node.id not in self._out_edges
         ]
     
     def get_successors(self, node_id: str) -> list[GraphNode]:
         """取得後繼節點"""
-        edges = self.get_edges_from(node_id)
-        return [self._nodes[e.target] for e in edges if e.target in self._nodes]
+        return [self._nodes[self._edges[k].target] for k in self._out_edges.get(node_id, ())]
     
     def get_predecessors(self, node_id: str) -> list[GraphNode]:
         """取得前驅節點"""
-        edges = self.get_edges_to(node_id)
-        return [self._nodes[e.source] for e in edges if e.source in self._nodes]
+        return [self._nodes[self._edges[k].source] for k in self._in_edges.get(node_id, ())]
+    
+    def analyze_components(self) -> ComponentAnalysis[str]:
+        """強連通分量分析（迭代式 Tarjan，含縮點 DAG 與迴圈本體）"""
+        return analyze_components(self._nodes, self._successor_ids)
+    
+    def find_cycles(self) -> list[list[str]]:
+        """找出所有迴圈本體（每個含環的強連通分量）"""
+        return [list(cycle) for cycle in self.analyze_components().cycles]
     
     def has_cycle(self) -> bool:
-        """檢測是否有環"""
-        visited: set[str] = set()
-        rec_stack: set[str] = set()
-        
-        def dfs(node_id: str) -> bool:
-            visited.add(node_id)
-            rec_stack.add(node_id)
-            
-            for edge in self.get_edges_from(node_id):
-                if edge.target not in visited:
-                    if dfs(edge.target):
-                        return True
-                elif edge.target in rec_stack:
-                    return True
-            
-            rec_stack.remove(node_id)
-            return False
-        
-        # 允許迴圈節點有環
-        for node in self._nodes.values():
-            if node.type == NodeType.LOOP:
-                continue
-            if node.id not in visited:
-                if dfs(node.id):
-                    return True
-        return False
+        """檢測是否有環（允許純粹由迴圈節點構成的環）"""
+        return any(
+            any(self._nodes[node_id].type != NodeType.LOOP for node_id in cycle)
+            for cycle in self.analyze_components().cycles
+        )
+    
+    def _successor_ids(self, node_id: str) -> list[str]:
+        return [self._edges[k].target for k in self._out_edges.get(node_id, ())]
+    
+    # === 指紋 ===
+    
+    @property
+    def fingerprint(self) -> str:
+        """內容指紋（與節點/邊順序無關，隨增刪與節點欄位變更增量維護）"""
+        return self._content.digest({
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "version": self.version,
+        })
+    
+    # === 編譯 ===
+    
+    def compile(self) -> CompiledGraph:
+        """編譯為不可變的整數索引結構（結構變更前重複使用）"""
+        if self._compiled is None:
+            self._compiled = compile_graph(self)
+        return self._compiled
     
     # === 複雜度計算 ===
     
     def calculate_complexity(self) -> ComplexityMetrics:
-        """計算圖的複雜度"""
+        """
+        計算圖的複雜度
+        
+        各類計數於節點增刪與欄位變更時增量維護，此處為 O(1)；
+        只有深度在結構變更後才延遲重算，結果快取至下次變更。
+        """
+        if self._complexity is not None:
+            return self._complexity
+        
         node_count = len(self._nodes)
         edge_count = len(self._edges)
+        counts = self._type_counts
         
-        skill_count = sum(1 for n in self._nodes.values() if n.type == NodeType.SKILL)
-        abstract_count = sum(1 for n in self._nodes.values() if n.is_abstract())
-        branch_count = sum(1 for n in self._nodes.values() if n.type == NodeType.BRANCH)
-        loop_count = sum(1 for n in self._nodes.values() if n.type == NodeType.LOOP)
-        interaction_count = sum(1 for n in self._nodes.values() if n.is_interaction())
-        parallel_count = sum(1 for n in self._nodes.values() if n.type == NodeType.PARALLEL_SPLIT)
+        abstract_count = counts[NodeType.ABSTRACT]
+        interaction_count = sum(
+            count for node_type, count in counts.items() if node_type.is_interaction()
+        )
+        parallel_count = counts[NodeType.PARALLEL_SPLIT]
         
         # 計算最大深度
-        max_depth = self._calculate_max_depth()
+        if self._max_depth is None:
+            self._max_depth = self._calculate_max_depth()
+        max_depth = self._max_depth
         
         # 計算分支因子
         branch_factor = edge_count / max(node_count, 1)
@@ -163,12 +310,9 @@ class CapabilityGraph:
         cyclomatic = edge_count - node_count + 2
         
         # 計算最大迴圈迭代
-        max_iterations = max(
-            (n.max_iterations for n in self._nodes.values() if n.type == NodeType.LOOP),
-            default=0
-        )
+        max_iterations = max(self._loop_iterations, default=0)
         
-        return ComplexityMetrics(
+        self._complexity = ComplexityMetrics(
             node_count=node_count,
             edge_count=edge_count,
             cyclomatic_complexity=cyclomatic,
@@ -179,32 +323,19 @@ class CapabilityGraph:
             parallel_branches=parallel_count,
             abstract_nodes=abstract_count,
         )
+        return self._complexity
     
     def _calculate_max_depth(self) -> int:
-        """計算最大深度"""
+        """計算最大深度（最長路徑上的節點數，迴圈縮點計算）"""
         start_nodes = self.find_start_nodes()
         if not start_nodes:
             return 0
         
-        max_depth = 0
-        visited: dict[str, int] = {}
-        
-        def dfs(node_id: str, depth: int) -> int:
-            if node_id in visited:
-                return visited[node_id]
-            
-            visited[node_id] = depth
-            local_max = depth
-            
-            for edge in self.get_edges_from(node_id):
-                local_max = max(local_max, dfs(edge.target, depth + 1))
-            
-            return local_max
-        
-        for start in start_nodes:
-            max_depth = max(max_depth, dfs(start.id, 1))
-        
-        return max_depth
+        edges = longest_path_length(
+            [node.id for node in start_nodes],
+            self._successor_ids,
+        )
+        return edges + 1
     
     # === 序列化 ===
     
@@ -216,18 +347,25 @@ class CapabilityGraph:
             "description": self.description,
             "version": self.version,
             "nodes": [node.to_dict() for node in self._nodes.values()],
-            "edges": [edge.to_dict() for edge in self._edges],
+            "edges": [edge.to_dict() for edge in self._edges.values()],
+            "fingerprint": self.fingerprint,
         }
     
     @classmethod
-    def from_dict(cls, data: dict) -> "CapabilityGraph":
-        """從字典建立"""
+    def from_dict(cls, data: dict, content: ContentHash | None = None) -> "CapabilityGraph":
+        """
+        從字典建立
+        
+        content 為已知的內容雜湊狀態（來自快照）時略過逐項雜湊。
+        """
         graph = cls(
             id=data["id"],
             name=data["name"],
             description=data.get("description", ""),
             version=data.get("version", "1.0.0"),
         )
+        if content is not None:
+            graph._content = content
         
         for node_data in data.get("nodes", []):
             graph.add_node(GraphNode.from_dict(node_data))
@@ -235,6 +373,35 @@ class CapabilityGraph:
         for edge_data in data.get("edges", []):
             graph.add_edge(GraphEdge.from_dict(edge_data))
         
+        graph._content.paused = False
+        return graph
+    
+    def to_bytes(self) -> bytes:
+        """輸出二進位快照（與 to_dict 完全對應，並保存內容雜湊狀態）"""
+        return encode_snapshot(
+            {"graph": self.to_dict(), "content": self._content.state()},
+            kind="domain",
+        )
+    
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "CapabilityGraph":
+        """
+        從二進位快照建立
+        
+        保存的內容雜湊狀態須與節點/邊數量及快照內的指紋一致才會採用。
+        
+        Raises:
+            ValueError: 非快照、內容損毀或雜湊狀態與圖不一致
+        """
+        payload = decode_snapshot(blob, kind="domain")
+        try:
+            data = payload["graph"]
+            graph = cls.from_dict(data, content=ContentHash.restore(payload["content"]))
+            stored = data.get("fingerprint")
+        except (KeyError, TypeError, IndexError, AttributeError) as e:
+            raise ValueError("Malformed capability graph snapshot") from e
+        if graph._content.count != graph.node_count + graph.edge_count or graph.fingerprint != stored:
+            raise ValueError("Snapshot content hash does not match its graph")
         return graph
     
     # === Mermaid 輸出 ===
@@ -261,7 +428,7 @@ class CapabilityGraph:
             style = style_map.get(node.type, "[{label}]")
             lines.append(f"    {node.id}{style.format(label=label)}")
         
-        for edge in self._edges:
+        for edge in self._edges.values():
             if edge.label:
                 lines.append(f"    {edge.source} -->|{edge.label}| {edge.target}")
             else:
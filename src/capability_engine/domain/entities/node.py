@@ -5,12 +5,14 @@ Domain - Entities - Graph Node
 
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Sequence
+import sys
 
 from ..value_objects import NodeType, NodeContract, Implementation, BranchCondition
+from ..services.fingerprint import GraphRefs, notify_setattr
 
 
-@dataclass
+@dataclass(slots=True)
 class GraphNode:
     """
     圖節點（實體）
@@ -19,7 +21,13 @@ class GraphNode:
     - 有唯一識別（id）
     - 可變狀態
     - 生命週期追蹤
+    
+    使用 __slots__；未設定的序列欄位共用空 tuple，整體替換而非原地修改。
+    加入能力圖後重新指定欄位會通知該圖更新計數、指紋與快取。
     """
+    # 持有此節點之圖的弱參照（由 CapabilityGraph 維護，須為第一個欄位）
+    _graphs: GraphRefs = field(default=(), init=False, repr=False, compare=False)
+    
     id: str
     type: NodeType
     
@@ -28,22 +36,28 @@ class GraphNode:
     
     # 抽象節點專用
     contract: NodeContract | None = None
-    implementations: list[Implementation] = field(default_factory=list)
+    implementations: Sequence[Implementation] = ()
     resolution_strategy: str = "auto_detect"
     
     # 控制節點專用
-    conditions: list[BranchCondition] = field(default_factory=list)
+    conditions: Sequence[BranchCondition] = ()
     max_iterations: int = 10
     
     # 互動節點專用
     prompt: str | None = None
-    options: list[str] = field(default_factory=list)
+    options: Sequence[str] = ()
     
     # 通用
     timeout: int | None = None
-    outputs: list[str] = field(default_factory=list)
+    outputs: Sequence[str] = ()
     metadata: dict[str, Any] = field(default_factory=dict)
     
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name == "_graphs" or not self._graphs:
+            object.__setattr__(self, name, value)
+        else:
+            notify_setattr(self, name, value)
+    
     def is_abstract(self) -> bool:
         return self.type == NodeType.ABSTRACT
     
@@ -94,7 +108,7 @@ class GraphNode:
         if self.prompt:
             d["prompt"] = self.prompt
         if self.outputs:
-            d["outputs"] = self.outputs
+            d["outputs"] = list(self.outputs)
         return d
     
     @classmethod
@@ -103,38 +117,39 @@ class GraphNode:
         contract = None
         if "contract" in data:
             contract = NodeContract.create(
-                inputs=data["contract"].get("inputs", []),
-                outputs=data["contract"].get("outputs", []),
-                capabilities=data["contract"].get("capabilities", []),
+                inputs=data["contract"].get("inputs"),
+                outputs=data["contract"].get("outputs"),
+                capabilities=data["contract"].get("capabilities"),
             )
         
-        implementations = [
+        implementations = tuple(
             Implementation.create(
                 id=impl["id"],
                 skill_id=impl["skill_id"],
                 priority=impl.get("priority", 1),
-                conditions=impl.get("conditions", []),
-                fallbacks=impl.get("fallbacks", []),
+                conditions=impl.get("conditions"),
+                fallbacks=impl.get("fallbacks"),
             )
-            for impl in data.get("implementations", [])
-        ]
+            for impl in data.get("implementations", ())
+        )
         
-        conditions = [
+        conditions = tuple(
             BranchCondition(
                 name=c["name"],
                 expression=c["expression"],
-                target=c["target"],
+                target=sys.intern(c["target"]),
             )
-            for c in data.get("conditions", [])
-        ]
+            for c in data.get("conditions", ())
+        )
         
+        skill_id = data.get("skill_id")
         return cls(
-            id=data["id"],
+            id=sys.intern(data["id"]),
             type=NodeType(data["type"]),
-            skill_id=data.get("skill_id"),
+            skill_id=sys.intern(skill_id) if skill_id else skill_id,
             contract=contract,
             implementations=implementations,
             conditions=conditions,
             prompt=data.get("prompt"),
-            outputs=data.get("outputs", []),
+            outputs=tuple(sys.intern(o) for o in data.get("outputs", ())),
         )
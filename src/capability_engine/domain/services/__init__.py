@@ -0,0 +1,55 @@
+"""
+Domain - Services
+領域層 - 服務（純演算法，與圖的具體實作解耦）
+"""
+
+from .cache import LRUCache
+from .compiler import CompiledCondition, CompiledGraph, compile_graph
+from .expression import (
+    CompiledExpression,
+    ExpressionError,
+    compile_expression,
+    expression_cache,
+    get_expression,
+    is_valid_expression,
+)
+from .fingerprint import ContentHash, canonical_hash
+from .snapshot import FORMAT_VERSION, decode_snapshot, encode_snapshot
+from .statistics import CostModel, SkillStats, SkillStatsStore
+from .topology import (
+    ComponentAnalysis,
+    analyze_components,
+    strongly_connected_components,
+    longest_path_length,
+    reachable,
+)
+from .validation import ValidationReport, reachability_issues, validation_cache
+
+__all__ = [
+    "CompiledCondition",
+    "CompiledGraph",
+    "compile_graph",
+    "CompiledExpression",
+    "ExpressionError",
+    "compile_expression",
+    "expression_cache",
+    "get_expression",
+    "is_valid_expression",
+    "ContentHash",
+    "canonical_hash",
+    "FORMAT_VERSION",
+    "encode_snapshot",
+    "decode_snapshot",
+    "CostModel",
+    "SkillStats",
+    "SkillStatsStore",
+    "ComponentAnalysis",
+    "analyze_components",
+    "strongly_connected_components",
+    "longest_path_length",
+    "reachable",
+    "LRUCache",
+    "ValidationReport",
+    "reachability_issues",
+    "validation_cache",
+]
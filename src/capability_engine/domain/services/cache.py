@@ -0,0 +1,91 @@
+"""
+Domain - Services - Cache
+領域層 - 服務 - 有界快取
+
+以內容指紋為鍵的記憶化快取（驗證結果、解析決策等共用）。
+"""
+
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class LRUCache(Generic[K, V]):
+    """
+    有界 LRU 快取（執行緒安全）
+    
+    超過 maxsize 時淘汰最久未使用的項目，並記錄命中/未命中次數。
+    """
+    
+    def __init__(self, maxsize: int = 256):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, V] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: K, default: V | None = None) -> V | None:
+        """取得快取值（命中時移到最新）"""
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key: K, value: V) -> None:
+        """寫入快取"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def get_or_compute(self, key: K, factory: Callable[[], V]) -> V:
+        """
+        取得快取值，未命中時呼叫 factory 計算並寫入
+        
+        factory 在鎖外執行；並行未命中時可能重複計算，但結果相同。
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.put(key, value)
+        return value
+    
+    def invalidate(self, key: K) -> None:
+        """移除單一項目"""
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self) -> None:
+        """清空快取與統計"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+    
+    def stats(self) -> dict[str, int]:
+        """命中統計"""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,191 @@
+"""
+Domain - Services - Graph Compiler
+領域層 - 服務 - 能力圖編譯器
+
+將 CapabilityGraph（舊版或 DDD 版）編譯為不可變、以整數索引的結構：
+節點陣列、CSR 後繼/前驅陣列、預先排序的實現、預先解析的分支條件。
+執行引擎直接在編譯結果上運行，同一份編譯結果可供多個並行執行共用。
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Mapping
+
+from .expression import CompiledExpression, ExpressionError, get_expression
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledCondition:
+    """預先解析的分支條件"""
+    name: str
+    expression: str
+    target: str
+    target_index: int  # -1 表示目標節點不存在
+    predicate: CompiledExpression | None  # 無法編譯時為 None（評估結果恆為 False）
+    
+    def test(self, scope: Mapping[str, Any]) -> bool:
+        """對變數映射求值（不複製），錯誤視為不成立"""
+        return self.predicate is not None and self.predicate.test(scope)
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledGraph:
+    """
+    編譯後的能力圖（不可變）
+    
+    節點以 0..N-1 的整數索引，鄰接關係以 CSR 表示：
+    successors(i) = succ_targets[succ_offsets[i]:succ_offsets[i + 1]]
+    
+    nodes 保留原始節點物件供讀取屬性，執行期間視為唯讀。
+    """
+    graph_id: str
+    node_ids: tuple[str, ...]
+    index: Mapping[str, int]
+    nodes: tuple[Any, ...]
+    node_types: tuple[Any, ...]
+    succ_offsets: tuple[int, ...]
+    succ_targets: tuple[int, ...]
+    pred_offsets: tuple[int, ...]
+    pred_sources: tuple[int, ...]
+    implementations: tuple[tuple[Any, ...], ...]
+    branches: tuple[tuple[CompiledCondition, ...], ...]
+    start: int  # 第一個 START 節點，-1 表示沒有
+    entry_points: tuple[int, ...]  # START 節點或入度為 0 的節點
+    loop_exits: tuple[tuple[CompiledExpression, ...], ...] = ()  # 迴圈頭的退出條件
+    fingerprint: str = ""  # 來源圖的內容指紋
+    
+    @property
+    def node_count(self) -> int:
+        return len(self.node_ids)
+    
+    @property
+    def edge_count(self) -> int:
+        return len(self.succ_targets)
+    
+    def node_index(self, node_id: str) -> int | None:
+        """節點 ID 轉索引"""
+        return self.index.get(node_id)
+    
+    def successors(self, i: int) -> tuple[int, ...]:
+        """後繼節點索引"""
+        return self.succ_targets[self.succ_offsets[i]:self.succ_offsets[i + 1]]
+    
+    def first_successor(self, i: int) -> int | None:
+        """第一個後繼節點索引"""
+        lo = self.succ_offsets[i]
+        return self.succ_targets[lo] if lo < self.succ_offsets[i + 1] else None
+    
+    def predecessors(self, i: int) -> tuple[int, ...]:
+        """前驅節點索引"""
+        return self.pred_sources[self.pred_offsets[i]:self.pred_offsets[i + 1]]
+
+
+def compile_graph(graph: Any) -> CompiledGraph:
+    """
+    編譯能力圖
+    
+    同時支援舊版（nodes/edges 為 list，邊使用 from_node/to_node）
+    與 DDD 版（nodes()/edges() 為迭代器，邊使用 source/target）。
+    端點不存在的邊會被略過（由驗證負責回報）。
+    """
+    nodes = tuple(graph.nodes() if callable(graph.nodes) else graph.nodes)
+    edges = graph.edges() if callable(graph.edges) else graph.edges
+    
+    node_ids = tuple(node.id for node in nodes)
+    index: dict[str, int] = {}
+    for i, node_id in enumerate(node_ids):
+        index[node_id] = i  # 重複 ID 以最後一個為準，與 get_node 一致
+    n = len(nodes)
+    
+    succ_lists: list[list[int]] = [[] for _ in range(n)]
+    pred_lists: list[list[int]] = [[] for _ in range(n)]
+    exit_lists: list[list[CompiledExpression]] = [[] for _ in range(n)]
+    for edge in edges:
+        source, target = _edge_endpoints(edge)
+        s = index.get(source)
+        t = index.get(target)
+        if s is None or t is None:
+            continue
+        succ_lists[s].append(t)
+        pred_lists[t].append(s)
+        
+        # 迭代（回頭）邊的退出條件屬於其目標（迴圈頭），其餘屬於來源
+        exit_condition = getattr(edge, "exit_condition", None)
+        if exit_condition:
+            head = t if edge.type.value == "iteration" else s
+            try:
+                exit_lists[head].append(get_expression(exit_condition))
+            except ExpressionError:
+                pass  # 由驗證負責回報
+    
+    succ_offsets, succ_targets = _to_csr(succ_lists)
+    pred_offsets, pred_sources = _to_csr(pred_lists)
+    
+    node_types = tuple(node.type for node in nodes)
+    start_type = _start_type(node_types)
+    start = next((i for i, t in enumerate(node_types) if t is start_type), -1)
+    entry_points = tuple(
+        i for i in range(n)
+        if node_types[i] is start_type or not pred_lists[i]
+    )
+    
+    return CompiledGraph(
+        graph_id=graph.id,
+        node_ids=node_ids,
+        index=MappingProxyType(index),
+        nodes=nodes,
+        node_types=node_types,
+        succ_offsets=succ_offsets,
+        succ_targets=succ_targets,
+        pred_offsets=pred_offsets,
+        pred_sources=pred_sources,
+        implementations=tuple(
+            tuple(sorted(node.implementations, key=lambda impl: impl.priority))
+            for node in nodes
+        ),
+        branches=tuple(
+            tuple(_compile_condition(c, index) for c in node.conditions)
+            for node in nodes
+        ),
+        start=start,
+        entry_points=entry_points,
+        loop_exits=tuple(tuple(exits) for exits in exit_lists),
+        fingerprint=getattr(graph, "fingerprint", ""),
+    )
+
+
+def _edge_endpoints(edge: Any) -> tuple[str, str]:
+    if hasattr(edge, "from_node"):
+        return edge.from_node, edge.to_node
+    return edge.source, edge.target
+
+
+def _to_csr(lists: list[list[int]]) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    offsets = [0]
+    flat: list[int] = []
+    for items in lists:
+        flat.extend(items)
+        offsets.append(len(flat))
+    return tuple(offsets), tuple(flat)
+
+
+def _start_type(node_types: tuple[Any, ...]) -> Any:
+    """取得圖所使用之 NodeType 列舉的 START 成員（新舊兩版列舉不同）"""
+    for node_type in node_types:
+        return type(node_type).START
+    return None
+
+
+def _compile_condition(condition: Any, index: Mapping[str, int]) -> CompiledCondition:
+    try:
+        predicate = get_expression(condition.expression)
+    except ExpressionError:
+        predicate = None
+    return CompiledCondition(
+        name=condition.name,
+        expression=condition.expression,
+        target=condition.target,
+        target_index=index.get(condition.target, -1),
+        predicate=predicate,
+    )
@@ -0,0 +1,227 @@
+"""
+Domain - Services - Expression
+領域層 - 服務 - 安全條件表達式
+
+將條件字串以 ast 解析一次並編譯為閉包，求值時直接從變數映射讀取，
+不做字串替換也不呼叫 eval。只接受白名單內的語法節點：
+常數、變數名稱、比較（含 in / is）、布林運算、not、字面 list/tuple/set、
+屬性與索引存取、四則運算（+ - * / // %）與正負號。
+
+屬性存取 a.b 在 a 為映射時讀取 a["b"]（對應 YAML 定義的巢狀資料），
+否則讀取物件屬性；底線開頭的屬性一律拒絕，無法透過屬性鏈逃逸沙箱。
+不支援函式呼叫。
+
+編譯結果以表達式文字為鍵快取在有界 LRU 中，可透過 expression_cache 取得命中統計。
+"""
+
+from __future__ import annotations
+import ast
+import operator
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping
+
+from .cache import LRUCache
+
+Scope = Mapping[str, Any]
+Evaluator = Callable[[Scope], Any]
+
+# 表達式文字 -> CompiledExpression
+expression_cache: LRUCache[str, "CompiledExpression"] = LRUCache(maxsize=1024)
+
+
+class ExpressionError(ValueError):
+    """表達式語法錯誤或使用了不允許的語法"""
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledExpression:
+    """
+    編譯後的表達式（不可變、可跨執行緒共用）
+    
+    - names: 表達式引用的變數名稱（可用於組成快取鍵）
+    """
+    source: str
+    names: frozenset[str]
+    evaluator: Evaluator
+    
+    def evaluate(self, scope: Scope) -> Any:
+        """求值；變數不存在或運算失敗時拋出原始例外"""
+        return self.evaluator(scope)
+    
+    def test(self, scope: Scope) -> bool:
+        """作為條件求值，任何錯誤皆視為不成立"""
+        try:
+            return bool(self.evaluator(scope))
+        except Exception:
+            return False
+
+
+def compile_expression(source: str) -> CompiledExpression:
+    """
+    編譯表達式（不經快取）
+    
+    Raises:
+        ExpressionError: 語法錯誤或使用了不允許的語法
+    """
+    try:
+        tree = ast.parse(source.strip(), mode="eval")
+    except (SyntaxError, ValueError) as e:
+        raise ExpressionError(f"Invalid expression {source!r}: {e}") from e
+    
+    names = frozenset(
+        node.id for node in ast.walk(tree) if isinstance(node, ast.Name)
+    )
+    return CompiledExpression(
+        source=source,
+        names=names,
+        evaluator=_compile(tree.body, source),
+    )
+
+
+def get_expression(source: str) -> CompiledExpression:
+    """取得編譯後的表達式（以文字為鍵的 LRU 快取）"""
+    return expression_cache.get_or_compute(source, lambda: compile_expression(source))
+
+
+def is_valid_expression(source: str) -> bool:
+    """表達式是否可編譯（供驗證器回報）"""
+    try:
+        get_expression(source)
+    except ExpressionError:
+        return False
+    return True
+
+
+# ═══════════════════════════════════════════════════════════════════
+# AST -> 閉包
+# ═══════════════════════════════════════════════════════════════════
+
+_COMPARE_OPS: dict[type, Callable[[Any, Any], Any]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+}
+
+
+_BINARY_OPS: dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+}
+
+_UNARY_OPS: dict[type, Callable[[Any], Any]] = {
+    ast.Not: operator.not_,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+
+def _get_attribute(value: Any, name: str) -> Any:
+    if isinstance(value, Mapping):
+        return value[name]
+    return getattr(value, name)
+
+
+def _compile(node: ast.AST, source: str) -> Evaluator:
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda scope: value
+    
+    if isinstance(node, ast.Name):
+        name = node.id
+        return lambda scope: scope[name]
+    
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile(v, source) for v in node.values]
+        if isinstance(node.op, ast.And):
+            def evaluate_and(scope: Scope) -> Any:
+                result = True
+                for part in parts:
+                    result = part(scope)
+                    if not result:
+                        return result
+                return result
+            return evaluate_and
+        
+        def evaluate_or(scope: Scope) -> Any:
+            result = False
+            for part in parts:
+                result = part(scope)
+                if result:
+                    return result
+            return result
+        return evaluate_or
+    
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        unary = _UNARY_OPS[type(node.op)]
+        operand = _compile(node.operand, source)
+        return lambda scope: unary(operand(scope))
+    
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        binary = _BINARY_OPS[type(node.op)]
+        lhs = _compile(node.left, source)
+        rhs = _compile(node.right, source)
+        return lambda scope: binary(lhs(scope), rhs(scope))
+    
+    if isinstance(node, ast.Attribute):
+        attr = node.attr
+        if attr.startswith("_"):
+            raise ExpressionError(f"Private attribute {attr!r} in expression {source!r}")
+        target = _compile(node.value, source)
+        return lambda scope: _get_attribute(target(scope), attr)
+    
+    if isinstance(node, ast.Subscript):
+        target = _compile(node.value, source)
+        key = _compile(node.slice, source)
+        return lambda scope: target(scope)[key(scope)]
+    
+    if isinstance(node, ast.Slice):
+        bounds = [
+            _compile(part, source) if part is not None else None
+            for part in (node.lower, node.upper, node.step)
+        ]
+        return lambda scope: slice(*(b(scope) if b else None for b in bounds))
+    
+    if isinstance(node, ast.Compare):
+        return _compile_compare(node, source)
+    
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        items = [_compile(e, source) for e in node.elts]
+        factory = {ast.List: list, ast.Tuple: tuple, ast.Set: set}[type(node)]
+        return lambda scope: factory(item(scope) for item in items)
+    
+    raise ExpressionError(
+        f"Unsupported syntax {type(node).__name__} in expression {source!r}"
+    )
+
+
+def _compile_compare(node: ast.Compare, source: str) -> Evaluator:
+    left = _compile(node.left, source)
+    steps = [
+        (_COMPARE_OPS[type(op)], _compile(right, source))
+        for op, right in zip(node.ops, node.comparators)
+    ]
+    
+    if len(steps) == 1:
+        op, right = steps[0]
+        return lambda scope: op(left(scope), right(scope))
+    
+    def evaluate_chain(scope: Scope) -> Any:
+        current = left(scope)
+        for op, right in steps:
+            value = right(scope)
+            if not op(current, value):
+                return False
+            current = value
+        return True
+    return evaluate_chain
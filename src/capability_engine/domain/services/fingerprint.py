@@ -0,0 +1,124 @@
+"""
+Domain - Services - Content Fingerprint
+領域層 - 服務 - 內容指紋
+
+能力圖的內容雜湊：每個節點/邊以正規化 JSON 計算 blake2b，
+再以 mod 2^128 加總成多重集合雜湊，因此與加入順序無關，
+且可在新增/移除節點或邊時 O(1) 增量更新。
+指紋可作為驗證、編譯、提示與解析結果等快取的鍵。
+
+節點為可變實體：已加入圖的節點重新指定欄位時經 notify_setattr
+通知持有它的圖，先移除舊內容、指定後再加入新內容，指紋因此不會過時。
+"""
+
+from __future__ import annotations
+import json
+from dataclasses import dataclass
+from hashlib import blake2b
+from typing import Any, Callable, Mapping
+import weakref
+
+_DIGEST_SIZE = 16
+_MODULUS = 1 << (_DIGEST_SIZE * 8)
+
+
+_encode = json.JSONEncoder(
+    sort_keys=True,
+    separators=(",", ":"),
+    ensure_ascii=False,
+    default=str,
+).encode
+
+
+def canonical_hash(kind: str, payload: Any) -> int:
+    """單一元素的雜湊（kind 區分節點與邊，避免碰撞）"""
+    return int.from_bytes(
+        blake2b(_encode([kind, payload]).encode("utf-8"), digest_size=_DIGEST_SIZE).digest(),
+        "big",
+    )
+
+
+@dataclass(slots=True)
+class ContentHash:
+    """
+    順序無關、可增量維護的多重集合雜湊
+    
+    paused 時 add/remove 不做任何事：從快照還原已知狀態後重建圖時，
+    略過逐項雜湊（由呼叫端負責在重建完成後恢復）。
+    """
+    total: int = 0
+    count: int = 0
+    paused: bool = False
+    
+    def add(self, kind: str, payload: Any) -> None:
+        if self.paused:
+            return
+        self.total = (self.total + canonical_hash(kind, payload)) % _MODULUS
+        self.count += 1
+    
+    def remove(self, kind: str, payload: Any) -> None:
+        if self.paused:
+            return
+        self.total = (self.total - canonical_hash(kind, payload)) % _MODULUS
+        self.count -= 1
+    
+    def state(self) -> list[int]:
+        """可序列化的狀態（寫入快照）"""
+        return [self.total, self.count]
+    
+    @classmethod
+    def restore(cls, state: Any) -> "ContentHash":
+        """從快照狀態還原（paused，重建完成後需設回 False）"""
+        total, count = state
+        if not (isinstance(total, int) and isinstance(count, int) and 0 <= total < _MODULUS):
+            raise ValueError("Invalid content hash state")
+        return cls(total=total, count=count, paused=True)
+    
+    def digest(self, header: Mapping[str, Any]) -> str:
+        """結合圖層級屬性（id、名稱、版本等）產生最終指紋"""
+        h = blake2b(digest_size=_DIGEST_SIZE)
+        h.update(_encode(header).encode("utf-8"))
+        h.update(self.count.to_bytes(8, "big"))
+        h.update(self.total.to_bytes(_DIGEST_SIZE, "big"))
+        return h.hexdigest()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 節點變更通知
+# ═══════════════════════════════════════════════════════════════════
+
+GraphRefs = tuple[Callable[[], Any], ...]
+
+
+def notify_setattr(node: Any, name: str, value: Any) -> None:
+    """
+    重新指定已加入圖之節點的欄位
+    
+    node._graphs 為持有節點之圖的弱參照；每個圖需提供
+    _node_changing(node, name)（移除舊內容）與 _node_changed(node, name)（加入新內容）。
+    """
+    graphs = [graph for ref in node._graphs if (graph := ref()) is not None]
+    for graph in graphs:
+        graph._node_changing(node, name)
+    object.__setattr__(node, name, value)
+    for graph in graphs:
+        graph._node_changed(node, name)
+
+
+def track_node(node: Any, refs: GraphRefs) -> None:
+    """登記節點由 refs[0] 指向的圖持有（refs 為該圖共用的單元素 tuple）"""
+    current: GraphRefs = node._graphs
+    if not current:
+        node._graphs = refs
+    elif all(ref is not refs[0] for ref in current):
+        node._graphs = current + refs
+
+
+def untrack_node(node: Any, refs: GraphRefs) -> None:
+    """取消節點與 refs[0] 指向之圖的關聯"""
+    node._graphs = tuple(ref for ref in node._graphs if ref is not refs[0])
+
+
+def graph_refs(graph: Any) -> GraphRefs:
+    """圖的弱參照 tuple（所有只屬於該圖的節點共用同一個 tuple）"""
+    return (weakref.ref(graph),)
@@ -0,0 +1,215 @@
+"""
+Domain - Services - Binary Snapshot
+領域層 - 服務 - 能力圖二進位快照
+
+緊湊、帶版本的二進位格式，取代 YAML/JSON 作為能力圖的快速載入來源。
+
+格式（所有整數為 LEB128 varint）：
+    MAGIC "CGSNAP" | u16 版本
+    字串表：數量, 各字串位元組長度..., UTF-8 連接內容
+    結構表：數量, 每個結構為 (鍵數量, 鍵字串索引...)
+    本體：帶標籤的值，根為 [kind, data]
+
+相同鍵集合的字典（節點、邊、實現等記錄）共用一個結構，
+只依序寫入值；所有字串（含鍵）只在字串表中出現一次。
+"""
+
+from __future__ import annotations
+import struct
+from typing import Any
+
+MAGIC = b"CGSNAP"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<H")
+_DOUBLE = struct.Struct("<d")
+
+# 值標籤
+_NONE, _FALSE, _TRUE, _INT, _NEG_INT, _FLOAT, _STR, _LIST, _RECORD = range(9)
+
+
+def encode_snapshot(data: Any, kind: str) -> bytes:
+    """
+    將 to_dict 的輸出編碼為二進位快照
+    
+    Args:
+        data: 僅含 None/bool/int/float/str/list/tuple/dict（字串鍵）的資料
+        kind: 圖的種類（解碼時驗證，避免新舊版格式混用）
+    """
+    strings: dict[str, int] = {}
+    schemas: dict[tuple[int, ...], int] = {}
+    body = bytearray()
+    
+    def intern(text: str) -> int:
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings)
+        return index
+    
+    def encode(value: Any) -> None:
+        if value is None:
+            body.append(_NONE)
+        elif value is True:
+            body.append(_TRUE)
+        elif value is False:
+            body.append(_FALSE)
+        elif isinstance(value, str):
+            body.append(_STR)
+            _write_uint(body, intern(value))
+        elif isinstance(value, int):
+            body.append(_INT if value >= 0 else _NEG_INT)
+            _write_uint(body, abs(value))
+        elif isinstance(value, float):
+            body.append(_FLOAT)
+            body.extend(_DOUBLE.pack(value))
+        elif isinstance(value, dict):
+            if not all(isinstance(key, str) for key in value):
+                raise TypeError("Snapshot records require string keys")
+            schema = tuple(intern(key) for key in value)
+            schema_id = schemas.get(schema)
+            if schema_id is None:
+                schema_id = schemas[schema] = len(schemas)
+            body.append(_RECORD)
+            _write_uint(body, schema_id)
+            for item in value.values():
+                encode(item)
+        elif isinstance(value, (list, tuple)):
+            body.append(_LIST)
+            _write_uint(body, len(value))
+            for item in value:
+                encode(item)
+        else:
+            raise TypeError(f"Cannot encode {type(value).__name__} in snapshot")
+    
+    encode([kind, data])
+    
+    out = bytearray(MAGIC)
+    out += _HEADER.pack(FORMAT_VERSION)
+    
+    encoded = [text.encode("utf-8") for text in strings]
+    _write_uint(out, len(encoded))
+    for raw in encoded:
+        _write_uint(out, len(raw))
+    out += b"".join(encoded)
+    
+    _write_uint(out, len(schemas))
+    for schema in schemas:
+        _write_uint(out, len(schema))
+        for key in schema:
+            _write_uint(out, key)
+    
+    out += body
+    return bytes(out)
+
+
+def decode_snapshot(blob: bytes, kind: str) -> Any:
+    """
+    解碼二進位快照
+    
+    Raises:
+        ValueError: 非快照、版本不支援、種類不符或內容損毀
+    """
+    buf = bytes(blob)
+    if not buf.startswith(MAGIC):
+        raise ValueError("Not a capability graph snapshot")
+    try:
+        (version,) = _HEADER.unpack_from(buf, len(MAGIC))
+        if version > FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {version}")
+        
+        pos = len(MAGIC) + _HEADER.size
+        count, pos = _read_uint(buf, pos)
+        lengths = []
+        for _ in range(count):
+            length, pos = _read_uint(buf, pos)
+            lengths.append(length)
+        strings = []
+        for length in lengths:
+            end = pos + length
+            if end > len(buf):
+                raise ValueError("Corrupted capability graph snapshot")
+            strings.append(buf[pos:end].decode("utf-8"))
+            pos = end
+        
+        count, pos = _read_uint(buf, pos)
+        schemas = []
+        for _ in range(count):
+            size, pos = _read_uint(buf, pos)
+            keys = []
+            for _ in range(size):
+                index, pos = _read_uint(buf, pos)
+                keys.append(strings[index])
+            schemas.append(tuple(keys))
+        
+        root, pos = _read_value(buf, pos, strings, schemas)
+    except (IndexError, struct.error, UnicodeDecodeError, RecursionError) as e:
+        raise ValueError("Corrupted capability graph snapshot") from e
+    
+    if pos != len(buf) or not isinstance(root, list) or len(root) != 2:
+        raise ValueError("Corrupted capability graph snapshot")
+    if root[0] != kind:
+        raise ValueError(f"Snapshot holds a {root[0]!r} graph, expected {kind!r}")
+    return root[1]
+
+
+def _write_uint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_uint(buf: bytes, pos: int) -> tuple[int, int]:
+    byte = buf[pos]
+    pos += 1
+    if byte < 0x80:
+        return byte, pos
+    result = byte & 0x7F
+    shift = 7
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _read_value(
+    buf: bytes,
+    pos: int,
+    strings: list[str],
+    schemas: list[tuple[str, ...]],
+) -> tuple[Any, int]:
+    tag = buf[pos]
+    pos += 1
+    if tag == _STR:
+        index, pos = _read_uint(buf, pos)
+        return strings[index], pos
+    if tag == _RECORD:
+        schema_id, pos = _read_uint(buf, pos)
+        record = {}
+        for key in schemas[schema_id]:
+            record[key], pos = _read_value(buf, pos, strings, schemas)
+        return record, pos
+    if tag == _LIST:
+        count, pos = _read_uint(buf, pos)
+        items = []
+        for _ in range(count):
+            item, pos = _read_value(buf, pos, strings, schemas)
+            items.append(item)
+        return items, pos
+    if tag == _INT:
+        return _read_uint(buf, pos)
+    if tag == _NEG_INT:
+        value, pos = _read_uint(buf, pos)
+        return -value, pos
+    if tag == _FLOAT:
+        return _DOUBLE.unpack_from(buf, pos)[0], pos + _DOUBLE.size
+    if tag == _NONE:
+        return None, pos
+    if tag == _TRUE:
+        return True, pos
+    if tag == _FALSE:
+        return False, pos
+    raise ValueError(f"Unknown snapshot tag: {tag}")
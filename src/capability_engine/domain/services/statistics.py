@@ -0,0 +1,150 @@
+"""
+Domain - Services - Skill Statistics
+領域層 - 服務 - 技能執行統計
+
+每個技能保留最近 N 次執行的 (成功與否, 延遲)，提供成功率與 p50/p95 延遲。
+CostModel 依「預期成功成本」= 延遲估計 / 成功率估計 排序候選實現：
+沒有觀測資料時以靜態優先級為先驗（排序與 priority 相同），
+觀測越多，實際表現的權重越高。
+"""
+
+from __future__ import annotations
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass
+from statistics import median
+from typing import Any, Sequence
+
+
+@dataclass(frozen=True, slots=True)
+class SkillStats:
+    """單一技能的統計摘要"""
+    skill_id: str
+    samples: int = 0
+    successes: int = 0
+    p50: float | None = None  # 秒
+    p95: float | None = None
+    
+    @property
+    def success_rate(self) -> float | None:
+        return self.successes / self.samples if self.samples else None
+    
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "skill_id": self.skill_id,
+            "samples": self.samples,
+            "success_rate": self.success_rate,
+            "p50": self.p50,
+            "p95": self.p95,
+        }
+
+
+class SkillStatsStore:
+    """
+    滾動視窗的技能執行統計（執行緒安全）
+    
+    摘要在記錄新樣本時失效，查詢時才重新計算分位數。
+    """
+    
+    def __init__(self, window: int = 100):
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self.window = window
+        self._samples: dict[str, deque[tuple[bool, float]]] = {}
+        self._summaries: dict[str, SkillStats] = {}
+        self._lock = threading.Lock()
+    
+    def record(self, skill_id: str, success: bool, latency: float) -> None:
+        """記錄一次執行"""
+        with self._lock:
+            samples = self._samples.get(skill_id)
+            if samples is None:
+                samples = self._samples[skill_id] = deque(maxlen=self.window)
+            samples.append((bool(success), max(0.0, float(latency))))
+            self._summaries.pop(skill_id, None)
+    
+    def get(self, skill_id: str) -> SkillStats:
+        """取得統計摘要（沒有樣本時各值為空）"""
+        with self._lock:
+            summary = self._summaries.get(skill_id)
+            if summary is None:
+                summary = self._summaries[skill_id] = self._summarize(skill_id)
+            return summary
+    
+    def _summarize(self, skill_id: str) -> SkillStats:
+        samples = self._samples.get(skill_id)
+        if not samples:
+            return SkillStats(skill_id)
+        latencies = sorted(latency for _, latency in samples)
+        return SkillStats(
+            skill_id=skill_id,
+            samples=len(samples),
+            successes=sum(1 for ok, _ in samples if ok),
+            p50=_percentile(latencies, 0.50),
+            p95=_percentile(latencies, 0.95),
+        )
+    
+    def baseline_latency(self) -> float | None:
+        """所有已觀測技能 p50 的中位數（作為未觀測技能的延遲先驗）"""
+        values = [self.get(skill_id).p50 for skill_id in list(self._samples)]
+        values = [v for v in values if v is not None]
+        return median(values) if values else None
+    
+    def to_dict(self) -> dict[str, dict[str, Any]]:
+        return {skill_id: self.get(skill_id).to_dict() for skill_id in list(self._samples)}
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._summaries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+@dataclass(frozen=True, slots=True)
+class CostModel:
+    """
+    預期成功成本模型
+    
+    - prior_strength: 先驗相當於幾次觀測
+    - prior_success: 未觀測技能的成功率先驗
+    - priority_weight: 靜態順位每差一位，延遲先驗增加的比例
+    - default_latency: 尚無任何觀測時的延遲先驗（秒）
+    """
+    prior_strength: float = 5.0
+    prior_success: float = 0.9
+    priority_weight: float = 0.1
+    default_latency: float = 1.0
+    
+    def expected_cost(self, stats: SkillStats, rank: int, prior_latency: float) -> float:
+        """以靜態順位 rank（0 為最優先）為先驗的預期成功成本"""
+        k = self.prior_strength
+        n = stats.samples
+        latency_prior = prior_latency * (1.0 + self.priority_weight * rank)
+        latency = (k * latency_prior + n * (stats.p50 or 0.0)) / (k + n)
+        success = (k * self.prior_success + stats.successes) / (k + n)
+        return latency / max(success, 1e-9)
+    
+    def rank(self, skill_ids: Sequence[str], store: SkillStatsStore) -> list[int]:
+        """
+        依預期成功成本排序
+        
+        Args:
+            skill_ids: 依靜態優先級排列的候選技能
+        
+        Returns:
+            skill_ids 的索引，成本由低到高（同成本時保持原順序）
+        """
+        prior_latency = store.baseline_latency() or self.default_latency
+        costs = [
+            self.expected_cost(store.get(skill_id), rank, prior_latency)
+            for rank, skill_id in enumerate(skill_ids)
+        ]
+        return sorted(range(len(skill_ids)), key=costs.__getitem__)
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    """最近秩分位數（ordered 已排序且非空）"""
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
@@ -0,0 +1,179 @@
+"""
+Domain - Services - Topology
+領域層 - 服務 - 圖拓撲演算法
+
+透過 successors 回呼與圖結構解耦，新舊兩版 CapabilityGraph 共用。
+所有演算法皆為迭代式，不受 Python 遞迴深度限制。
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, Iterable, Mapping, TypeVar
+
+N = TypeVar("N", bound=Hashable)
+
+Successors = Callable[[N], Iterable[N]]
+
+
+def strongly_connected_components(
+    roots: Iterable[N],
+    successors: Successors,
+) -> list[list[N]]:
+    """
+    Tarjan 強連通分量（迭代版）
+    
+    只走訪從 roots 可達的節點。
+    回傳的分量為反拓撲順序（匯點分量在前）。
+    """
+    index: dict[N, int] = {}
+    low: dict[N, int] = {}
+    on_stack: set[N] = set()
+    stack: list[N] = []
+    components: list[list[N]] = []
+    counter = 0
+    
+    for root in roots:
+        if root in index:
+            continue
+        
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors(root)))]
+        
+        while work:
+            node, children = work[-1]
+            descended = False
+            
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors(child))))
+                    descended = True
+                    break
+                if child in on_stack and index[child] < low[node]:
+                    low[node] = index[child]
+            
+            if descended:
+                continue
+            
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
+            
+            if low[node] == index[node]:
+                component: list[N] = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    
+    return components
+
+
+@dataclass(frozen=True)
+class ComponentAnalysis(Generic[N]):
+    """
+    強連通分量分析結果（不可變）
+    
+    - components: 所有分量，反拓撲順序（匯點分量在前）
+    - component_of: 節點 -> 分量索引
+    - condensation: 縮點後的 DAG，分量索引 -> 後繼分量索引
+    - cycles: 含環的分量（大小 > 1 或有自環），即迴圈本體
+    """
+    components: tuple[tuple[N, ...], ...]
+    component_of: Mapping[N, int]
+    condensation: tuple[frozenset[int], ...]
+    cycles: tuple[tuple[N, ...], ...]
+    
+    @property
+    def has_cycle(self) -> bool:
+        return bool(self.cycles)
+    
+    def topological_order(self) -> list[int]:
+        """縮點 DAG 的拓撲順序（來源分量在前）"""
+        return list(range(len(self.components) - 1, -1, -1))
+
+
+def analyze_components(
+    roots: Iterable[N],
+    successors: Successors,
+) -> ComponentAnalysis[N]:
+    """計算強連通分量、縮點 DAG 與迴圈本體（O(N+E)）"""
+    components = strongly_connected_components(roots, successors)
+    
+    component_of: dict[N, int] = {}
+    for i, component in enumerate(components):
+        for member in component:
+            component_of[member] = i
+    
+    condensation: list[frozenset[int]] = []
+    cycles: list[tuple[N, ...]] = []
+    for i, component in enumerate(components):
+        targets: set[int] = set()
+        self_loop = False
+        for member in component:
+            for child in successors(member):
+                j = component_of[child]
+                if j != i:
+                    targets.add(j)
+                elif child == member:
+                    self_loop = True
+        condensation.append(frozenset(targets))
+        if len(component) > 1 or self_loop:
+            # Tarjan 以出棧順序收集，反轉後較接近走訪順序
+            cycles.append(tuple(reversed(component)))
+    
+    return ComponentAnalysis(
+        components=tuple(tuple(c) for c in components),
+        component_of=component_of,
+        condensation=tuple(condensation),
+        cycles=tuple(cycles),
+    )
+
+
+def longest_path_length(
+    roots: Iterable[N],
+    successors: Successors,
+) -> int:
+    """
+    從 roots 出發的最長路徑邊數（O(N+E)）
+    
+    先將強連通分量縮點，再在 DAG 上以反拓撲順序計算高度。
+    分量內部計為 (大小 - 1) 條邊，即穿越迴圈的最長簡單路徑上限；
+    無環圖的結果與列舉所有簡單路徑相同。
+    """
+    roots = list(roots)
+    analysis = analyze_components(roots, successors)
+    
+    # 反拓撲順序保證後繼分量先算好
+    height = [0] * len(analysis.components)
+    for i, component in enumerate(analysis.components):
+        best = max((height[j] + 1 for j in analysis.condensation[i]), default=0)
+        height[i] = len(component) - 1 + best
+    
+    return max((height[analysis.component_of[r]] for r in roots), default=0)
+
+
+def reachable(
+    roots: Iterable[N],
+    successors: Successors,
+) -> set[N]:
+    """從 roots 可達的所有節點（含 roots 本身，迭代式走訪）"""
+    seen: set[N] = set(roots)
+    stack = list(seen)
+    while stack:
+        for child in successors(stack.pop()):
+            if child not in seen:
+                seen.add(child)
+                stack.append(child)
+    return seen
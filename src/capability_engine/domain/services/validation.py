@@ -0,0 +1,75 @@
+"""
+Domain - Services - Validation
+領域層 - 服務 - 圖驗證共用元件
+
+驗證結果值物件、可達性/死路分析，以及以內容指紋為鍵的驗證結果快取。
+新舊兩版 CapabilityGraph 的驗證器共用。
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Hashable, Iterable
+
+from .cache import LRUCache
+from .topology import Successors, reachable
+
+# (驗證器名稱, 圖指紋) -> ValidationReport
+validation_cache: LRUCache[tuple[str, str], "ValidationReport"] = LRUCache(maxsize=512)
+
+
+@dataclass(frozen=True, slots=True)
+class ValidationReport:
+    """
+    驗證結果（不可變，可安全快取共用）
+    
+    - unreachable: 從起始節點無法到達的節點
+    - dead_ends: 無法到達任何結束節點的節點
+    """
+    errors: tuple[str, ...] = ()
+    warnings: tuple[str, ...] = ()
+    unreachable: tuple[str, ...] = ()
+    dead_ends: tuple[str, ...] = ()
+    
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+    
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "valid": self.valid,
+            "errors": list(self.errors),
+            "warnings": list(self.warnings),
+            "unreachable": list(self.unreachable),
+            "dead_ends": list(self.dead_ends),
+        }
+
+
+def reachability_issues(
+    node_ids: Iterable[Hashable],
+    starts: Iterable[Hashable],
+    ends: Iterable[Hashable],
+    successors: Successors,
+    predecessors: Successors,
+) -> tuple[list, list]:
+    """
+    一次正向走訪 + 一次反向走訪（O(N+E)）
+    
+    Returns:
+        (unreachable, dead_ends)，依 node_ids 順序；
+        沒有起始（或結束）節點時對應結果為空，由呼叫端另行回報。
+    """
+    node_ids = list(node_ids)
+    starts = list(starts)
+    ends = list(ends)
+    
+    unreachable = []
+    if starts:
+        forward = reachable(starts, successors)
+        unreachable = [n for n in node_ids if n not in forward]
+    
+    dead_ends = []
+    if ends:
+        backward = reachable(ends, predecessors)
+        dead_ends = [n for n in node_ids if n not in backward]
+    
+    return unreachable, dead_ends
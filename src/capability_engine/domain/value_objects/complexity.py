@@ -31,7 +31,7 @@ class ComplexityLevel(Enum):
             return cls.VERY_COMPLEX
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ComplexityMetrics:
     """
     複雜度指標（值物件 - 不可變）
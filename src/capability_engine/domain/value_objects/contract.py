@@ -4,18 +4,19 @@ Domain - Value Objects - Contract
 """
 
 from __future__ import annotations
-from dataclasses import dataclass, field
+import sys
+from dataclasses import dataclass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class NodeContract:
     """
     節點契約（值物件 - 不可變）
     定義抽象節點的輸入輸出規格
     """
-    inputs: tuple[str, ...] = field(default_factory=tuple)
-    outputs: tuple[str, ...] = field(default_factory=tuple)
-    capabilities: tuple[str, ...] = field(default_factory=tuple)
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    capabilities: tuple[str, ...] = ()
     
     @classmethod
     def create(
@@ -25,13 +26,13 @@ class NodeContract:
         capabilities: list[str] | None = None,
     ) -> "NodeContract":
         return cls(
-            inputs=tuple(inputs or []),
-            outputs=tuple(outputs or []),
-            capabilities=tuple(capabilities or []),
+            inputs=tuple(inputs or ()),
+            outputs=tuple(outputs or ()),
+            capabilities=tuple(capabilities or ()),
         )
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Implementation:
     """
     具體實現（值物件 - 不可變）
@@ -40,8 +41,8 @@ class Implementation:
     id: str
     skill_id: str
     priority: int = 1
-    conditions: tuple[str, ...] = field(default_factory=tuple)
-    fallbacks: tuple[str, ...] = field(default_factory=tuple)
+    conditions: tuple[str, ...] = ()
+    fallbacks: tuple[str, ...] = ()
     
     @classmethod
     def create(
@@ -53,15 +54,15 @@ class Implementation:
         fallbacks: list[str] | None = None,
     ) -> "Implementation":
         return cls(
-            id=id,
-            skill_id=skill_id,
+            id=sys.intern(id),
+            skill_id=sys.intern(skill_id),
             priority=priority,
-            conditions=tuple(conditions or []),
-            fallbacks=tuple(fallbacks or []),
+            conditions=tuple(conditions or ()),
+            fallbacks=tuple(sys.intern(f) for f in fallbacks or ()),
         )
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BranchCondition:
     """
     分支條件（值物件 - 不可變）
@@ -6,9 +6,18 @@ Fallback Chain - 失敗回退機制
 from __future__ import annotations
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable, Awaitable
+from typing import Any, Callable, Awaitable, Mapping
+from types import MappingProxyType
 import asyncio
+import random
+import re
+import threading
 import time
+from collections import deque
+from contextvars import ContextVar
+
+from .domain.services.cache import LRUCache
+from .domain.services.expression import ExpressionError, get_expression
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -24,6 +33,7 @@ class ErrorType(Enum):
     NETWORK_ERROR = "NetworkError"
     VALIDATION_ERROR = "ValidationError"
     SKILL_NOT_FOUND = "SkillNotFound"
+    CIRCUIT_OPEN = "CircuitOpen"
     UNKNOWN = "Unknown"
 
 
@@ -89,36 +99,413 @@ class FallbackStrategy(Enum):
     ABORT = "abort"              # 終止執行
 
 
+# ═══════════════════════════════════════════════════════════════════
+# 退避與重試預算
+# ═══════════════════════════════════════════════════════════════════
+
+class BackoffKind(Enum):
+    """退避方式"""
+    FIXED = "fixed"                # 固定延遲
+    EXPONENTIAL = "exponential"    # base * multiplier^(n-1)
+    DECORRELATED = "decorrelated"  # uniform(base, 前次延遲 * 3)
+
+
+@dataclass(frozen=True, slots=True)
+class BackoffPolicy:
+    """
+    重試延遲策略（以規則的 retry_delay 為基準延遲）
+    
+    - jitter: EXPONENTIAL 是否使用 full jitter（uniform(0, 延遲)），
+      避免大量並行執行同步重試
+    - max_delay: 延遲上限（秒）
+    """
+    kind: BackoffKind = BackoffKind.EXPONENTIAL
+    multiplier: float = 2.0
+    max_delay: float = 30.0
+    jitter: bool = True
+    
+    def delay(self, base: float, attempt: int, previous: float | None, rng: random.Random) -> float:
+        """第 attempt 次重試（從 1 起算）前的延遲；previous 為前一次延遲"""
+        if self.kind is BackoffKind.DECORRELATED:
+            upper = max(base, (previous if previous is not None else base) * 3)
+            return min(self.max_delay, rng.uniform(base, upper))
+        
+        if self.kind is BackoffKind.EXPONENTIAL:
+            delay = min(self.max_delay, base * self.multiplier ** max(0, attempt - 1))
+            return rng.uniform(0, delay) if self.jitter else delay
+        
+        return min(self.max_delay, base)
+
+
+class RetryBudget:
+    """
+    重試預算（令牌桶，可跨 Fallback 鏈共用，執行緒安全）
+    
+    每次重試消耗一個令牌，令牌以 refill_rate（每秒）補充至 capacity；
+    每次成功另外補充 success_credit 個令牌。預算耗盡時重試改為立即失敗，
+    避免上游服務降級時大量並行執行同步重試、放大故障。
+    """
+    
+    def __init__(
+        self,
+        capacity: float = 100.0,
+        refill_rate: float = 10.0,
+        success_credit: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.success_credit = success_credit
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self.exhausted = 0  # 因預算耗盡而拒絕的重試次數
+    
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """取得重試令牌，預算不足時返回 False"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            self.exhausted += 1
+            return False
+    
+    def record_success(self) -> None:
+        """成功執行時補充令牌"""
+        if self.success_credit:
+            with self._lock:
+                self._refill()
+                self._tokens = min(self.capacity, self._tokens + self.success_credit)
+    
+    @property
+    def available(self) -> float:
+        """目前可用的令牌數"""
+        with self._lock:
+            self._refill()
+            return self._tokens
+    
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated
+        self._updated = now
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_rate)
+
+
+# 行程共用的重試預算（未指定預算的 Fallback 鏈使用）
+_default_retry_budget: RetryBudget | None = None
+
+
+def set_default_retry_budget(budget: RetryBudget | None) -> None:
+    """設定行程共用的重試預算（None 表示不限制）"""
+    global _default_retry_budget
+    _default_retry_budget = budget
+
+
+def get_default_retry_budget() -> RetryBudget | None:
+    """取得行程共用的重試預算"""
+    return _default_retry_budget
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 執行期限
+# ═══════════════════════════════════════════════════════════════════
+
+# 目前嘗試的截止時間（time.monotonic()），由 FallbackChain 在每次嘗試前設定
+_attempt_deadline: ContextVar[float | None] = ContextVar("attempt_deadline", default=None)
+
+
+def remaining_time() -> float | None:
+    """目前嘗試剩餘的時間（秒）；不在 FallbackChain 的嘗試中時為 None"""
+    deadline = _attempt_deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 斷路器
+# ═══════════════════════════════════════════════════════════════════
+
+class CircuitState(Enum):
+    """斷路器狀態"""
+    CLOSED = "closed"        # 正常執行
+    OPEN = "open"            # 直接拒絕，等待冷卻
+    HALF_OPEN = "half_open"  # 冷卻結束，允許少量探測
+
+
+class CircuitBreaker:
+    """
+    單一技能的斷路器（執行緒安全）
+    
+    最近 window 次執行中至少有 min_calls 次、且失敗率達 failure_threshold 時開啟；
+    開啟 cooldown 秒後進入半開，允許 half_open_calls 次探測：
+    探測成功即關閉（清空視窗），失敗則重新開啟；未產生結果的探測以 release 歸還。
+    """
+    
+    def __init__(
+        self,
+        failure_threshold: float = 0.5,
+        window: int = 20,
+        min_calls: int = 5,
+        cooldown: float = 30.0,
+        half_open_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.half_open_calls = half_open_calls
+        self._clock = clock
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._current_state()
+    
+    def allow(self) -> bool:
+        """是否允許執行（半開狀態下會佔用一次探測）"""
+        with self._lock:
+            state = self._current_state()
+            if state is CircuitState.CLOSED:
+                return True
+            if state is CircuitState.HALF_OPEN and self._probes < self.half_open_calls:
+                self._probes += 1
+                return True
+            return False
+    
+    def release(self) -> None:
+        """歸還 allow 佔用但未產生結果的探測（例如執行被取消）"""
+        with self._lock:
+            if self._current_state() is CircuitState.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+    
+    def record_success(self) -> None:
+        with self._lock:
+            if self._current_state() is CircuitState.HALF_OPEN:
+                self._state = CircuitState.CLOSED
+                self._outcomes.clear()
+            self._outcomes.append(True)
+    
+    def record_failure(self) -> None:
+        with self._lock:
+            state = self._current_state()
+            if state is CircuitState.HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append(False)
+            if state is CircuitState.CLOSED and len(self._outcomes) >= self.min_calls:
+                failures = self._outcomes.count(False)
+                if failures / len(self._outcomes) >= self.failure_threshold:
+                    self._open()
+    
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CircuitState.CLOSED
+            self._outcomes.clear()
+    
+    def _open(self) -> None:
+        self._state = CircuitState.OPEN
+        self._opened_at = self._clock()
+        self._probes = 0
+    
+    def _current_state(self) -> CircuitState:
+        if self._state is CircuitState.OPEN and self._clock() - self._opened_at >= self.cooldown:
+            self._state = CircuitState.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+
+class CircuitBreakerRegistry:
+    """以 skill_id 為鍵的斷路器註冊表（參數套用於所有斷路器）"""
+    
+    def __init__(self, **options: Any):
+        self._options = options
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, skill_id: str) -> CircuitBreaker:
+        breaker = self._breakers.get(skill_id)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(skill_id, CircuitBreaker(**self._options))
+        return breaker
+    
+    def allow(self, skill_id: str) -> bool:
+        """執行前檢查（半開狀態下佔用一次探測，須以 record 或 release 結算）"""
+        return self.get(skill_id).allow()
+    
+    def release(self, skill_id: str) -> None:
+        """歸還未產生結果的探測"""
+        self.get(skill_id).release()
+    
+    def is_open(self, skill_id: str) -> bool:
+        """斷路器是否開啟（不佔用探測；半開視為可用）"""
+        breaker = self._breakers.get(skill_id)
+        return breaker is not None and breaker.state is CircuitState.OPEN
+    
+    def record(self, skill_id: str, success: bool) -> None:
+        breaker = self.get(skill_id)
+        if success:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+    
+    def states(self) -> dict[str, str]:
+        return {skill_id: breaker.state.value for skill_id, breaker in list(self._breakers.items())}
+    
+    def reset(self) -> None:
+        with self._lock:
+            self._breakers.clear()
+
+
 @dataclass
 class FallbackRule:
     """Fallback 規則"""
     trigger: str  # 觸發條件，如 "error.type == 'ParseError'"
     strategy: FallbackStrategy
     max_retries: int = 3
-    retry_delay: float = 1.0  # 秒
+    retry_delay: float = 1.0  # 秒（退避的基準延遲）
     next_skill: str | None = None  # NEXT_IMPLEMENTATION 策略專用
     message: str | None = None     # ASK_USER 策略專用
+    backoff: BackoffPolicy | None = None  # None 表示固定延遲 retry_delay
     
     def matches(self, error: ExecutionError, retry_count: int) -> bool:
         """檢查是否匹配此規則"""
-        trigger = self.trigger.lower()
-        
-        # 特殊觸發條件
-        if trigger == "default":
-            return True
-        if trigger == "any":
-            return True
-        if trigger.startswith("retries >="):
-            threshold = int(trigger.split(">=")[1].strip())
-            return retry_count >= threshold
-        
-        # 錯誤類型匹配
-        if f"'{error.type.value.lower()}'" in trigger.lower():
-            return True
-        if error.type.value.lower() in trigger.lower():
-            return True
-        
-        return False
+        return compile_trigger(self.trigger).test(error, retry_count)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 規則編譯
+# ═══════════════════════════════════════════════════════════════════
+#
+# 觸發條件只解析一次，依序嘗試以下形式：
+#   "default" / "any"              -> 所有錯誤
+#   "retries >= N"                 -> 重試次數門檻
+#   "error.type == 'ParseError'"   -> 錯誤類型
+#   其他只引用 error / retries 的表達式 -> 經由編譯後的表達式求值，
+#       可使用 error.type、error.message、error.node_id、error.skill_id
+#   其餘字串                       -> 舊版語意：包含錯誤類型名稱即匹配
+
+_TRIGGER_NAMES = frozenset({"error", "retries"})
+_THRESHOLD = re.compile(r"^\s*retries\s*>=\s*(\d+)\s*$", re.IGNORECASE)
+_TYPE_EQUALS = re.compile(r"""^\s*error\.type\s*==\s*(['"])(\w+)\1\s*$""", re.IGNORECASE)
+_ERROR_TYPES = {error_type.value.lower(): error_type for error_type in ErrorType}
+
+# 觸發條件文字 -> CompiledTrigger
+trigger_cache: LRUCache[str, "CompiledTrigger"] = LRUCache(maxsize=256)
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledTrigger:
+    """
+    預先解析的觸發條件
+    
+    - error_types: 適用的錯誤類型（None 表示所有類型）
+    - predicate: 額外條件 (error, retries) -> bool（None 表示無條件）
+    """
+    source: str
+    error_types: frozenset[ErrorType] | None
+    predicate: Callable[[ExecutionError, int], bool] | None = None
+    
+    def test(self, error: ExecutionError, retries: int) -> bool:
+        if self.error_types is not None and error.type not in self.error_types:
+            return False
+        return self.predicate is None or self.predicate(error, retries)
+
+
+def compile_trigger(trigger: str) -> CompiledTrigger:
+    """取得編譯後的觸發條件（以文字為鍵的 LRU 快取）"""
+    return trigger_cache.get_or_compute(trigger, lambda: _compile_trigger(trigger))
+
+
+def _compile_trigger(trigger: str) -> CompiledTrigger:
+    text = trigger.strip().lower()
+    if text in ("default", "any"):
+        return CompiledTrigger(trigger, None)
+    
+    threshold = _THRESHOLD.match(text)
+    if threshold:
+        n = int(threshold.group(1))
+        return CompiledTrigger(trigger, None, lambda error, retries: retries >= n)
+    
+    equals = _TYPE_EQUALS.match(text)
+    if equals and equals.group(2) in _ERROR_TYPES:
+        return CompiledTrigger(trigger, frozenset({_ERROR_TYPES[equals.group(2)]}))
+    
+    try:
+        expression = get_expression(trigger)
+    except ExpressionError:
+        expression = None
+    if expression is not None and expression.names <= _TRIGGER_NAMES:
+        return CompiledTrigger(
+            trigger, None,
+            lambda error, retries: expression.test({"error": _error_scope(error), "retries": retries}),
+        )
+    
+    return CompiledTrigger(
+        trigger,
+        frozenset(t for name, t in _ERROR_TYPES.items() if name in text),
+    )
+
+
+def _error_scope(error: ExecutionError) -> dict[str, Any]:
+    return {
+        "type": error.type.value,
+        "message": error.message,
+        "node_id": error.node_id,
+        "skill_id": error.skill_id,
+    }
+
+
+_ABORT_RULE = FallbackRule(trigger="default", strategy=FallbackStrategy.ABORT)
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledRules:
+    """
+    編譯後的規則分派表
+    
+    每個錯誤類型對應：依序需要檢查的條件規則（重試門檻、表達式），
+    以及之後第一個無條件匹配的規則（沒有時為終止）。
+    匹配結果與依序呼叫 FallbackRule.matches 相同。
+    """
+    rules: tuple[FallbackRule, ...]
+    plans: Mapping[ErrorType, tuple[tuple[tuple[CompiledTrigger, FallbackRule], ...], FallbackRule]]
+    
+    def match(self, error: ExecutionError, retries: int) -> FallbackRule:
+        conditional, terminal = self.plans[error.type]
+        for trigger, rule in conditional:
+            if trigger.predicate(error, retries):
+                return rule
+        return terminal
+
+
+def compile_rules(rules: list[FallbackRule]) -> CompiledRules:
+    """將規則列表編譯為以錯誤類型為鍵的分派表"""
+    triggers = [(compile_trigger(rule.trigger), rule) for rule in rules]
+    plans = {}
+    for error_type in ErrorType:
+        conditional = []
+        terminal = _ABORT_RULE
+        for trigger, rule in triggers:
+            if trigger.error_types is not None and error_type not in trigger.error_types:
+                continue
+            if trigger.predicate is None:
+                terminal = rule
+                break
+            conditional.append((trigger, rule))
+        plans[error_type] = (tuple(conditional), terminal)
+    return CompiledRules(rules=tuple(rules), plans=MappingProxyType(plans))
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -134,6 +521,7 @@ class FallbackResult:
     final_skill: str | None = None
     user_response: Any = None
     error: ExecutionError | None = None
+    budget_exhausted: bool = False  # 因重試預算耗盡而提前失敗
 
 
 class FallbackChain:
@@ -152,10 +540,17 @@ class FallbackChain:
         rules: list[FallbackRule] | None = None,
         max_total_retries: int = 10,
         global_timeout: float = 300.0,  # 5 分鐘
+        retry_budget: RetryBudget | None = None,
+        rng: random.Random | None = None,
+        circuit_breakers: CircuitBreakerRegistry | None = None,
     ):
         self.rules = rules or self._default_rules()
+        self._compiled: CompiledRules | None = None
         self.max_total_retries = max_total_retries
         self.global_timeout = global_timeout
+        self.retry_budget = retry_budget  # None 表示使用行程共用的預算
+        self._rng = rng or random.Random()
+        self.circuit_breakers = circuit_breakers
         
         # 回調
         self._on_retry: Callable[[ExecutionError, int], None] | None = None
@@ -217,65 +612,116 @@ class FallbackChain:
     
     async def execute_with_fallback(
         self,
-        func: Callable[..., Awaitable[Any]],
+        func: Callable[..., Awaitable[Any]] | None,
         *args,
         node_id: str = "unknown",
         skill_id: str | None = None,
         available_implementations: list[str] | None = None,
+        attempt_timeout: float | None = None,
+        implementation_factory: Callable[[str], Awaitable[Any]] | None = None,
         **kwargs,
     ) -> FallbackResult:
         """
         帶 Fallback 的執行
         
+        每次嘗試都在可取消的逾時內執行：attempt_timeout 與全局期限
+        （global_timeout，及外層嘗試的期限）中較早者。單次嘗試逾時視為
+        ErrorType.TIMEOUT 交由規則處理；全局期限到達時直接終止。
+        執行中的 func 可透過 remaining_time() 取得剩餘時間。
+        
+        提供 implementation_factory 時，每次嘗試執行 implementation_factory(目前技能)，
+        NEXT_IMPLEMENTATION 與斷路器才能真正切換到其他實現：依規則的 next_skill、
+        再依 available_implementations 的順序（呼叫端的排序），略過已嘗試過的技能。
+        沒有 factory 或已無未嘗試的實現時，NEXT_IMPLEMENTATION 以最後的錯誤終止。
+        
         Args:
             func: 要執行的異步函數
             *args: 函數參數
             node_id: 節點 ID（用於錯誤報告）
             skill_id: 當前 skill ID
-            available_implementations: 可用的替代實現
+            available_implementations: 可用的替代實現（依偏好排序）
+            attempt_timeout: 單次嘗試的逾時（秒，None 表示只受全局期限限制）
+            implementation_factory: skill_id -> awaitable，取代 func 執行指定技能
             **kwargs: 函數關鍵字參數
         
         Returns:
             FallbackResult: 執行結果
         """
-        start_time = time.time()
+        deadline = time.monotonic() + self.global_timeout
+        outer_deadline = _attempt_deadline.get()
+        if outer_deadline is not None:
+            deadline = min(deadline, outer_deadline)
         total_retries = 0
         current_skill = skill_id
-        impl_index = 0
+        attempted: set[str] = set()
         implementations = available_implementations or []
+        switchable = implementation_factory is not None
+        previous_delay: float | None = None
         
         while True:
             # 檢查全局超時
-            if time.time() - start_time > self.global_timeout:
+            if time.monotonic() >= deadline:
+                return self._global_timeout_result(total_retries, node_id, current_skill)
+            
+            # 檢查重試上限
+            if total_retries >= self.max_total_retries:
                 return FallbackResult(
                     success=False,
                     strategy_used=FallbackStrategy.ABORT,
                     retries=total_retries,
+                    final_skill=current_skill,
                     error=ExecutionError(
-                        type=ErrorType.TIMEOUT,
-                        message="Global timeout exceeded",
+                        type=ErrorType.UNKNOWN,
+                        message="Max retries exceeded",
                         node_id=node_id,
                         skill_id=current_skill,
                     ),
                 )
             
-            # 檢查重試上限
-            if total_retries >= self.max_total_retries:
+            # 斷路器：嘗試前取得許可（半開時佔用探測）；拒絕時改用下一個可用實現，沒有時終止
+            breakers = self.circuit_breakers
+            if breakers is not None and current_skill is not None and not breakers.allow(current_skill):
+                attempted.add(current_skill)
+                next_skill = self._next_implementation(implementations, attempted) if switchable else None
+                if next_skill is not None:
+                    current_skill = next_skill
+                    continue
                 return FallbackResult(
                     success=False,
                     strategy_used=FallbackStrategy.ABORT,
                     retries=total_retries,
+                    final_skill=current_skill,
                     error=ExecutionError(
-                        type=ErrorType.UNKNOWN,
-                        message="Max retries exceeded",
+                        type=ErrorType.CIRCUIT_OPEN,
+                        message=f"Circuit open for skill: {current_skill}",
                         node_id=node_id,
                         skill_id=current_skill,
                     ),
                 )
             
-            # 嘗試執行
+            # 嘗試執行（可取消的逾時）
+            limit = deadline - time.monotonic()
+            attempt_limited = attempt_timeout is not None and attempt_timeout < limit
+            if attempt_limited:
+                limit = attempt_timeout
+            scope = asyncio.timeout(limit)
+            token = _attempt_deadline.set(time.monotonic() + limit)
+            probe = current_skill if breakers is not None else None  # 本次嘗試須結算的許可
             try:
-                result = await func(*args, **kwargs)
+                try:
+                    async with scope:
+                        if switchable and current_skill is not None:
+                            result = await implementation_factory(current_skill)
+                        else:
+                            result = await func(*args, **kwargs)
+                finally:
+                    _attempt_deadline.reset(token)
+                budget = self._budget()
+                if budget is not None:
+                    budget.record_success()
+                if probe is not None:
+                    breakers.record(probe, True)
+                    probe = None
                 return FallbackResult(
                     success=True,
                     strategy_used=FallbackStrategy.RETRY if total_retries > 0 else FallbackStrategy.SKIP,
@@ -283,8 +729,27 @@ class FallbackChain:
                     final_skill=current_skill,
                 )
             except Exception as e:
-                error = ExecutionError.from_exception(e, node_id, current_skill)
+                if isinstance(e, TimeoutError) and scope.expired():
+                    if not attempt_limited:
+                        if probe is not None:
+                            breakers.record(probe, False)  # 逾時的嘗試同樣結算斷路器
+                            probe = None
+                        return self._global_timeout_result(total_retries + 1, node_id, current_skill)
+                    error = ExecutionError(
+                        type=ErrorType.TIMEOUT,
+                        message=f"Attempt timed out after {limit:g}s",
+                        node_id=node_id,
+                        skill_id=current_skill,
+                        original_exception=e,
+                    )
+                else:
+                    error = ExecutionError.from_exception(e, node_id, current_skill)
                 total_retries += 1
+                if current_skill is not None:
+                    attempted.add(current_skill)
+                    if probe is not None:
+                        breakers.record(probe, False)
+                        probe = None
                 
                 # 找匹配的規則
                 rule = self._find_matching_rule(error, total_retries)
@@ -292,27 +757,49 @@ class FallbackChain:
                 if self._on_fallback:
                     self._on_fallback(rule.strategy, f"{error.type.value}: {error.message}")
                 
+                # 沒有未嘗試的實現可切換：以最後的錯誤終止（不重新執行剛失敗的實現）
+                next_skill = None
+                if rule.strategy == FallbackStrategy.NEXT_IMPLEMENTATION:
+                    if switchable:
+                        next_skill = self._next_implementation(implementations, attempted, rule.next_skill)
+                    if next_skill is None:
+                        return FallbackResult(
+                            success=False,
+                            strategy_used=FallbackStrategy.ABORT,
+                            retries=total_retries,
+                            final_skill=current_skill,
+                            error=error,
+                        )
+                
+                # 重新執行前先取得重試預算，耗盡時立即失敗
+                if rule.strategy in (FallbackStrategy.RETRY, FallbackStrategy.NEXT_IMPLEMENTATION):
+                    budget = self._budget()
+                    if budget is not None and not budget.try_acquire():
+                        return FallbackResult(
+                            success=False,
+                            strategy_used=FallbackStrategy.ABORT,
+                            retries=total_retries,
+                            final_skill=current_skill,
+                            error=error,
+                            budget_exhausted=True,
+                        )
+                
                 # 執行策略
                 if rule.strategy == FallbackStrategy.RETRY:
                     if self._on_retry:
                         self._on_retry(error, total_retries)
                     
                     if total_retries <= rule.max_retries:
-                        await asyncio.sleep(rule.retry_delay)
+                        previous_delay = self._retry_delay(rule, total_retries, previous_delay)
+                        await asyncio.sleep(min(previous_delay, max(0.0, deadline - time.monotonic())))
                         continue
                     else:
                         # 重試次數超過，找下一個規則
                         continue
                 
                 elif rule.strategy == FallbackStrategy.NEXT_IMPLEMENTATION:
-                    impl_index += 1
-                    if impl_index < len(implementations):
-                        current_skill = implementations[impl_index]
-                        # TODO: 更新 func 使用新的 skill
-                        continue
-                    else:
-                        # 沒有更多實現，嘗試下一個規則
-                        continue
+                    current_skill = next_skill
+                    continue
                 
                 elif rule.strategy == FallbackStrategy.ASK_USER:
                     if self._ask_user:
@@ -322,6 +809,7 @@ class FallbackChain:
                             success=True,  # 用戶處理了
                             strategy_used=FallbackStrategy.ASK_USER,
                             retries=total_retries,
+                            final_skill=current_skill,
                             user_response=user_response,
                         )
                     else:
@@ -330,6 +818,7 @@ class FallbackChain:
                             success=False,
                             strategy_used=FallbackStrategy.ABORT,
                             retries=total_retries,
+                            final_skill=current_skill,
                             error=error,
                         )
                 
@@ -338,6 +827,7 @@ class FallbackChain:
                         success=True,  # 跳過視為成功
                         strategy_used=FallbackStrategy.SKIP,
                         retries=total_retries,
+                        final_skill=current_skill,
                     )
                 
                 else:  # ABORT
@@ -345,17 +835,72 @@ class FallbackChain:
                         success=False,
                         strategy_used=FallbackStrategy.ABORT,
                         retries=total_retries,
+                        final_skill=current_skill,
                         error=error,
                     )
+            finally:
+                if probe is not None:
+                    breakers.release(probe)  # 被取消：歸還未結算的探測
+    
+    def _next_implementation(
+        self, implementations: list[str], attempted: set[str], preferred: str | None = None
+    ) -> str | None:
+        """
+        下一個未嘗試且斷路器未開啟的實現（優先使用規則指定的 next_skill）
+        
+        只檢查狀態、不佔用半開探測：許可在實際嘗試前才取得。
+        """
+        breakers = self.circuit_breakers
+        for skill in ([preferred] if preferred else []) + implementations:
+            if skill not in attempted and (breakers is None or not breakers.is_open(skill)):
+                return skill
+        return None
+    
+    def _global_timeout_result(
+        self, retries: int, node_id: str, skill_id: str | None
+    ) -> FallbackResult:
+        return FallbackResult(
+            success=False,
+            strategy_used=FallbackStrategy.ABORT,
+            retries=retries,
+            final_skill=skill_id,
+            error=ExecutionError(
+                type=ErrorType.TIMEOUT,
+                message="Global timeout exceeded",
+                node_id=node_id,
+                skill_id=skill_id,
+            ),
+        )
+    
+    def _budget(self) -> RetryBudget | None:
+        return self.retry_budget if self.retry_budget is not None else _default_retry_budget
+    
+    def _retry_delay(self, rule: FallbackRule, attempt: int, previous: float | None) -> float:
+        """依規則的退避策略計算重試前的延遲"""
+        if rule.backoff is None:
+            return rule.retry_delay
+        return rule.backoff.delay(rule.retry_delay, attempt, previous, self._rng)
     
     def _find_matching_rule(self, error: ExecutionError, retry_count: int) -> FallbackRule:
-        """找到匹配的規則"""
-        for rule in self.rules:
-            if rule.matches(error, retry_count):
-                return rule
+        """找到匹配的規則（沒有匹配時返回終止規則）"""
+        return self.compiled_rules.match(error, retry_count)
+    
+    @property
+    def compiled_rules(self) -> CompiledRules:
+        """
+        規則分派表（首次使用時編譯）
         
-        # 返回預設規則（終止）
-        return FallbackRule(trigger="default", strategy=FallbackStrategy.ABORT)
+        rules 列表被取代或增刪項目時重新編譯；
+        就地修改既有規則的 trigger 後需重新指定 rules。
+        """
+        compiled = self._compiled
+        if (
+            compiled is None
+            or len(compiled.rules) != len(self.rules)
+            or any(a is not b for a, b in zip(compiled.rules, self.rules))
+        ):
+            compiled = self._compiled = compile_rules(self.rules)
+        return compiled
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -366,12 +911,13 @@ def create_standard_fallback_chain() -> FallbackChain:
     """建立標準的 Fallback 鏈"""
     return FallbackChain(
         rules=[
-            # 網路問題：指數退避重試
+            # 網路問題：指數退避重試（加入抖動，避免並行執行同步重試）
             FallbackRule(
                 trigger="error.type == 'NetworkError'",
                 strategy=FallbackStrategy.RETRY,
                 max_retries=5,
                 retry_delay=2.0,
+                backoff=BackoffPolicy(BackoffKind.EXPONENTIAL, max_delay=30.0),
             ),
             # 超時：立即重試一次
             FallbackRule(
@@ -6,8 +6,18 @@ Graph Data Structures - 圖資料結構
 from __future__ import annotations
 from dataclasses import dataclass, field
 from enum import Enum, auto
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Optional, Sequence
 import json
+import sys
+
+from .domain.services.compiler import CompiledGraph, compile_graph
+from .domain.services.expression import is_valid_expression
+from .domain.services.fingerprint import (
+    ContentHash, GraphRefs, graph_refs, notify_setattr, track_node, untrack_node,
+)
+from .domain.services.snapshot import decode_snapshot, encode_snapshot
+from .domain.services.topology import ComponentAnalysis, analyze_components, longest_path_length
+from .domain.services.validation import ValidationReport, reachability_issues, validation_cache
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -68,15 +78,18 @@ class ComplexityLevel(Enum):
 # 節點定義
 # ═══════════════════════════════════════════════════════════════════
 
-@dataclass
+# 節點相關記錄使用 __slots__（無實例 __dict__），未設定的序列欄位
+# 共用空 tuple，大量常駐的能力圖因此只為實際存在的資料付出記憶體。
+
+@dataclass(frozen=True, slots=True)
 class NodeContract:
     """節點的輸入輸出契約（用於抽象節點）"""
-    inputs: list[str] = field(default_factory=list)
-    outputs: list[str] = field(default_factory=list)
-    capabilities: list[str] = field(default_factory=list)  # 需要的能力
+    inputs: Sequence[str] = ()
+    outputs: Sequence[str] = ()
+    capabilities: Sequence[str] = ()  # 需要的能力
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BranchCondition:
     """分支條件"""
     name: str
@@ -84,19 +97,26 @@ class BranchCondition:
     target: str  # 目標節點 ID
 
 
-@dataclass 
+@dataclass(frozen=True, slots=True)
 class Implementation:
     """抽象節點的具體實現"""
     id: str
     skill_id: str
     priority: int = 1
-    conditions: list[str] = field(default_factory=list)  # 適用條件
-    fallbacks: list[str] = field(default_factory=list)   # 失敗時的備選
+    conditions: Sequence[str] = ()  # 適用條件
+    fallbacks: Sequence[str] = ()   # 失敗時的備選
 
 
-@dataclass
+@dataclass(slots=True)
 class GraphNode:
-    """圖節點"""
+    """
+    圖節點
+    
+    加入能力圖後重新指定欄位會通知該圖更新指紋與快取。
+    """
+    # 持有此節點之圖的弱參照（由 CapabilityGraph 維護，須為第一個欄位）
+    _graphs: GraphRefs = field(default=(), init=False, repr=False, compare=False)
+    
     id: str
     type: NodeType
     
@@ -105,22 +125,28 @@ class GraphNode:
     
     # 抽象節點專用
     contract: NodeContract | None = None
-    implementations: list[Implementation] = field(default_factory=list)
-    resolution_strategy: str = "auto_detect"  # auto_detect | user_select | priority
+    implementations: Sequence[Implementation] = ()
+    resolution_strategy: str = "auto_detect"  # auto_detect | user_select | priority | hedge
     
     # 控制節點專用
-    conditions: list[BranchCondition] = field(default_factory=list)
+    conditions: Sequence[BranchCondition] = ()
     max_iterations: int = 10
     
     # 互動節點專用
     prompt: str | None = None
-    options: list[str] = field(default_factory=list)
+    options: Sequence[str] = ()
     
     # 通用
     timeout: int | None = None  # 秒
-    outputs: list[str] = field(default_factory=list)
+    outputs: Sequence[str] = ()
     metadata: dict[str, Any] = field(default_factory=dict)
     
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name == "_graphs" or not self._graphs:
+            object.__setattr__(self, name, value)
+        else:
+            notify_setattr(self, name, value)
+    
     def is_abstract(self) -> bool:
         """是否為抽象節點"""
         return self.type == NodeType.ABSTRACT
@@ -138,7 +164,7 @@ class GraphNode:
 # 邊定義
 # ═══════════════════════════════════════════════════════════════════
 
-@dataclass
+@dataclass(slots=True)
 class GraphEdge:
     """圖的邊"""
     from_node: str
@@ -163,7 +189,7 @@ class GraphEdge:
 # 圖定義
 # ═══════════════════════════════════════════════════════════════════
 
-@dataclass
+@dataclass(slots=True)
 class GraphMetrics:
     """圖的複雜度指標"""
     node_count: int = 0
@@ -197,19 +223,118 @@ class CapabilityGraph:
     
     # 快取
     _adjacency: dict[str, list[str]] = field(default_factory=dict, repr=False)
+    _predecessors: dict[str, list[str]] = field(default_factory=dict, repr=False)
+    _edge_map: dict[tuple[str, str], GraphEdge] = field(default_factory=dict, repr=False)
+    _type_index: dict[NodeType, list[GraphNode]] = field(default_factory=dict, repr=False)
     _node_map: dict[str, GraphNode] = field(default_factory=dict, repr=False)
+    
+    # 增量維護的指標計數（類型計數直接取自 _type_index）
+    _branch_condition_total: int = field(default=0, repr=False)
+    _max_iterations: int = field(default=0, repr=False)
+    _max_depth: int | None = field(default=None, repr=False)
+    _content: ContentHash = field(default_factory=ContentHash, repr=False)
     _metrics: GraphMetrics | None = field(default=None, repr=False)
+    _compiled: CompiledGraph | None = field(default=None, repr=False)
+    _refs: GraphRefs = field(default=(), repr=False, compare=False)
     
     def __post_init__(self):
+        self._refs = graph_refs(self)
         self._build_cache()
     
-    def _build_cache(self):
-        """建立快取"""
-        self._node_map = {n.id: n for n in self.nodes}
-        self._adjacency = {n.id: [] for n in self.nodes}
+    def _build_cache(self, content: ContentHash | None = None):
+        """
+        建立快取（鄰接、反向鄰接、邊索引、類型分桶）
+        
+        content 為已知的內容雜湊狀態（來自快照）時略過逐項雜湊。
+        """
+        self._node_map = {}
+        self._adjacency = {}
+        self._predecessors = {}
+        self._edge_map = {}
+        self._type_index = {}
+        self._branch_condition_total = 0
+        self._max_iterations = 0
+        self._max_depth = None
+        self._content = content if content is not None else ContentHash()
+        for node in self.nodes:
+            self._index_node(node)
         for edge in self.edges:
-            if edge.from_node in self._adjacency:
-                self._adjacency[edge.from_node].append(edge.to_node)
+            self._index_edge(edge)
+        self._content.paused = False
+    
+    def _index_node(self, node: GraphNode):
+        """將節點加入索引（同 ID 重新加入時取代舊節點的分桶與計數）"""
+        previous = self._node_map.get(node.id)
+        if previous is not None:
+            self._unindex_node(previous)
+            if previous is not node:
+                untrack_node(previous, self._refs)
+        self._node_map[node.id] = node
+        track_node(node, self._refs)
+        self._adjacency.setdefault(node.id, [])
+        self._predecessors.setdefault(node.id, [])
+        self._type_index.setdefault(node.type, []).append(node)
+        self._content.add("node", self._node_to_dict(node))
+        if node.type == NodeType.BRANCH:
+            self._branch_condition_total += len(node.conditions)
+        elif node.type == NodeType.LOOP_START:
+            self._max_iterations = max(self._max_iterations, node.max_iterations)
+    
+    def _unindex_node(self, node: GraphNode):
+        """將節點自類型分桶、增量計數與內容雜湊移除（鄰接保留）"""
+        bucket = self._type_index[node.type]
+        for i, indexed in enumerate(bucket):
+            if indexed is node:
+                del bucket[i]
+                break
+        self._content.remove("node", self._node_to_dict(node))
+        if node.type == NodeType.BRANCH:
+            self._branch_condition_total -= len(node.conditions)
+        elif node.type == NodeType.LOOP_START and node.max_iterations >= self._max_iterations:
+            self._max_iterations = max((n.max_iterations for n in bucket), default=0)
+    
+    def _node_changing(self, node: GraphNode, name: str):
+        """節點欄位即將重新指定：移除舊內容的雜湊與計數（ID/類型變更改為整體重建）"""
+        if name in ("id", "type") or self._node_map.get(node.id) is not node:
+            return
+        self._content.remove("node", self._node_to_dict(node))
+        if node.type == NodeType.BRANCH:
+            self._branch_condition_total -= len(node.conditions)
+    
+    def _node_changed(self, node: GraphNode, name: str):
+        """節點欄位已重新指定：加入新內容並清除指標與編譯快取"""
+        if name in ("id", "type"):
+            if any(indexed is node for indexed in self._node_map.values()):
+                self.invalidate()
+            return
+        if self._node_map.get(node.id) is not node:
+            return
+        self._content.add("node", self._node_to_dict(node))
+        if node.type == NodeType.BRANCH:
+            self._branch_condition_total += len(node.conditions)
+        elif node.type == NodeType.LOOP_START:
+            self._max_iterations = max(n.max_iterations for n in self._type_index[node.type])
+        self._metrics = None
+        self._compiled = None
+    
+    def invalidate(self):
+        """
+        直接修改 nodes/edges 清單、序列欄位的元素或邊的屬性後，重建索引、指紋與快取
+        
+        重新指定節點欄位會自動通知，不需呼叫。
+        """
+        self._build_cache()
+        self._metrics = None
+        self._compiled = None
+    
+    def _index_edge(self, edge: GraphEdge):
+        """將邊加入索引"""
+        if edge.from_node in self._adjacency:
+            self._adjacency[edge.from_node].append(edge.to_node)
+        self._predecessors.setdefault(edge.to_node, []).append(edge.from_node)
+        # 重複邊保留第一條，與線性搜尋的結果一致
+        self._edge_map.setdefault((edge.from_node, edge.to_node), edge)
+        self._content.add("edge", self._edge_to_dict(edge))
     
     def get_node(self, node_id: str) -> GraphNode | None:
         """取得節點"""
@@ -221,46 +346,78 @@ class CapabilityGraph:
     
     def get_predecessors(self, node_id: str) -> list[str]:
         """取得前驅節點"""
-        return [e.from_node for e in self.edges if e.to_node == node_id]
+        return list(self._predecessors.get(node_id, ()))
     
     def get_edge(self, from_node: str, to_node: str) -> GraphEdge | None:
         """取得邊"""
-        for edge in self.edges:
-            if edge.from_node == from_node and edge.to_node == to_node:
-                return edge
-        return None
+        return self._edge_map.get((from_node, to_node))
+    
+    def get_nodes_by_type(self, node_type: NodeType) -> list[GraphNode]:
+        """取得指定類型的所有節點（依加入順序）"""
+        return self._type_index.get(node_type, [])
     
     def get_start_node(self) -> GraphNode | None:
         """取得起始節點"""
-        for node in self.nodes:
-            if node.type == NodeType.START:
-                return node
-        return None
+        start_nodes = self.get_nodes_by_type(NodeType.START)
+        return start_nodes[0] if start_nodes else None
     
     def get_end_nodes(self) -> list[GraphNode]:
         """取得結束節點"""
-        return [n for n in self.nodes if n.type == NodeType.END]
+        return list(self.get_nodes_by_type(NodeType.END))
     
     def get_abstract_nodes(self) -> list[GraphNode]:
         """取得所有抽象節點"""
-        return [n for n in self.nodes if n.type == NodeType.ABSTRACT]
+        return list(self.get_nodes_by_type(NodeType.ABSTRACT))
     
     def add_node(self, node: GraphNode):
         """新增節點"""
+        replaced = node.id in self._node_map
         self.nodes.append(node)
-        self._node_map[node.id] = node
-        self._adjacency[node.id] = []
+        self._index_node(node)
         self._metrics = None  # 清除快取
+        self._compiled = None
+        # 新節點尚無邊，只有取代既有節點或成為第一個 START 時才會改變深度
+        if replaced or (node.type == NodeType.START and self.get_start_node() is node):
+            self._max_depth = None
     
     def add_edge(self, edge: GraphEdge):
         """新增邊"""
         self.edges.append(edge)
-        if edge.from_node in self._adjacency:
-            self._adjacency[edge.from_node].append(edge.to_node)
+        self._index_edge(edge)
         self._metrics = None  # 清除快取
+        self._compiled = None
+        self._max_depth = None
+    
+    @property
+    def fingerprint(self) -> str:
+        """
+        內容指紋（與節點/邊順序無關，增量維護）
+        
+        重新指定節點欄位時自動更新；其他原地修改需呼叫 invalidate()。
+        """
+        return self._content.digest({
+            "id": self.id,
+            "version": self.version,
+            "name": self.name,
+            "description": self.description,
+            "fallback_strategy": self.fallback_strategy,
+            "max_retries": self.max_retries,
+            "retry_delay": self.retry_delay,
+        })
+    
+    def compile(self) -> CompiledGraph:
+        """編譯為不可變的整數索引結構（結構變更前重複使用）"""
+        if self._compiled is None:
+            self._compiled = compile_graph(self)
+        return self._compiled
     
     def calculate_metrics(self) -> GraphMetrics:
-        """計算複雜度指標"""
+        """
+        計算複雜度指標
+        
+        計數於 add_node/add_edge 時增量維護，此處為 O(1)；
+        只有深度在結構變更後才延遲重算。
+        """
         if self._metrics is not None:
             return self._metrics
         
@@ -272,22 +429,25 @@ class CapabilityGraph:
         cyclomatic = E - N + 2 * P
         
         # 計算各種指標
-        loop_nodes = [n for n in self.nodes if n.type == NodeType.LOOP_START]
-        max_iterations = max((n.max_iterations for n in loop_nodes), default=0)
-        
-        interaction_count = sum(1 for n in self.nodes if n.is_interaction())
-        parallel_branches = sum(1 for n in self.nodes if n.type == NodeType.PARALLEL_SPLIT)
-        abstract_nodes = sum(1 for n in self.nodes if n.is_abstract())
+        count = self._count_nodes
+        max_iterations = self._max_iterations
+        interaction_count = (
+            count(NodeType.CONFIRM) + count(NodeType.SELECT) + count(NodeType.INPUT)
+        )
+        parallel_branches = count(NodeType.PARALLEL_SPLIT)
+        abstract_nodes = count(NodeType.ABSTRACT)
         
         # 分支因子
-        branch_nodes = [n for n in self.nodes if n.type == NodeType.BRANCH]
+        branch_nodes = count(NodeType.BRANCH)
         branch_factor = (
-            sum(len(n.conditions) for n in branch_nodes) / len(branch_nodes)
+            self._branch_condition_total / branch_nodes
             if branch_nodes else 0
         )
         
         # 最大深度
-        max_depth = self._calculate_max_depth()
+        if self._max_depth is None:
+            self._max_depth = self._calculate_max_depth()
+        max_depth = self._max_depth
         
         # 綜合複雜度評分
         score = (
@@ -327,70 +487,118 @@ class CapabilityGraph:
         
         return self._metrics
     
+    def _count_nodes(self, node_type: NodeType) -> int:
+        return len(self._type_index.get(node_type, ()))
+    
     def _calculate_max_depth(self) -> int:
-        """計算最大深度（BFS）"""
+        """計算最大深度（SCC 縮點 + 拓撲最長路徑，O(N+E)）"""
         start = self.get_start_node()
         if not start:
             return 0
         
-        visited = set()
-        max_depth = 0
-        
-        def dfs(node_id: str, depth: int):
-            nonlocal max_depth
-            if node_id in visited:
-                return
-            visited.add(node_id)
-            max_depth = max(max_depth, depth)
-            
-            for successor in self.get_successors(node_id):
-                dfs(successor, depth + 1)
-            
-            visited.remove(node_id)
-        
-        dfs(start.id, 0)
-        return max_depth
+        return longest_path_length([start.id], self.get_successors)
+    
+    def analyze_components(self) -> ComponentAnalysis[str]:
+        """強連通分量分析（迭代式 Tarjan，含縮點 DAG 與迴圈本體）"""
+        return analyze_components(self._node_map, self.get_successors)
+    
+    def find_cycles(self) -> list[list[str]]:
+        """找出所有迴圈本體（每個含環的強連通分量）"""
+        return [list(cycle) for cycle in self.analyze_components().cycles]
+    
+    def has_cycle(self) -> bool:
+        """檢測是否有環"""
+        return self.analyze_components().has_cycle
     
     def validate(self) -> tuple[bool, list[str]]:
         """驗證圖的結構"""
+        report = self.validate_report()
+        return report.valid, list(report.errors)
+    
+    def validate_report(self) -> ValidationReport:
+        """
+        驗證圖的結構（含警告、不可達節點、死路）
+        
+        結果以內容指紋記憶化，未變更的圖重複驗證時直接取用。
+        """
+        return validation_cache.get_or_compute(
+            ("legacy", self.fingerprint), self._validate_uncached,
+        )
+    
+    def _validate_uncached(self) -> ValidationReport:
+        """單次走訪節點與邊，再以正反向可達性找出不可達節點與死路"""
         errors = []
+        warnings = []
         
         # 檢查 start 節點
-        start_nodes = [n for n in self.nodes if n.type == NodeType.START]
+        start_nodes = self.get_nodes_by_type(NodeType.START)
         if len(start_nodes) == 0:
             errors.append("Graph must have a start node")
         elif len(start_nodes) > 1:
             errors.append("Graph must have exactly one start node")
         
         # 檢查 end 節點
-        end_nodes = [n for n in self.nodes if n.type == NodeType.END]
+        end_nodes = self.get_nodes_by_type(NodeType.END)
         if len(end_nodes) == 0:
             errors.append("Graph must have at least one end node")
         
+        # 節點檢查（單次走訪）；分支條件目標也視為可達路徑
+        branch_targets: dict[str, list[str]] = {}
+        branch_sources: dict[str, list[str]] = {}
+        for node in self.nodes:
+            if node.type == NodeType.BRANCH:
+                if not node.conditions:
+                    errors.append(f"Branch node {node.id} must have conditions")
+                for c in node.conditions:
+                    if not is_valid_expression(c.expression):
+                        warnings.append(
+                            f"Branch node {node.id} condition '{c.name}' "
+                            f"has an invalid expression: {c.expression}"
+                        )
+                    if c.target not in self._node_map:
+                        warnings.append(
+                            f"Branch node {node.id} condition '{c.name}' "
+                            f"targets non-existent node: {c.target}"
+                        )
+                        continue
+                    branch_targets.setdefault(node.id, []).append(c.target)
+                    branch_sources.setdefault(c.target, []).append(node.id)
+            elif node.type == NodeType.SKILL and not node.skill_id:
+                errors.append(f"Skill node {node.id} must have skill_id")
+            elif node.type == NodeType.ABSTRACT and not node.implementations:
+                errors.append(f"Abstract node {node.id} must have implementations")
+        
         # 檢查邊的節點是否存在
-        node_ids = set(n.id for n in self.nodes)
         for edge in self.edges:
-            if edge.from_node not in node_ids:
+            if edge.from_node not in self._node_map:
                 errors.append(f"Edge references non-existent node: {edge.from_node}")
-            if edge.to_node not in node_ids:
+            if edge.to_node not in self._node_map:
                 errors.append(f"Edge references non-existent node: {edge.to_node}")
+            if edge.exit_condition and not is_valid_expression(edge.exit_condition):
+                warnings.append(
+                    f"Edge {edge.from_node} -> {edge.to_node} has an invalid "
+                    f"exit condition: {edge.exit_condition}"
+                )
         
-        # 檢查 branch 節點是否有條件
-        for node in self.nodes:
-            if node.type == NodeType.BRANCH and not node.conditions:
-                errors.append(f"Branch node {node.id} must have conditions")
-        
-        # 檢查 skill 節點是否有 skill_id
-        for node in self.nodes:
-            if node.type == NodeType.SKILL and not node.skill_id:
-                errors.append(f"Skill node {node.id} must have skill_id")
-        
-        # 檢查抽象節點是否有 implementations
-        for node in self.nodes:
-            if node.type == NodeType.ABSTRACT and not node.implementations:
-                errors.append(f"Abstract node {node.id} must have implementations")
+        # 可達性
+        unreachable, dead_ends = reachability_issues(
+            self._node_map,
+            [start_nodes[0].id] if start_nodes else [],
+            [n.id for n in end_nodes],
+            lambda n: self.get_successors(n) + branch_targets.get(n, []),
+            lambda n: self._predecessors.get(n, []) + branch_sources.get(n, []),
+        )
+        if unreachable:
+            warnings.append(f"Unreachable nodes: {unreachable}")
+        if dead_ends:
+            warnings.append(f"Nodes that cannot reach an end node: {dead_ends}")
         
-        return len(errors) == 0, errors
+        return ValidationReport(
+            errors=tuple(errors),
+            warnings=tuple(warnings),
+            unreachable=tuple(unreachable),
+            dead_ends=tuple(dead_ends),
+        )
     
     def to_dict(self) -> dict:
         """轉換為字典"""
@@ -404,6 +612,7 @@ class CapabilityGraph:
             "fallback_strategy": self.fallback_strategy,
             "max_retries": self.max_retries,
             "retry_delay": self.retry_delay,
+            "fingerprint": self.fingerprint,
         }
     
     def _node_to_dict(self, node: GraphNode) -> dict:
@@ -416,9 +625,9 @@ class CapabilityGraph:
             d["skill_id"] = node.skill_id
         if node.contract:
             d["contract"] = {
-                "inputs": node.contract.inputs,
-                "outputs": node.contract.outputs,
-                "capabilities": node.contract.capabilities,
+                "inputs": list(node.contract.inputs),
+                "outputs": list(node.contract.outputs),
+                "capabilities": list(node.contract.capabilities),
             }
         if node.implementations:
             d["implementations"] = [
@@ -426,8 +635,8 @@ class CapabilityGraph:
                     "id": impl.id,
                     "skill_id": impl.skill_id,
                     "priority": impl.priority,
-                    "conditions": impl.conditions,
-                    "fallbacks": impl.fallbacks,
+                    "conditions": list(impl.conditions),
+                    "fallbacks": list(impl.fallbacks),
                 }
                 for impl in node.implementations
             ]
@@ -439,7 +648,7 @@ class CapabilityGraph:
         if node.prompt:
             d["prompt"] = node.prompt
         if node.outputs:
-            d["outputs"] = node.outputs
+            d["outputs"] = list(node.outputs)
         return d
     
     def _edge_to_dict(self, edge: GraphEdge) -> dict:
@@ -451,78 +660,116 @@ class CapabilityGraph:
         }
         if edge.condition:
             d["condition"] = edge.condition
+        if edge.max_count is not None:
+            d["max_count"] = edge.max_count
+        if edge.exit_condition:
+            d["exit_condition"] = edge.exit_condition
         if edge.trigger:
             d["trigger"] = edge.trigger
         return d
     
     @classmethod
-    def from_dict(cls, data: dict) -> "CapabilityGraph":
-        """從字典建立"""
-        nodes = [cls._node_from_dict(n) for n in data.get("nodes", [])]
-        edges = [cls._edge_from_dict(e) for e in data.get("edges", [])]
+    def from_dict(cls, data: dict, content: ContentHash | None = None) -> "CapabilityGraph":
+        """
+        從字典建立
         
-        return cls(
+        content 為已知的內容雜湊狀態（來自快照）時略過逐項雜湊。
+        """
+        graph = cls(
             id=data["id"],
             version=data.get("version", "1.0"),
             name=data.get("name", ""),
             description=data.get("description", ""),
-            nodes=nodes,
-            edges=edges,
             fallback_strategy=data.get("fallback_strategy", "retry_then_ask"),
             max_retries=data.get("max_retries", 3),
             retry_delay=data.get("retry_delay", 1.0),
         )
+        graph.nodes = [cls._node_from_dict(n) for n in data.get("nodes", [])]
+        graph.edges = [cls._edge_from_dict(e) for e in data.get("edges", [])]
+        graph._build_cache(content)
+        return graph
+    
+    def to_bytes(self) -> bytes:
+        """輸出二進位快照（與 to_dict 完全對應，並保存內容雜湊狀態）"""
+        return encode_snapshot(
+            {"graph": self.to_dict(), "content": self._content.state()},
+            kind="legacy",
+        )
+    
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "CapabilityGraph":
+        """
+        從二進位快照建立
+        
+        保存的內容雜湊狀態須與節點/邊數量及快照內的指紋一致才會採用。
+        
+        Raises:
+            ValueError: 非快照、內容損毀或雜湊狀態與圖不一致
+        """
+        payload = decode_snapshot(blob, kind="legacy")
+        try:
+            data = payload["graph"]
+            graph = cls.from_dict(data, content=ContentHash.restore(payload["content"]))
+            stored = data.get("fingerprint")
+        except (KeyError, TypeError, IndexError, AttributeError) as e:
+            raise ValueError("Malformed capability graph snapshot") from e
+        if graph._content.count != len(graph._node_map) + len(graph.edges) or graph.fingerprint != stored:
+            raise ValueError("Snapshot content hash does not match its graph")
+        return graph
     
     @classmethod
     def _node_from_dict(cls, data: dict) -> GraphNode:
-        """從字典建立節點"""
+        """從字典建立節點（ID 字串駐留，缺少的欄位共用空 tuple）"""
         contract = None
         if "contract" in data:
             contract = NodeContract(
-                inputs=data["contract"].get("inputs", []),
-                outputs=data["contract"].get("outputs", []),
-                capabilities=data["contract"].get("capabilities", []),
+                inputs=tuple(data["contract"].get("inputs", ())),
+                outputs=tuple(data["contract"].get("outputs", ())),
+                capabilities=tuple(data["contract"].get("capabilities", ())),
             )
         
-        implementations = [
+        implementations = tuple(
             Implementation(
-                id=impl["id"],
-                skill_id=impl["skill_id"],
+                id=sys.intern(impl["id"]),
+                skill_id=sys.intern(impl["skill_id"]),
                 priority=impl.get("priority", 1),
-                conditions=impl.get("conditions", []),
-                fallbacks=impl.get("fallbacks", []),
+                conditions=tuple(impl.get("conditions", ())),
+                fallbacks=tuple(_intern_all(impl.get("fallbacks", ()))),
             )
-            for impl in data.get("implementations", [])
-        ]
+            for impl in data.get("implementations", ())
+        )
         
-        conditions = [
+        conditions = tuple(
             BranchCondition(
                 name=c["name"],
                 expression=c["expression"],
-                target=c["target"],
+                target=sys.intern(c["target"]),
             )
-            for c in data.get("conditions", [])
-        ]
+            for c in data.get("conditions", ())
+        )
         
+        skill_id = data.get("skill_id")
         return GraphNode(
-            id=data["id"],
+            id=sys.intern(data["id"]),
             type=NodeType(data["type"]),
-            skill_id=data.get("skill_id"),
+            skill_id=sys.intern(skill_id) if skill_id else skill_id,
             contract=contract,
             implementations=implementations,
             conditions=conditions,
             prompt=data.get("prompt"),
-            outputs=data.get("outputs", []),
+            outputs=tuple(_intern_all(data.get("outputs", ()))),
         )
     
     @classmethod
     def _edge_from_dict(cls, data: dict) -> GraphEdge:
         """從字典建立邊"""
         return GraphEdge(
-            from_node=data["from"],
-            to_node=data["to"],
+            from_node=sys.intern(data["from"]),
+            to_node=sys.intern(data["to"]),
             type=EdgeType(data.get("type", "sequence")),
             condition=data.get("condition"),
+            max_count=data.get("max_count"),
+            exit_condition=data.get("exit_condition"),
             trigger=data.get("trigger"),
         )
     
@@ -563,3 +810,12 @@ class CapabilityGraph:
             lines.append(f"    {edge.from_node} {arrow}{label} {edge.to_node}")
         
         return "\n".join(lines)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 工具函數
+# ═══════════════════════════════════════════════════════════════════
+
+def _intern_all(values: Sequence[str]) -> list[str]:
+    """駐留一組識別字串（節點 ID、skill ID、變數名稱）"""
+    return [sys.intern(v) for v in values]
@@ -5,6 +5,7 @@ Infrastructure Layer
 
 from .mcp import CapabilityMCPServer, run_mcp_server
 from .prompt import PromptGenerator, PromptInjector, PromptTemplate
+from .skills import InMemorySkillRegistry
 
 __all__ = [
     # MCP
@@ -14,4 +15,6 @@ __all__ = [
     "PromptGenerator",
     "PromptInjector",
     "PromptTemplate",
+    # Skills
+    "InMemorySkillRegistry",
 ]
@@ -40,16 +40,31 @@ class CapabilityMCPServer:
     
     1. execute_capability - 執行能力圖
     2. resolve_abstract_node - 解析抽象節點
-    3. validate_graph - 驗證圖結構
-    4. get_complexity_metrics - 取得複雜度
-    5. list_capabilities - 列出所有能力
-    6. get_capability_status - 取得執行狀態
+    3. resolve_abstract_nodes - 批次解析抽象節點
+    4. validate_graph - 驗證圖結構
+    5. get_complexity_metrics - 取得複雜度
+    6. list_capabilities - 列出所有能力
+    7. get_capability_status - 取得執行狀態
     """
     
-    def __init__(self, capabilities_dir: str = ".claude/capabilities"):
+    def __init__(
+        self,
+        capabilities_dir: str = ".claude/capabilities",
+        skills_dir: str = ".claude/skills",
+    ):
         self.capabilities_dir = capabilities_dir
+        self.skills_dir = skills_dir
         self._running_capabilities: dict[str, Any] = {}
-        
+        self._skill_registry = None
+    
+    @property
+    def skill_registry(self):
+        """技能註冊表（首次使用時載入，之後重用；索引持久化在技能目錄中）"""
+        if self._skill_registry is None:
+            from ..skills import InMemorySkillRegistry
+            self._skill_registry = InMemorySkillRegistry.load(self.skills_dir)
+        return self._skill_registry
+    
     def get_tools(self) -> list[MCPTool]:
         """回傳可用的 MCP Tools"""
         return [
@@ -101,6 +116,25 @@ class CapabilityMCPServer:
                     "required": ["contract"]
                 }
             ),
+            MCPTool(
+                name="resolve_abstract_nodes",
+                description="批次解析抽象節點：同一契約、多個輸入（例如整個目錄的檔案）",
+                input_schema={
+                    "type": "object",
+                    "properties": {
+                        "contract": {
+                            "type": "object",
+                            "description": "節點的契約要求（同 resolve_abstract_node）"
+                        },
+                        "contexts": {
+                            "type": "array",
+                            "items": {"type": "object"},
+                            "description": "每個輸入的上下文（例如 {\"input_file\": \"a.pdf\"}）"
+                        }
+                    },
+                    "required": ["contract", "contexts"]
+                }
+            ),
             MCPTool(
                 name="validate_graph",
                 description="驗證能力圖的結構正確性",
@@ -178,6 +212,7 @@ class CapabilityMCPServer:
         handlers = {
             "execute_capability": self._execute_capability,
             "resolve_abstract_node": self._resolve_abstract_node,
+            "resolve_abstract_nodes": self._resolve_abstract_nodes,
             "validate_graph": self._validate_graph,
             "get_complexity_metrics": self._get_complexity_metrics,
             "list_capabilities": self._list_capabilities,
@@ -195,8 +230,8 @@ class CapabilityMCPServer:
     
     async def _execute_capability(self, args: dict[str, Any]) -> dict[str, Any]:
         """執行能力"""
-        from ..domain.entities import CapabilityGraph
-        from ..application.use_cases import ExecuteCapabilityUseCase
+        from ...domain.entities import CapabilityGraph
+        from ...application.use_cases import ExecuteCapabilityUseCase
         
         capability_id = args["capability_id"]
         inputs = args.get("inputs", {})
@@ -215,12 +250,12 @@ class CapabilityMCPServer:
     
     async def _resolve_abstract_node(self, args: dict[str, Any]) -> dict[str, Any]:
         """解析抽象節點"""
-        from ..application.services import NodeResolverService
+        from ...application.services import NodeResolverService
         
         contract = args["contract"]
         context = args.get("context", {})
         
-        resolver = NodeResolverService()
+        resolver = NodeResolverService(self.skill_registry)
         implementation = await resolver.resolve(contract, context)
         
         return {
@@ -228,10 +263,23 @@ class CapabilityMCPServer:
             "implementation": implementation,
         }
     
+    async def _resolve_abstract_nodes(self, args: dict[str, Any]) -> dict[str, Any]:
+        """批次解析抽象節點"""
+        from ...application.services import NodeResolverService
+        
+        resolver = NodeResolverService(self.skill_registry)
+        implementations = await resolver.resolve_batch(args["contract"], args["contexts"])
+        
+        return {
+            "resolved": True,
+            "count": len(implementations),
+            "implementations": implementations,
+        }
+    
     async def _validate_graph(self, args: dict[str, Any]) -> dict[str, Any]:
         """驗證圖結構"""
-        from ..domain.entities import CapabilityGraph
-        from ..application.services import GraphValidatorService
+        from ...domain.entities import CapabilityGraph
+        from ...application.services import GraphValidatorService
         
         graph_data = args["graph"]
         graph = CapabilityGraph.from_dict(graph_data)
@@ -252,14 +300,9 @@ class CapabilityMCPServer:
         metrics = graph.calculate_complexity()
         
         return {
-            "skill_count": metrics.skill_count,
-            "abstract_count": metrics.abstract_count,
-            "branch_count": metrics.branch_count,
-            "loop_count": metrics.loop_count,
-            "interaction_count": metrics.interaction_count,
-            "max_depth": metrics.max_depth,
-            "total": metrics.total,
-            "level": metrics.level.value,
+            "capability_id": capability_id,
+            "fingerprint": graph.fingerprint,
+            **metrics.to_dict(),
         }
     
     async def _list_capabilities(self, args: dict[str, Any]) -> dict[str, Any]:
@@ -297,12 +340,28 @@ class CapabilityMCPServer:
         return status
     
     async def _load_capability_graph(self, capability_id: str):
-        """載入能力圖"""
+        """
+        載入能力圖
+        
+        優先讀取與 graph.yaml 同步的二進位快照 graph.bin；
+        快照不存在或較舊時解析 YAML，並盡力寫回快照供下次載入。
+        """
         from pathlib import Path
         import yaml
-        from ..domain.entities import CapabilityGraph
+        from ...domain.entities import CapabilityGraph
+        
+        graph_dir = Path(self.capabilities_dir) / capability_id
+        graph_path = graph_dir / "graph.yaml"
+        snapshot_path = graph_dir / "graph.bin"
         
-        graph_path = Path(self.capabilities_dir) / capability_id / "graph.yaml"
+        if snapshot_path.exists() and (
+            not graph_path.exists()
+            or snapshot_path.stat().st_mtime_ns >= graph_path.stat().st_mtime_ns
+        ):
+            try:
+                return CapabilityGraph.from_bytes(snapshot_path.read_bytes())
+            except (OSError, ValueError):
+                pass  # 無法讀取、損毀、版本不符或雜湊狀態不一致，退回 YAML
         
         if not graph_path.exists():
             return None
@@ -310,7 +369,14 @@ class CapabilityMCPServer:
         with open(graph_path) as f:
             data = yaml.safe_load(f)
         
-        return CapabilityGraph.from_dict(data)
+        graph = CapabilityGraph.from_dict(data)
+        try:
+            pending = snapshot_path.with_suffix(".bin.tmp")
+            pending.write_bytes(graph.to_bytes())
+            pending.replace(snapshot_path)  # 原子替換，避免讀到寫一半的快照
+        except (OSError, TypeError):
+            pass  # 唯讀目錄或無法編碼的欄位：僅略過快取
+        return graph
 
 
 # === MCP Server 主程式 ===
@@ -368,7 +434,7 @@ async def run_mcp_server():
                 "result": result,
             }
             print(json.dumps(response), flush=True)
-            
+        
         except json.JSONDecodeError:
             continue
         except Exception as e:
@@ -0,0 +1,11 @@
+"""
+Infrastructure - Skills
+基礎設施層 - 技能註冊表
+"""
+
+from .registry import InMemorySkillRegistry, parse_skill_file
+
+__all__ = [
+    "InMemorySkillRegistry",
+    "parse_skill_file",
+]
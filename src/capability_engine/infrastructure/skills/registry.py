@@ -0,0 +1,262 @@
+"""
+Infrastructure - Skill Registry
+基礎設施層 - 技能註冊表
+
+從 .claude/skills/*/SKILL.md 的 frontmatter 建立記憶體內的反向索引：
+capability -> skills、extension -> skills。
+
+SKILL.md frontmatter 範例：
+    ---
+    name: pdf-reader
+    description: 讀取 PDF 文件
+    capabilities: [read_text, read_pdf]
+    extensions: [.pdf]
+    ---
+
+索引以二進位快照持久化在技能目錄中，啟動時只比對各 SKILL.md 的
+(大小, mtime)，只重新解析有變更的技能，不需重新掃描整個技能樹。
+"""
+
+from __future__ import annotations
+import os
+from pathlib import Path
+from typing import Any, Iterable
+
+import yaml
+
+from ...domain.services.snapshot import decode_snapshot, encode_snapshot
+
+INDEX_FILE = ".skills-index.bin"
+_SNAPSHOT_KIND = "skills"
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class InMemorySkillRegistry:
+    """
+    記憶體內技能註冊表（實作 application.services.SkillRegistry 協議）
+    
+    技能以 dict 表示：id、name、description、capabilities、extensions、path。
+    能力與副檔名一律正規化為小寫（副檔名含開頭的 "."）。
+    """
+    
+    def __init__(self, skills: Iterable[dict[str, Any]] = ()):
+        self._skills: dict[str, dict[str, Any]] = {}
+        self._by_capability: dict[str, list[str]] = {}
+        self._by_extension: dict[str, list[str]] = {}
+        for skill in skills:
+            self.add_skill(skill)
+    
+    # ─────────────────────────────────────────────────────────────
+    # 建立索引
+    # ─────────────────────────────────────────────────────────────
+    
+    def add_skill(self, skill: dict[str, Any]) -> None:
+        """新增或取代技能，並更新反向索引"""
+        skill_id = skill["id"]
+        if skill_id in self._skills:
+            self.remove_skill(skill_id)
+        
+        skill = {
+            **skill,
+            "capabilities": _normalize(skill.get("capabilities", ())),
+            "extensions": [_extension(e) for e in _normalize(skill.get("extensions", ()))],
+        }
+        self._skills[skill_id] = skill
+        for capability in skill["capabilities"]:
+            self._by_capability.setdefault(capability, []).append(skill_id)
+        for extension in skill["extensions"]:
+            self._by_extension.setdefault(extension, []).append(skill_id)
+    
+    def remove_skill(self, skill_id: str) -> None:
+        """移除技能"""
+        skill = self._skills.pop(skill_id, None)
+        if skill is None:
+            return
+        for index, keys in ((self._by_capability, skill["capabilities"]), (self._by_extension, skill["extensions"])):
+            for key in keys:
+                ids = index.get(key, [])
+                if skill_id in ids:
+                    ids.remove(skill_id)
+                if not ids:
+                    index.pop(key, None)
+    
+    # ─────────────────────────────────────────────────────────────
+    # 查詢
+    # ─────────────────────────────────────────────────────────────
+    
+    def get_skill(self, skill_id: str) -> dict[str, Any] | None:
+        """取得技能"""
+        return self._skills.get(skill_id)
+    
+    def find_skills_by_capability(self, capability: str) -> list[dict[str, Any]]:
+        """具備指定能力的技能（依註冊順序）"""
+        return [self._skills[i] for i in self._by_capability.get(capability.strip().lower(), ())]
+    
+    def find_skills_by_extension(self, extension: str) -> list[dict[str, Any]]:
+        """處理指定副檔名的技能（"pdf" 與 ".pdf" 皆可）"""
+        return [self._skills[i] for i in self._by_extension.get(_extension(extension.strip().lower()), ())]
+    
+    def rank_skills(self, capabilities: Iterable[str]) -> list[tuple[dict[str, Any], list[str]]]:
+        """
+        多能力契約的候選技能，依涵蓋的能力數排序
+        
+        只走訪契約能力的反向索引（不掃描所有技能）；同涵蓋數時，
+        依最早涵蓋的契約能力、再依該能力下的註冊順序排序。
+        
+        Returns:
+            [(技能, 涵蓋的契約能力)]，涵蓋全部契約能力者即為交集
+        """
+        coverage: dict[str, list] = {}  # skill_id -> [涵蓋的能力, 最早能力序, 註冊序]
+        for order, capability in enumerate(dict.fromkeys(capabilities)):
+            for rank, skill_id in enumerate(self._by_capability.get(capability.strip().lower(), ())):
+                entry = coverage.setdefault(skill_id, [[], order, rank])
+                entry[0].append(capability)
+        
+        ranked = sorted(coverage.items(), key=lambda item: (-len(item[1][0]), item[1][1], item[1][2]))
+        return [(self._skills[skill_id], entry[0]) for skill_id, entry in ranked]
+    
+    def capabilities(self) -> list[str]:
+        """所有已知能力"""
+        return list(self._by_capability)
+    
+    def __len__(self) -> int:
+        return len(self._skills)
+    
+    def __contains__(self, skill_id: object) -> bool:
+        return skill_id in self._skills
+    
+    # ─────────────────────────────────────────────────────────────
+    # 載入與持久化
+    # ─────────────────────────────────────────────────────────────
+    
+    @classmethod
+    def load(cls, skills_dir: str | os.PathLike = ".claude/skills", persist: bool = True) -> "InMemorySkillRegistry":
+        """
+        從技能目錄載入
+        
+        先讀取持久化的索引，只重新解析 (大小, mtime) 有變更的 SKILL.md；
+        persist 為 True 且有變更時寫回索引（寫入失敗只略過）。
+        """
+        root = Path(skills_dir)
+        index_path = root / INDEX_FILE
+        cached_skills, cached_files = _read_index(index_path)
+        
+        skills: list[dict[str, Any]] = []
+        files: dict[str, list[int]] = {}
+        changed = False
+        for skill_file in _skill_files(root):
+            skill_id = skill_file.parent.name
+            try:
+                stat = skill_file.stat()
+            except OSError:
+                continue
+            signature = [stat.st_size, stat.st_mtime_ns]
+            files[skill_id] = signature
+            
+            if cached_files.get(skill_id) == signature:
+                if skill_id in cached_skills:  # 未收錄者為上次解析失敗的檔案
+                    skills.append(cached_skills[skill_id])
+                continue
+            
+            changed = True
+            skill = parse_skill_file(skill_file)
+            if skill is not None:
+                skills.append(skill)
+        
+        changed = changed or files.keys() != cached_files.keys()
+        registry = cls(skills)
+        if persist and changed:
+            registry._write_index(index_path, files)
+        return registry
+    
+    def _write_index(self, index_path: Path, files: dict[str, list[int]]) -> None:
+        data = {
+            "skills": [_persistable(skill) for skill in self._skills.values()],
+            "files": files,
+        }
+        try:
+            pending = index_path.with_suffix(".tmp")
+            pending.write_bytes(encode_snapshot(data, _SNAPSHOT_KIND))
+            pending.replace(index_path)  # 原子替換
+        except (OSError, TypeError):
+            pass  # 唯讀目錄或無法編碼的欄位：僅略過持久化
+
+
+def parse_skill_file(path: str | os.PathLike) -> dict[str, Any] | None:
+    """
+    解析 SKILL.md 的 frontmatter
+    
+    技能 ID 取自目錄名稱；沒有 frontmatter 或格式錯誤時回傳 None。
+    """
+    path = Path(path)
+    try:
+        text = path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+    
+    if not text.startswith("---"):
+        return None
+    end = text.find("\n---", 3)
+    if end < 0:
+        return None
+    try:
+        meta = yaml.load(text[3:end], Loader=_YAML_LOADER) or {}
+    except yaml.YAMLError:
+        return None
+    if not isinstance(meta, dict):
+        return None
+    
+    return {
+        "id": path.parent.name,
+        "name": str(meta.get("name", path.parent.name)),
+        "description": str(meta.get("description", "")),
+        "capabilities": _as_list(meta.get("capabilities")),
+        "extensions": _as_list(meta.get("extensions")),
+        "path": str(path),
+    }
+
+
+def _skill_files(root: Path) -> list[Path]:
+    if not root.is_dir():
+        return []
+    return sorted(
+        entry / "SKILL.md"
+        for entry in root.iterdir()
+        if entry.is_dir() and (entry / "SKILL.md").is_file()
+    )
+
+
+def _read_index(index_path: Path) -> tuple[dict[str, dict[str, Any]], dict[str, list[int]]]:
+    try:
+        data = decode_snapshot(index_path.read_bytes(), _SNAPSHOT_KIND)
+        skills = {skill["id"]: skill for skill in data["skills"]}
+        files = dict(data["files"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}, {}
+    return skills, files
+
+
+def _persistable(skill: dict[str, Any]) -> dict[str, Any]:
+    return {
+        key: skill.get(key, default)
+        for key, default in (
+            ("id", ""), ("name", ""), ("description", ""),
+            ("capabilities", []), ("extensions", []), ("path", ""),
+        )
+    }
+
+
+def _as_list(value: Any) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(",") if part.strip()]
+    return [str(item) for item in value]
+
+
+def _normalize(values: Iterable[str]) -> list[str]:
+    return [value.strip().lower() for value in values if value and value.strip()]
+
+
+def _extension(value: str) -> str:
+    return value if value.startswith(".") else f".{value}"
@@ -5,12 +5,25 @@ Node Resolver - 節點解析器
 
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import Any, Callable, Protocol
-import re
+from typing import (
+    Any, BinaryIO, Callable, Collection, Iterable, Iterator, Mapping, Protocol, Sequence, Union,
+)
+from concurrent.futures import ThreadPoolExecutor
 import fnmatch
+import mmap
+import os
+import random
+import struct
 
 from .graph import GraphNode, NodeType, Implementation
+from .domain.services.cache import LRUCache
+from .domain.services.expression import ExpressionError, expression_cache, get_expression
+from .domain.services.statistics import CostModel, SkillStatsStore
+
+
+InputSource = Union[str, os.PathLike, BinaryIO]
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -25,6 +38,7 @@ class ResolutionContext:
     input_type: str | None = None      # MIME type 或檔案類型
     input_path: str | None = None      # 檔案路徑或 URL
     input_content: bytes | None = None # 原始內容（用於檢測）
+    input_file: InputSource | None = None  # 檔案路徑或檔案物件（只讀取標頭檢測）
     
     # 用戶偏好
     user_preference: str | None = None
@@ -84,38 +98,393 @@ class ConditionMatcher:
     
     @staticmethod
     def _evaluate_expression(expression: str, context: ResolutionContext) -> bool:
-        """評估簡單表達式"""
-        # 建立安全的評估環境
-        safe_vars = {
-            "input_type": context.input_type,
-            "input_path": context.input_path,
-            "user_preference": context.user_preference,
-            "last_error": context.last_error,
-            **context.variables,
-        }
-        
-        # 替換變數
-        result_expr = expression
-        for key, value in safe_vars.items():
-            pattern = rf'\b{key}\b'
-            if value is None:
-                replacement = "None"
-            elif isinstance(value, str):
-                replacement = f"'{value}'"
+        """評估簡單表達式（編譯一次後快取，直接從上下文讀取變數）"""
+        try:
+            predicate = get_expression(expression)
+        except ExpressionError:
+            return False
+        return predicate.test(_ResolutionScope(context))
+    
+    @staticmethod
+    def cache_stats() -> dict[str, int]:
+        """表達式快取的命中統計"""
+        return expression_cache.stats()
+
+
+class _ResolutionScope(Mapping[str, Any]):
+    """解析上下文的唯讀變數視圖（context.variables 優先，不複製）"""
+    
+    __slots__ = ("_context",)
+    
+    _FIELDS = ("input_type", "input_path", "user_preference", "last_error")
+    
+    def __init__(self, context: ResolutionContext):
+        self._context = context
+    
+    def __getitem__(self, key: str) -> Any:
+        variables = self._context.variables
+        if key in variables:
+            return variables[key]
+        if key in self._FIELDS:
+            return getattr(self._context, key)
+        raise KeyError(key)
+    
+    def __iter__(self):
+        yield from self._context.variables
+        for key in self._FIELDS:
+            if key not in self._context.variables:
+                yield key
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 決策索引
+# ═══════════════════════════════════════════════════════════════════
+
+_GLOB_CHARS = frozenset("*?[")
+_UNSET = object()
+_PATH_SEPARATORS = ("/", "\\")
+
+
+def _has_glob(text: str) -> bool:
+    return not _GLOB_CHARS.isdisjoint(text)
+
+
+def _last_segment(path: str) -> str:
+    for separator in _PATH_SEPARATORS:
+        path = path.rpartition(separator)[2]
+    return path
+
+
+def _extension_keys(path: str):
+    """路徑最後一段中每個 "." 之後的後綴（"a.tar.gz" -> "tar.gz", "gz"）"""
+    segment = _last_segment(path)
+    dot = segment.find(".")
+    while dot >= 0:
+        yield segment[dot + 1:]
+        dot = segment.find(".", dot + 1)
+
+
+class _PrefixTrie:
+    """逐字元前綴樹：找出所有為輸入字串前綴的鍵所對應的值"""
+    
+    __slots__ = ("_root",)
+    
+    _END = ""  # 子節點鍵皆為單一字元，空字串不會衝突
+    
+    def __init__(self):
+        self._root: dict[str, Any] = {}
+    
+    def insert(self, prefix: str, position: int) -> None:
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node.setdefault(self._END, []).append(position)
+    
+    def matches(self, text: str):
+        """依前綴長度由短到長產出位置"""
+        node = self._root
+        yield from node.get(self._END, ())
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                return
+            yield from node.get(self._END, ())
+
+
+class _GeneralConditions:
+    """
+    非路徑條件：表達式、MIME 精確對應、MIME 萬用字元分桶、其餘 glob
+    
+    對應 ConditionMatcher.match 在路徑規則不適用後的判斷順序。
+    """
+    
+    __slots__ = ("expressions", "mime_exact", "mime_major", "mime_globs")
+    
+    def __init__(self):
+        self.expressions: list[tuple[str, int]] = []
+        self.mime_exact: dict[str, list[int]] = {}
+        self.mime_major: dict[str, list[int]] = {}
+        self.mime_globs: list[tuple[str, int]] = []
+    
+    def add(self, condition: str, position: int) -> None:
+        if "==" in condition or "!=" in condition:
+            self.expressions.append((condition, position))
+        elif "/" in condition:
+            major, _, minor = condition.partition("/")
+            if not _has_glob(condition):
+                self.mime_exact.setdefault(os.path.normcase(condition), []).append(position)
+            elif minor == "*" and not _has_glob(major):
+                self.mime_major.setdefault(os.path.normcase(major), []).append(position)
             else:
-                replacement = str(value)
-            result_expr = re.sub(pattern, replacement, result_expr)
+                self.mime_globs.append((condition, position))
+        # 其餘條件在 ConditionMatcher 中恆為 False
+    
+    def __bool__(self) -> bool:
+        return bool(self.expressions or self.mime_exact or self.mime_major or self.mime_globs)
+    
+    @property
+    def has_mime(self) -> bool:
+        return bool(self.mime_exact or self.mime_major or self.mime_globs)
+
+
+class DecisionIndex:
+    """
+    抽象節點的實現決策索引（編譯一次，重複使用）
+    
+    實現在建立時依優先級穩定排序，各條件依類型分入：
+    - 副檔名雜湊表（"*.pdf"）
+    - URL 前綴樹（"https://..."）
+    - MIME 精確對應與主類型分桶（"text/html"、"image/*"）
+    - 其餘 glob 與表達式條件（依優先級順序逐一評估，超過目前最佳者即停止）
+    
+    select 的結果與依序對每個實現呼叫 ConditionMatcher.match 完全相同。
+    """
+    
+    __slots__ = (
+        "implementations", "skill_ids", "expression_names", "_always", "_always_set", "_extensions",
+        "_path_globs", "_url_prefixes", "_pathless", "_general",
+    )
+    
+    def __init__(self, implementations: Sequence[Implementation]):
+        self.implementations: tuple[Implementation, ...] = tuple(
+            sorted(implementations, key=lambda impl: impl.priority)
+        )
+        self._always: list[int] = []
+        self._extensions: dict[str, list[int]] = {}
+        self._path_globs: list[tuple[str, int]] = []
+        self._url_prefixes = _PrefixTrie()
+        self._pathless = _GeneralConditions()  # 路徑規則在沒有 input_path 時的退路
+        self._general = _GeneralConditions()
+        
+        for position, impl in enumerate(self.implementations):
+            if not impl.conditions:
+                self._always.append(position)
+            for raw in impl.conditions:
+                self._add_condition(raw.strip(), position)
+        
+        self._always_set = frozenset(self._always)
+        self.skill_ids = frozenset(impl.skill_id for impl in self.implementations)
+        names: set[str] = set()
+        for expression, _ in self._pathless.expressions + self._general.expressions:
+            try:
+                names |= get_expression(expression).names
+            except ExpressionError:
+                pass
+        self.expression_names: tuple[str, ...] = tuple(sorted(names))
+    
+    def _add_condition(self, condition: str, position: int) -> None:
+        if condition == "default":
+            self._always.append(position)
+        elif condition.startswith("*."):
+            pattern = condition.lower()
+            extension = pattern[2:]
+            if _has_glob(extension) or any(sep in extension for sep in _PATH_SEPARATORS):
+                self._path_globs.append((pattern, position))
+            else:
+                self._extensions.setdefault(extension, []).append(position)
+            self._pathless.add(condition, position)
+        elif condition.startswith("http"):
+            self._url_prefixes.insert(condition.rstrip("*"), position)
+            self._pathless.add(condition, position)
+        else:
+            self._general.add(condition, position)
+    
+    def select(self, context: ResolutionContext) -> Implementation | None:
+        """選出優先級最高、未嘗試過且條件匹配的實現；皆不匹配時回傳優先級最高者"""
+        position = self.select_position(context)
+        return self.implementations[position] if position is not None else None
+    
+    def select_position(self, context: ResolutionContext) -> int | None:
+        """select 結果在 implementations 中的位置"""
+        implementations = self.implementations
+        excluded = frozenset(context.previous_attempts)
+        best = len(implementations)
+        
+        def allowed(position: int) -> bool:
+            return implementations[position].skill_id not in excluded
+        
+        def offer(positions) -> None:
+            nonlocal best
+            for position in positions:
+                if position >= best:
+                    return
+                if allowed(position):
+                    best = position
+                    return
+        
+        offer(self._always)
+        
+        path = context.input_path
+        if path:
+            lowered = path.lower()
+            for extension in _extension_keys(lowered):
+                offer(self._extensions.get(extension, ()))
+            for pattern, position in self._path_globs:
+                if position < best and allowed(position) and fnmatch.fnmatch(lowered, pattern):
+                    best = position
+            for position in self._url_prefixes.matches(path):
+                if position < best and allowed(position):
+                    best = position
+        elif self._pathless:
+            best = self._select_general(self._pathless, context, best, allowed)
         
-        # 安全評估
+        if self._general:
+            best = self._select_general(self._general, context, best, allowed)
+        
+        if best < len(implementations):
+            return best
+        return self._first_allowed_position(excluded)
+    
+    def candidates(self, context: ResolutionContext) -> tuple[int, ...]:
+        """
+        所有未嘗試過且條件匹配的實現位置（依優先級排序），供統計排序使用
+        
+        只靠 default／無條件匹配的通用實現不與具體匹配競爭：
+        只有它本來就是 select 的結果、或沒有具體匹配時才列入。
+        第一個元素恆為 select 的結果。
+        """
+        implementations = self.implementations
+        excluded = frozenset(context.previous_attempts)
+        matched: set[int] = set(self._always)
+        
+        path = context.input_path
+        if path:
+            lowered = path.lower()
+            for extension in _extension_keys(lowered):
+                matched.update(self._extensions.get(extension, ()))
+            matched.update(
+                position for pattern, position in self._path_globs
+                if fnmatch.fnmatch(lowered, pattern)
+            )
+            matched.update(self._url_prefixes.matches(path))
+        else:
+            self._collect_general(self._pathless, context, matched)
+        self._collect_general(self._general, context, matched)
+        
+        allowed = sorted(p for p in matched if implementations[p].skill_id not in excluded)
+        if not allowed:
+            first = self._first_allowed_position(excluded)
+            return () if first is None else (first,)
+        
+        fallbacks = self._always_set
+        specific = [p for p in allowed if p not in fallbacks]
+        if not specific:
+            return tuple(allowed)
+        if allowed[0] in fallbacks:
+            return (allowed[0], *specific)
+        return tuple(specific)
+    
+    def allowed_positions(self, excluded: Collection[str]) -> tuple[int, ...]:
+        """所有未嘗試過的實現位置（依優先級排序）"""
+        return tuple(
+            position for position, impl in enumerate(self.implementations)
+            if impl.skill_id not in excluded
+        )
+    
+    @property
+    def uses_input_type(self) -> bool:
+        """選擇結果是否可能受 input_type 影響（否則批次解析可略過內容檢測）"""
+        return (
+            self._general.has_mime
+            or self._pathless.has_mime
+            or "input_type" in self.expression_names
+        )
+    
+    def signature(self, context: ResolutionContext) -> tuple | None:
+        """
+        決定 select 結果的輸入特徵（可作為快取鍵）
+        
+        路徑只保留索引實際會用到的部分（命中的副檔名與 URL 前綴），
+        已嘗試清單只保留本節點的技能，另加上表達式引用的變數值。
+        變數值無法雜湊時回傳 None（不快取）。
+        """
+        scope = _ResolutionScope(context)
+        values = tuple(scope.get(name, _UNSET) for name in self.expression_names)
         try:
-            # 只允許比較操作
-            allowed_ops = {"==", "!=", "in", "not", "and", "or", "True", "False", "None"}
-            tokens = re.findall(r"[a-zA-Z_]+|'[^']*'|\"[^\"]*\"", result_expr)
-            
-            # 簡化版本：直接 eval（生產環境應使用 ast.literal_eval 或自定義解析器）
-            return eval(result_expr)
-        except Exception:
-            return False
+            hash(values)
+        except TypeError:
+            return None
+        return (
+            context.input_type,
+            self._path_signature(context.input_path),
+            frozenset(skill for skill in context.previous_attempts if skill in self.skill_ids),
+            values,
+        )
+    
+    def _path_signature(self, path: str | None) -> Any:
+        if not path:
+            return None
+        if self._path_globs:
+            return path  # 一般 glob 需要完整路徑
+        return (
+            tuple(key for key in _extension_keys(path.lower()) if key in self._extensions),
+            tuple(self._url_prefixes.matches(path)),
+        )
+    
+    def first_allowed(self, excluded: Collection[str]) -> Implementation | None:
+        """優先級最高且未嘗試過的實現"""
+        position = self._first_allowed_position(excluded)
+        return self.implementations[position] if position is not None else None
+    
+    def _first_allowed_position(self, excluded: Collection[str]) -> int | None:
+        for position, impl in enumerate(self.implementations):
+            if impl.skill_id not in excluded:
+                return position
+        return None
+    
+    @staticmethod
+    def _select_general(
+        conditions: _GeneralConditions,
+        context: ResolutionContext,
+        best: int,
+        allowed: Callable[[int], bool],
+    ) -> int:
+        input_type = context.input_type
+        if input_type:
+            normalized = os.path.normcase(input_type)
+            candidates = list(conditions.mime_exact.get(normalized, ()))
+            major, slash, _ = normalized.partition("/")
+            if slash:
+                candidates.extend(conditions.mime_major.get(major, ()))
+            for position in candidates:
+                if position < best and allowed(position):
+                    best = position
+            for pattern, position in conditions.mime_globs:
+                if position < best and allowed(position) and fnmatch.fnmatch(input_type, pattern):
+                    best = position
+        
+        # 表達式依優先級順序評估，無法勝過目前最佳者即停止
+        for expression, position in sorted(conditions.expressions, key=lambda e: e[1]):
+            if position >= best:
+                break
+            if allowed(position) and ConditionMatcher._evaluate_expression(expression, context):
+                best = position
+        return best
+    
+    @staticmethod
+    def _collect_general(
+        conditions: _GeneralConditions,
+        context: ResolutionContext,
+        matched: set[int],
+    ) -> None:
+        input_type = context.input_type
+        if input_type:
+            normalized = os.path.normcase(input_type)
+            matched.update(conditions.mime_exact.get(normalized, ()))
+            major, slash, _ = normalized.partition("/")
+            if slash:
+                matched.update(conditions.mime_major.get(major, ()))
+            matched.update(
+                position for pattern, position in conditions.mime_globs
+                if fnmatch.fnmatch(input_type, pattern)
+            )
+        
+        for expression, position in conditions.expressions:
+            if position not in matched and ConditionMatcher._evaluate_expression(expression, context):
+                matched.add(position)
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -140,11 +509,36 @@ class AbstractNodeResolver(NodeResolver):
     """
     抽象節點解析器
     根據上下文選擇最佳實現
+    
+    提供 skill_stats 時，條件匹配（或 priority 策略下所有未嘗試）的候選實現
+    依預期成功成本排序（靜態優先級為先驗），並以 exploration_rate 的機率
+    改選其他候選以持續收集統計。
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        index_cache_size: int = 256,
+        resolution_cache_size: int = 1024,
+        skill_stats: SkillStatsStore | None = None,
+        cost_model: CostModel | None = None,
+        exploration_rate: float = 0.0,
+        rng: random.Random | None = None,
+    ):
         self.matcher = ConditionMatcher()
+        self.skill_stats = skill_stats
+        self.cost_model = cost_model or CostModel()
+        self.exploration_rate = exploration_rate
+        self._rng = rng or random.Random()
         self._type_detectors: dict[str, Callable[[bytes], bool]] = {}
+        # id(node) -> (node, 編譯時的實現, DecisionIndex)
+        self._indexes: LRUCache[int, tuple[GraphNode, tuple[Implementation, ...], DecisionIndex]] = (
+            LRUCache(maxsize=index_cache_size)
+        )
+        # (圖指紋, 節點 ID, 解析策略, 輸入特徵, 用戶偏好) -> 候選實現在索引中的位置
+        self._resolutions: LRUCache[tuple, tuple[int, ...]] = LRUCache(maxsize=resolution_cache_size)
+        self._availability: dict[str, bool] = {}
+        # (路徑, 大小, mtime_ns) -> 檢測到的類型
+        self._sniffed: LRUCache[tuple[str, int, int], str | None] = LRUCache(maxsize=4096)
         self._register_default_detectors()
     
     def _register_default_detectors(self):
@@ -163,8 +557,13 @@ class AbstractNodeResolver(NodeResolver):
         )
     
     def register_type_detector(self, mime_type: str, detector: Callable[[bytes], bool]):
-        """註冊類型檢測器"""
+        """
+        註冊類型檢測器
+        
+        檢測器收到的是內容開頭（檔案來源最多 HEADER_SIZE 位元組）。
+        """
         self._type_detectors[mime_type] = detector
+        self._sniffed.clear()
     
     def can_resolve(self, node: GraphNode) -> bool:
         """是否能解析此節點"""
@@ -178,25 +577,254 @@ class AbstractNodeResolver(NodeResolver):
         1. auto_detect: 自動根據條件選擇
         2. user_select: 讓用戶選擇
         3. priority: 按優先級選擇
+        4. hedge: 與 auto_detect 相同；執行引擎另以 rank_memoized 取得備援候選
         """
         if not self.can_resolve(node):
             return None
         
-        # 自動檢測輸入類型
-        if context.input_content and not context.input_type:
-            context.input_type = self._detect_type(context.input_content)
-        
+        self._ensure_input_type(context)
+        index = self.decision_index(node)
+        return self._choose(index, self._candidates(node, index, context))
+    
+    def _candidates(
+        self, node: GraphNode, index: DecisionIndex, context: ResolutionContext
+    ) -> tuple[int, ...]:
+        """依策略取得候選實現的位置（未啟用統計排序時只取第一個）"""
         strategy = node.resolution_strategy
         
         if strategy == "priority":
-            return self._resolve_by_priority(node, context)
+            return self._resolve_by_priority(index, context)
         elif strategy == "user_select":
-            return self._resolve_by_user(node, context)
+            return self._resolve_by_user(node, index, context)
+        elif strategy == "hedge":
+            return index.candidates(context)  # 對沖執行需要所有匹配的候選
         else:  # auto_detect
-            return self._resolve_by_condition(node, context)
+            return self._resolve_by_condition(index, context)
+    
+    def _choose(self, index: DecisionIndex, positions: tuple[int, ...]) -> Implementation | None:
+        """從候選中選出實現：預期成功成本最低者，或以 exploration_rate 探索其他候選"""
+        if not positions:
+            return None
+        ranked = self._rank(index, positions)
+        choice = ranked[0]
+        if (
+            len(ranked) > 1
+            and self.skill_stats is not None
+            and self.exploration_rate > 0
+            and self._rng.random() < self.exploration_rate
+        ):
+            choice = self._rng.choice(ranked[1:])
+        return index.implementations[choice]
+    
+    def _rank(self, index: DecisionIndex, positions: tuple[int, ...]) -> list[int]:
+        """候選位置依預期成功成本排序（未啟用統計時維持優先級順序）"""
+        if len(positions) <= 1 or self.skill_stats is None:
+            return list(positions)
+        order = self.cost_model.rank(
+            [index.implementations[p].skill_id for p in positions], self.skill_stats
+        )
+        return [positions[i] for i in order]
+    
+    def resolve_batch(
+        self,
+        node: GraphNode,
+        inputs: Iterable[str | os.PathLike | ResolutionContext],
+        max_workers: int | None = None,
+    ) -> list[Implementation | None]:
+        """
+        批次解析同一抽象節點的大量輸入
+        
+        路徑輸入視為 ResolutionContext(input_path=路徑, input_file=路徑)（URL 不讀取內容）。
+        需要檢測類型的輸入在執行緒池中並行讀取標頭（節點條件與 input_type 無關時略過），
+        再依輸入特徵分組，每組只做一次選擇。
+        
+        Returns:
+            與 inputs 順序相同、每個輸入一個實現；結果與逐一呼叫 resolve 相同
+        """
+        items = list(inputs)
+        if not self.can_resolve(node):
+            return [None] * len(items)
+        
+        index = self.decision_index(node)
+        # 類型不影響結果時，由路徑建立的上下文不需讀取檔案
+        sniff_paths = (
+            node.resolution_strategy not in ("priority", "user_select") and index.uses_input_type
+        )
+        contexts = [self._batch_context(item, sniff_paths) for item in items]
+        pending = [
+            context for context in contexts
+            if not context.input_type and (context.input_content or context.input_file is not None)
+        ]
+        if len(pending) > 1:
+            # 分塊提交，避免每個輸入一個 future 的排程成本
+            workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+            size = -(-len(pending) // (workers * 4))
+            chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(self._detect_contexts, chunks))
+        else:
+            self._detect_contexts(pending)
+        
+        groups: dict[tuple, tuple[int, ...]] = {}
+        results: list[Implementation | None] = []
+        for context in contexts:
+            signature = index.signature(context)
+            if signature is None:
+                results.append(self.resolve(node, context))
+                continue
+            key = (signature, context.user_preference)
+            positions = groups.get(key)
+            if positions is None:
+                self._ensure_input_type(context)
+                positions = groups[key] = self._candidates(node, index, context)
+            results.append(self._choose(index, positions))
+        return results
+    
+    def _detect_contexts(self, contexts: list[ResolutionContext]) -> None:
+        for context in contexts:
+            self._ensure_input_type(context)
+    
+    @staticmethod
+    def _batch_context(
+        item: str | os.PathLike | ResolutionContext, sniff: bool
+    ) -> ResolutionContext:
+        if isinstance(item, ResolutionContext):
+            return item
+        path = os.fspath(item)
+        return ResolutionContext(
+            input_path=path,
+            input_file=path if sniff and "://" not in path else None,
+        )
+    
+    def resolve_memoized(
+        self, node: GraphNode, context: ResolutionContext, fingerprint: str
+    ) -> tuple[Implementation | None, bool]:
+        """
+        以輸入特徵快取的解析（供迴圈中重複解析同一節點）
+        
+        Args:
+            fingerprint: 節點所屬圖的內容指紋（空字串時不快取）
+        
+        Returns:
+            (實現, 是否命中快取)
+        """
+        if not self.can_resolve(node):
+            return None, False
+        
+        index, positions, hit = self._memoized_candidates(node, context, fingerprint)
+        return self._choose(index, positions), hit
+    
+    def rank_memoized(
+        self, node: GraphNode, context: ResolutionContext, fingerprint: str
+    ) -> tuple[list[Implementation], bool]:
+        """
+        與 resolve_memoized 相同，但返回依排序的所有候選（供對沖執行）
+        
+        Returns:
+            (候選實現，第一個即 resolve 的選擇（不含探索）, 是否命中快取)
+        """
+        if not self.can_resolve(node):
+            return [], False
+        
+        index, positions, hit = self._memoized_candidates(node, context, fingerprint)
+        return [index.implementations[p] for p in self._rank(index, positions)], hit
+    
+    def rank_fallbacks(self, node: GraphNode, excluded: Collection[str] = ()) -> list[Implementation]:
+        """
+        所有未排除的實現，依預期成功成本排序（未啟用統計時依優先級）
+        
+        不考慮條件，供 Fallback 鏈切換實現時使用。
+        """
+        if not self.can_resolve(node):
+            return []
+        index = self.decision_index(node)
+        return [index.implementations[p] for p in self._rank(index, index.allowed_positions(excluded))]
+    
+    def _memoized_candidates(
+        self, node: GraphNode, context: ResolutionContext, fingerprint: str
+    ) -> tuple[DecisionIndex, tuple[int, ...], bool]:
+        self._ensure_input_type(context)
+        self._observe_availability(node, context.available_skills)
+        
+        index = self.decision_index(node)
+        signature = index.signature(context) if fingerprint else None
+        if signature is None:
+            return index, self._candidates(node, index, context), False
+        
+        # 以索引本身為鍵：實現列表替換後索引重建，舊位置不會套用到新索引
+        key = (fingerprint, index, node.resolution_strategy, signature, context.user_preference)
+        positions = self._resolutions.get(key)
+        if positions is not None:
+            return index, positions, True
+        
+        # 快取候選而非最終選擇：統計排序在每次取用時依最新統計進行
+        positions = self._candidates(node, index, context)
+        self._resolutions.put(key, positions)
+        return index, positions, False
+    
+    def _observe_availability(self, node: GraphNode, available_skills: Collection[str]) -> None:
+        """技能可用性改變時清除解析快取（空清單表示未提供可用性資訊）"""
+        if not available_skills:
+            return
+        available = set(available_skills)
+        changed = False
+        for impl in node.implementations:
+            now = impl.skill_id in available
+            if self._availability.setdefault(impl.skill_id, now) != now:
+                self._availability[impl.skill_id] = now
+                changed = True
+        if changed:
+            self._resolutions.clear()
+    
+    def invalidate_resolutions(self) -> None:
+        """清除解析結果快取（例如技能安裝/移除後）"""
+        self._resolutions.clear()
+    
+    def resolution_stats(self) -> dict[str, int]:
+        """解析結果快取的命中統計"""
+        return self._resolutions.stats()
+    
+    def _ensure_input_type(self, context: ResolutionContext) -> None:
+        """自動檢測輸入類型（已指定 input_type 時不檢測）"""
+        if context.input_type:
+            return
+        if context.input_content:
+            context.input_type = self._detect_type(context.input_content)
+        elif context.input_file is not None:
+            context.input_type = self._detect_file(context.input_file)
+    
+    def _detect_file(self, source: InputSource) -> str | None:
+        """
+        從檔案來源檢測類型（只讀取標頭）
+        
+        路徑來源的結果以 (路徑, 大小, mtime) 快取，檔案未變更時不再讀取磁碟。
+        """
+        key = file_signature(source)
+        if key is None:
+            return self._detect_source(source)
+        
+        detected = self._sniffed.get(key, _UNSET)
+        if detected is _UNSET:
+            detected = self._detect_source(source)
+            self._sniffed.put(key, detected)
+        return detected
+    
+    def _detect_source(self, source: InputSource) -> str | None:
+        header = read_header(source)
+        if header[:4] == ZIP_MAGIC:
+            # ZIP 容器：只讀取中央目錄判斷 OOXML 類型
+            container = TypeDetector.zip_container_type(source)
+            if container:
+                return container
+        return self._detect_type(header)
     
     def _detect_type(self, content: bytes) -> str | None:
-        """檢測內容類型"""
+        """檢測內容類型（ZIP 容器先以中央目錄判斷 OOXML 類型）"""
+        if content[:4] == ZIP_MAGIC:
+            container = TypeDetector.zip_container_type(content)
+            if container:
+                return container
+        
         for mime_type, detector in self._type_detectors.items():
             try:
                 if detector(content):
@@ -205,54 +833,65 @@ class AbstractNodeResolver(NodeResolver):
                 continue
         return None
     
-    def _resolve_by_condition(
-        self, node: GraphNode, context: ResolutionContext
-    ) -> Implementation | None:
-        """根據條件自動選擇"""
-        # 排除已嘗試過的實現
-        candidates = [
-            impl for impl in node.implementations
-            if impl.skill_id not in context.previous_attempts
-        ]
-        
-        # 按優先級排序
-        candidates.sort(key=lambda x: x.priority)
+    def decision_index(self, node: GraphNode) -> DecisionIndex:
+        """
+        取得節點的決策索引（快取）
         
-        # 找第一個匹配的
-        for impl in candidates:
-            if self._match_implementation(impl, context):
-                return impl
+        實現列表被替換或增減時自動重建；就地修改實現的條件後需呼叫 invalidate。
+        """
+        key = id(node)
+        implementations = tuple(node.implementations)
+        entry = self._indexes.get(key)
+        if entry is not None:
+            cached_node, cached_impls, index = entry
+            if cached_node is node and len(cached_impls) == len(implementations) and all(
+                a is b for a, b in zip(cached_impls, implementations)
+            ):
+                return index
         
-        # 沒有匹配的，返回優先級最高的
-        return candidates[0] if candidates else None
+        index = DecisionIndex(implementations)
+        self._indexes.put(key, (node, implementations, index))
+        return index
+    
+    def invalidate(self, node: GraphNode | None = None) -> None:
+        """清除決策索引快取（node 為 None 時全部清除），並清除解析結果快取"""
+        if node is None:
+            self._indexes.clear()
+        else:
+            self._indexes.invalidate(id(node))
+        self._resolutions.clear()
+    
+    def _resolve_by_condition(
+        self, index: DecisionIndex, context: ResolutionContext
+    ) -> tuple[int, ...]:
+        """根據條件自動選擇（經由決策索引，不逐一比對所有實現）"""
+        if self.skill_stats is not None:
+            return index.candidates(context)
+        position = index.select_position(context)
+        return () if position is None else (position,)
     
     def _resolve_by_priority(
-        self, node: GraphNode, context: ResolutionContext
-    ) -> Implementation | None:
+        self, index: DecisionIndex, context: ResolutionContext
+    ) -> tuple[int, ...]:
         """按優先級選擇"""
-        candidates = [
-            impl for impl in node.implementations
-            if impl.skill_id not in context.previous_attempts
-        ]
-        
-        if not candidates:
-            return None
-        
-        candidates.sort(key=lambda x: x.priority)
-        return candidates[0]
+        positions = index.allowed_positions(context.previous_attempts)
+        return positions if self.skill_stats is not None else positions[:1]
     
     def _resolve_by_user(
-        self, node: GraphNode, context: ResolutionContext
-    ) -> Implementation | None:
-        """讓用戶選擇（返回 None 表示需要互動）"""
+        self, node: GraphNode, index: DecisionIndex, context: ResolutionContext
+    ) -> tuple[int, ...]:
+        """讓用戶選擇（返回空候選表示需要互動）"""
         # 如果用戶已經指定偏好
         if context.user_preference:
             for impl in node.implementations:
                 if impl.id == context.user_preference:
-                    return impl
+                    return next(
+                        ((p,) for p, candidate in enumerate(index.implementations) if candidate is impl),
+                        (),
+                    )
         
         # 需要用戶選擇
-        return None
+        return ()
     
     def _match_implementation(
         self, impl: Implementation, context: ResolutionContext
@@ -280,6 +919,216 @@ class AbstractNodeResolver(NodeResolver):
         ]
 
 
+# ═══════════════════════════════════════════════════════════════════
+# 內容探測
+# ═══════════════════════════════════════════════════════════════════
+
+HEADER_SIZE = 8192  # 標頭檢測讀取的上限
+
+
+def _is_file_object(source: Any) -> bool:
+    return hasattr(source, "read")
+
+
+def file_signature(source: Any) -> tuple[str, int, int] | None:
+    """
+    路徑來源的 (路徑, 大小, mtime_ns)，可作為檢測結果的快取鍵
+    
+    檔案物件、位元組或無法 stat 的路徑回傳 None。
+    """
+    if _is_file_object(source) or isinstance(source, (bytes, bytearray, memoryview)):
+        return None
+    path = os.fspath(source)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return path, stat.st_size, stat.st_mtime_ns
+
+
+def read_header(source: InputSource | bytes, size: int = HEADER_SIZE) -> bytes:
+    """
+    讀取內容開頭（最多 size 位元組）
+    
+    檔案物件從目前位置讀取，讀取後回到原位置（若可 seek）；
+    無法開啟的路徑回傳空位元組。
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source[:size])
+    
+    if _is_file_object(source):
+        seekable = getattr(source, "seekable", lambda: False)()
+        position = source.tell() if seekable else None
+        try:
+            return bytes(source.read(size) or b"")
+        finally:
+            if position is not None:
+                source.seek(position)
+    
+    try:
+        with open(source, "rb") as f:
+            return f.read(size)
+    except OSError:
+        return b""
+
+
+@contextmanager
+def content_view(source: InputSource | bytes) -> Iterator[memoryview]:
+    """
+    內容的唯讀 memoryview（路徑來源以 mmap 對映，切片不複製）
+    
+    無法對映的來源（空檔案、管線、檔案物件）退回讀取 HEADER_SIZE 位元組。
+    使用期間取得的切片不可保留到離開 with 之後。
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield memoryview(source)
+        return
+    if _is_file_object(source):
+        yield memoryview(read_header(source))
+        return
+    
+    with open(source, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            yield memoryview(f.read(HEADER_SIZE))
+            return
+        view = memoryview(mapped)
+        try:
+            yield view
+        finally:
+            view.release()
+            mapped.close()
+
+
+# ─────────────────────────────────────────────────────────────
+# ZIP 容器
+# ─────────────────────────────────────────────────────────────
+
+ZIP_MAGIC = b"PK\x03\x04"
+
+_EOCD = struct.Struct("<4sHHHHIIH")                # 22 位元組
+_ZIP64_LOCATOR = struct.Struct("<4sIQI")           # 20 位元組
+_ZIP64_EOCD = struct.Struct("<4sQHHIIQQQQ")        # 56 位元組
+_CENTRAL_ENTRY = struct.Struct("<4s24xHHH12x")     # 46 位元組（只取名稱/額外/註解長度）
+_EOCD_SIGNATURE = b"PK\x05\x06"
+_ZIP64_LOCATOR_SIGNATURE = b"PK\x06\x07"
+_ZIP64_EOCD_SIGNATURE = b"PK\x06\x06"
+_CENTRAL_SIGNATURE = b"PK\x01\x02"
+_MAX_COMMENT = 0xFFFF
+_CENTRAL_SCAN_LIMIT = 64 * 1024  # 中央目錄最多掃描的位元組數
+_CENTRAL_CHUNK = 4096
+
+ReadAt = Callable[[int, int], bytes]
+
+
+@contextmanager
+def _random_access(source: InputSource | bytes) -> Iterator[tuple[ReadAt, int] | None]:
+    """(read_at(offset, size), 總大小)；無法隨機存取的來源產出 None"""
+    if _is_file_object(source):
+        seekable = getattr(source, "seekable", lambda: False)()
+        if not seekable:
+            yield None
+            return
+        base = source.tell()
+        size = source.seek(0, os.SEEK_END) - base
+        
+        def read_at(offset: int, length: int) -> bytes:
+            source.seek(base + offset)
+            return source.read(length)
+        
+        try:
+            yield read_at, size
+        finally:
+            source.seek(base)
+        return
+    
+    with content_view(source) as view:
+        yield (lambda offset, length: view[offset:offset + length]), len(view)
+
+
+def _find_central_directory(read_at: ReadAt, size: int) -> tuple[int, int] | None:
+    """從檔尾的 end-of-central-directory 找出中央目錄 (起點, 大小)"""
+    if size < _EOCD.size:
+        return None
+    
+    # 通常沒有封存註解：EOCD 正好是最後 22 位元組；否則在最後 64 KB 內搜尋
+    tail = bytes(read_at(size - _EOCD.size, _EOCD.size))
+    eocd = size - _EOCD.size
+    if not tail.startswith(_EOCD_SIGNATURE):
+        window = min(size, _EOCD.size + _MAX_COMMENT)
+        tail = bytes(read_at(size - window, window))
+        found = tail.rfind(_EOCD_SIGNATURE)
+        if found < 0 or found + _EOCD.size > len(tail):
+            return None
+        eocd = size - window + found
+        tail = tail[found:found + _EOCD.size]
+    
+    _, _, _, _, entries, cd_size, cd_offset, _ = _EOCD.unpack(tail)
+    record = eocd
+    if 0xFFFFFFFF in (cd_size, cd_offset) or entries == 0xFFFF:
+        # ZIP64：EOCD 前的定位器指向 ZIP64 EOCD 記錄
+        if eocd < _ZIP64_LOCATOR.size:
+            return None
+        locator = bytes(read_at(eocd - _ZIP64_LOCATOR.size, _ZIP64_LOCATOR.size))
+        signature, _, record, _ = _ZIP64_LOCATOR.unpack(locator)
+        if signature != _ZIP64_LOCATOR_SIGNATURE:
+            return None
+        raw = bytes(read_at(record, _ZIP64_EOCD.size))
+        if len(raw) < _ZIP64_EOCD.size:
+            return None
+        signature, *_, cd_size, cd_offset = _ZIP64_EOCD.unpack(raw)
+        if signature != _ZIP64_EOCD_SIGNATURE:
+            return None
+    
+    # 以中央目錄緊接在 EOCD 之前推算起點（容許檔案前有前置資料，如自解壓檔）
+    start = record - cd_size
+    if start < 0:
+        return None
+    return start, cd_size
+
+
+def _central_directory_names(read_at: ReadAt, start: int, length: int) -> Iterator[bytes]:
+    """
+    依序產出中央目錄中的檔名（分塊讀取，最多 _CENTRAL_SCAN_LIMIT 位元組）
+    
+    Raises:
+        ValueError: 目錄超過掃描上限而未讀完（剩餘檔名未知）
+    """
+    limit = start + length
+    end = start + min(length, _CENTRAL_SCAN_LIMIT)
+    buf = b""
+    buf_start = start
+    pos = start
+    
+    def window(offset: int, needed: int) -> bytes | None:
+        nonlocal buf, buf_start
+        if offset + needed > end:
+            if end < limit:
+                raise ValueError("Central directory exceeds the scan limit")
+            return None
+        if offset < buf_start or offset + needed > buf_start + len(buf):
+            buf = bytes(read_at(offset, min(max(needed, _CENTRAL_CHUNK), end - offset)))
+            buf_start = offset
+            if len(buf) < needed:
+                return None
+        return buf
+    
+    while True:
+        data = window(pos, _CENTRAL_ENTRY.size)
+        if data is None:
+            return
+        signature, name_len, extra_len, comment_len = _CENTRAL_ENTRY.unpack_from(data, pos - buf_start)
+        if signature != _CENTRAL_SIGNATURE:
+            return
+        data = window(pos, _CENTRAL_ENTRY.size + name_len)
+        if data is None:
+            return
+        name_start = pos - buf_start + _CENTRAL_ENTRY.size
+        yield data[name_start:name_start + name_len]
+        pos += _CENTRAL_ENTRY.size + name_len + extra_len + comment_len
+
+
 # ═══════════════════════════════════════════════════════════════════
 # 類型檢測工具
 # ═══════════════════════════════════════════════════════════════════
@@ -291,6 +1140,8 @@ class TypeDetector:
     EXTENSION_MAP = {
         ".pdf": "application/pdf",
         ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        ".pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
         ".doc": "application/msword",
         ".txt": "text/plain",
         ".md": "text/markdown",
@@ -301,6 +1152,13 @@ class TypeDetector:
         ".csv": "text/csv",
     }
     
+    # OOXML 容器內的目錄前綴 -> MIME type
+    OOXML_PARTS = {
+        b"word/": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        b"xl/": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        b"ppt/": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    }
+    
     @classmethod
     def from_path(cls, path: str) -> str | None:
         """從路徑推斷類型"""
@@ -320,31 +1178,97 @@ class TypeDetector:
         return None
     
     @classmethod
-    def from_content(cls, content: bytes) -> str | None:
-        """從內容魔數推斷類型"""
+    def from_content(cls, content: bytes | memoryview) -> str | None:
+        """從內容魔數推斷類型（memoryview 只會複製開頭的小片段）"""
         if not content:
             return None
         
+        head = bytes(content[:1024])
+        
         # PDF
-        if content[:4] == b"%PDF":
+        if head[:4] == b"%PDF":
             return "application/pdf"
         
         # ZIP-based (DOCX, XLSX, PPTX)
-        if content[:4] == b"PK\x03\x04":
-            return "application/zip"  # 需要進一步檢查
+        if head[:4] == ZIP_MAGIC:
+            return cls.zip_container_type(content) or "application/zip"
         
         # HTML
-        lower_start = content[:1024].lower()
+        lower_start = head.lower()
         if b"<html" in lower_start or b"<!doctype html" in lower_start:
             return "text/html"
         
         # XML
-        if content[:5] == b"<?xml":
+        if head[:5] == b"<?xml":
             return "application/xml"
         
         # JSON
-        stripped = content.lstrip()
-        if stripped and stripped[0:1] in (b"{", b"["):
+        if _first_non_space(content) in (b"{", b"["):
             return "application/json"
         
         return None
+    
+    @classmethod
+    def sniff(cls, source: InputSource | bytes) -> str | None:
+        """
+        從檔案來源推斷類型，不將整個檔案載入記憶體
+        
+        路徑來源以 mmap 檢視，結果以 (路徑, 大小, mtime) 快取。
+        """
+        key = file_signature(source)
+        if key is not None:
+            cached = sniff_cache.get(key, _UNSET)
+            if cached is not _UNSET:
+                return cached
+        
+        try:
+            with content_view(source) as view:
+                detected = cls.from_content(view)
+            if detected == "application/zip" and _is_file_object(source):
+                # 檔案物件的 view 只有標頭，改以 seek 讀取中央目錄
+                detected = cls.zip_container_type(source) or detected
+        except OSError:
+            return None
+        
+        if key is not None:
+            sniff_cache.put(key, detected)
+        return detected
+    
+    
+    @classmethod
+    def zip_container_type(cls, source: InputSource | bytes | memoryview) -> str | None:
+        """
+        ZIP 容器的精確類型：只讀取檔尾的 EOCD 與中央目錄
+        
+        Returns:
+            OOXML MIME type；中央目錄可讀但不是 OOXML 時為 "application/zip"；
+            無法讀取中央目錄（只有標頭、損毀、不可 seek）或目錄超過掃描上限時為 None
+        """
+        try:
+            with _random_access(source) as access:
+                if access is None:
+                    return None
+                read_at, size = access
+                directory = _find_central_directory(read_at, size)
+                if directory is None:
+                    return None
+                for name in _central_directory_names(read_at, *directory):
+                    for prefix, mime_type in cls.OOXML_PARTS.items():
+                        if name.startswith(prefix):
+                            return mime_type
+        except (OSError, struct.error, ValueError):
+            return None
+        return "application/zip"
+
+
+# (路徑, 大小, mtime_ns) -> TypeDetector.sniff 結果
+sniff_cache: LRUCache[tuple[str, int, int], str | None] = LRUCache(maxsize=4096)
+
+
+def _first_non_space(content: bytes | memoryview, chunk: int = 4096) -> bytes:
+    """第一個非空白位元組（分段掃描，不複製整個內容）"""
+    for start in range(0, len(content), chunk):
+        stripped = bytes(content[start:start + chunk]).lstrip()
+        if stripped:
+            return stripped[:1]
+    return b""
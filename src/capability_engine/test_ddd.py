@@ -125,10 +125,39 @@ def test_domain_layer():
     
     print("   ✅ CapabilityGraph (Aggregate Root)")
     
+    # 邊索引與移除
+    assert graph.in_degree("read-doc") == 1 and graph.out_degree("read-doc") == 1
+    assert [e.source for e in graph.get_edges_to("end")] == ["read-doc"]
+    scratch = CapabilityGraph.from_dict(graph.to_dict())
+    scratch.remove_node("read-doc")
+    assert scratch.edge_count == 0
+    assert scratch.out_degree("start") == 0 and scratch.in_degree("end") == 0
+    assert {n.id for n in scratch.find_end_nodes()} == {"start", "end"}
+    print("   ✅ Edge indexes / remove_node")
+    
     # 複雜度計算
     complexity = graph.calculate_complexity()
     print(f"   ✅ Complexity: {complexity.complexity_level.value} (score={complexity.complexity_score})")
     
+    # 增量維護的複雜度須與重建一致
+    assert graph.calculate_complexity() is complexity
+    scratch = CapabilityGraph.from_dict(graph.to_dict())
+    scratch.add_node(GraphNode(id="again", type=NodeType.LOOP, max_iterations=4))
+    scratch.add_edge(GraphEdge(source="end", target="again"))
+    assert scratch.calculate_complexity().max_depth == complexity.max_depth + 1
+    assert scratch.calculate_complexity().max_iterations == 4
+    assert scratch.fingerprint != graph.fingerprint
+    again = scratch.get_node("again")
+    again.max_iterations = 9  # 原地修改節點欄位同樣更新計數
+    assert scratch.calculate_complexity().max_iterations == 9
+    again.type = NodeType.ABSTRACT
+    assert scratch.calculate_complexity().max_iterations == 0
+    assert scratch.calculate_complexity().abstract_nodes == complexity.abstract_nodes + 1
+    scratch.remove_node("again")
+    assert scratch.calculate_complexity() == complexity
+    assert scratch.fingerprint == graph.fingerprint
+    print("   ✅ Incremental complexity")
+    
     # Mermaid 輸出
     mermaid = graph.to_mermaid()
     assert "graph TD" in mermaid
@@ -139,6 +168,7 @@ def test_domain_layer():
     restored = CapabilityGraph.from_dict(data)
     assert restored.id == graph.id
     assert restored.node_count == graph.node_count
+    assert CapabilityGraph.from_bytes(graph.to_bytes()).to_dict() == data
     print("   ✅ Serialization/Deserialization")
     
     print("\n✅ Domain 層測試通過！")
@@ -183,6 +213,12 @@ def test_application_layer():
         )
         assert result["skill_id"] == "web-reader"
         print(f"   ✅ URL detection: {result['skill_id']}")
+        
+        contexts = [{"input_file": "a.pdf"}, {"input_url": "https://example.com"}, {"input_file": "b.xyz"}, {}]
+        contract = {"inputs": ["read"], "capabilities": ["read-document"]}
+        batch = await resolver.resolve_batch(contract, contexts)
+        assert batch == [await resolver.resolve(contract, c) for c in contexts]
+        print(f"   ✅ Batch resolution: {[r['skill_id'] for r in batch]}")
     
     asyncio.run(test_resolver())
     
@@ -215,6 +251,90 @@ def test_application_layer():
     assert not result["valid"]
     print(f"   ✅ Invalid graph detection: {result['errors']}")
     
+    # 死路偵測與依指紋記憶化
+    from src.capability_engine.domain.services import validation_cache
+    
+    trap = CapabilityGraph.from_dict(graph.to_dict())
+    trap.add_node(GraphNode(id="spin", type=NodeType.SKILL, skill_id="test-skill"))
+    trap.add_edge(GraphEdge(source="skill1", target="spin"))
+    trap.add_edge(GraphEdge(source="spin", target="spin"))
+    result = validator.validate(trap)
+    assert result["valid"] and result["dead_ends"] == ["spin"] and not result["unreachable"]
+    hits = validation_cache.hits
+    assert validator.validate(trap) == result
+    assert validation_cache.hits == hits + 1
+    trap.get_node("spin").type = NodeType.ABSTRACT  # 原地修改節點後重新驗證
+    assert "Abstract node 'spin' has no implementations" in validator.validate(trap)["warnings"]
+    print("   ✅ Dead ends / memoized validation")
+    
+    # 深層線性管線（遞迴 DFS 會 RecursionError）
+    pipeline = CapabilityGraph(id="pipeline", name="Deep Pipeline")
+    pipeline.add_node(GraphNode(id="start", type=NodeType.START))
+    previous = "start"
+    for i in range(5000):
+        pipeline.add_node(GraphNode(id=f"step{i}", type=NodeType.SKILL, skill_id="test-skill"))
+        pipeline.add_edge(GraphEdge(source=previous, target=f"step{i}"))
+        previous = f"step{i}"
+    pipeline.add_node(GraphNode(id="end", type=NodeType.END))
+    pipeline.add_edge(GraphEdge(source=previous, target="end"))
+    
+    result = validator.validate(pipeline)
+    assert result["valid"] and not pipeline.has_cycle()
+    assert pipeline.calculate_complexity().max_depth == 5002
+    
+    pipeline.add_edge(GraphEdge(source="step4999", target="step10"))
+    cycles = pipeline.find_cycles()
+    assert len(cycles) == 1 and len(cycles[0]) == 4990
+    assert pipeline.has_cycle()
+    print("   ✅ Deep pipeline (5000 steps): no recursion limit")
+    
+    # 測試 ExecuteCapabilityUseCase（共用編譯後的圖）
+    print("\n3. ExecuteCapabilityUseCase:")
+    
+    class EchoExecutor:
+        async def execute(self, skill_id, inputs):
+            await asyncio.sleep(0)
+            return {skill_id: inputs.get("n", 0) + 1}
+    
+    compiled = graph.compile()
+    assert compiled is graph.compile()
+    assert compiled.successors(compiled.node_index("start")) == (compiled.node_index("skill1"),)
+    
+    use_case = ExecuteCapabilityUseCase(skill_executor=EchoExecutor())
+    
+    async def run_concurrently():
+        return await asyncio.gather(*(use_case.execute(compiled, {}) for _ in range(3)))
+    
+    results = asyncio.run(run_concurrently())
+    assert all(r["success"] and r["outputs"] == {"test-skill": 1} for r in results)
+    assert len({r["execution_id"] for r in results}) == 3
+    assert all(r["trace"]["graph_fingerprint"] == graph.fingerprint for r in results)
+    print("   ✅ Shared compiled graph across concurrent executions")
+    
+    # 分支條件使用共用表達式引擎（巢狀屬性存取，直接讀取輸入不複製）
+    routed = CapabilityGraph.from_dict({
+        "id": "routed", "name": "Routed",
+        "nodes": [
+            {"id": "start", "type": "control.start"},
+            {"id": "route", "type": "control.branch", "conditions": [
+                {"name": "big", "expression": "request.size * 2 > 20", "target": "big"},
+                {"name": "default", "expression": "True", "target": "small"},
+            ]},
+            {"id": "big", "type": "skill", "skill_id": "big-skill"},
+            {"id": "small", "type": "skill", "skill_id": "small-skill"},
+        ],
+        "edges": [
+            {"source": "start", "target": "route"},
+            {"source": "route", "target": "big"},
+            {"source": "route", "target": "small"},
+        ],
+    })
+    result = asyncio.run(use_case.execute(routed, {"request": {"size": 12}}))
+    assert result["success"] and set(result["outputs"]) == {"big-skill"}
+    result = asyncio.run(use_case.execute(routed, {"request": {"size": 3}}))
+    assert set(result["outputs"]) == {"small-skill"}
+    print("   ✅ Branch expressions on live context")
+    
     print("\n✅ Application 層測試通過！")
 
 
@@ -243,6 +363,99 @@ def test_infrastructure_layer():
     assert len(resources) >= 1
     print(f"   ✅ MCP Resources: {[r.uri for r in resources]}")
     
+    # 二進位快照：YAML 載入後寫回 graph.bin，之後優先讀取
+    import tempfile
+    import yaml
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        graph_dir = Path(tmp) / "demo"
+        graph_dir.mkdir()
+        (graph_dir / "graph.yaml").write_text(yaml.safe_dump({
+            "id": "demo", "name": "Demo",
+            "nodes": [{"id": "start", "type": "control.start"}, {"id": "end", "type": "control.end"}],
+            "edges": [{"source": "start", "target": "end"}],
+        }))
+        server = CapabilityMCPServer(capabilities_dir=tmp)
+        loaded = asyncio.run(server._load_capability_graph("demo"))
+        assert (graph_dir / "graph.bin").exists()
+        cached = asyncio.run(server._load_capability_graph("demo"))
+        assert cached.to_dict() == loaded.to_dict()
+        
+        # 形狀不符或雜湊狀態與內容不一致的快照一律退回 YAML
+        from src.capability_engine.domain.services import encode_snapshot
+        
+        tampered = loaded.to_dict()
+        tampered["nodes"].pop()
+        for payload in (
+            {"graph": ["demo"], "content": [0, 0]},
+            {"graph": {"id": "demo"}, "content": [0, 0]},
+            {"graph": tampered, "content": [0, 3]},
+        ):
+            (graph_dir / "graph.bin").write_bytes(encode_snapshot(payload, kind="domain"))
+            reloaded = asyncio.run(server._load_capability_graph("demo"))
+            assert reloaded.to_dict() == loaded.to_dict()
+        
+        metrics = asyncio.run(server.handle_tool_call("get_complexity_metrics", {"capability_id": "demo"}))
+        assert metrics["fingerprint"] == loaded.fingerprint and metrics["node_count"] == 2
+    print("   ✅ Binary snapshot loading / complexity metrics")
+    
+    batch = asyncio.run(server.handle_tool_call("resolve_abstract_nodes", {
+        "contract": {"capabilities": ["read"]},
+        "contexts": [{"input_file": "a.md"}, {"input_file": "b.txt"}],
+    }))
+    assert [i["skill_id"] for i in batch["implementations"]] == ["markdown-reader", "text-reader"]
+    print("   ✅ Batch resolution tool")
+    
+    # 技能註冊表：反向索引與持久化
+    from src.capability_engine.infrastructure import InMemorySkillRegistry
+    from src.capability_engine.infrastructure.skills import registry as registry_module
+    from src.capability_engine.application.services import NodeResolverService
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for skill_id, capabilities, extensions in (
+            ("text-reader", "read_text", ".txt"),
+            ("pdf-reader", "read_text, read_pdf", "pdf"),
+            ("summarizer", "summarize", ""),
+        ):
+            (Path(tmp) / skill_id).mkdir()
+            (Path(tmp) / skill_id / "SKILL.md").write_text(
+                f"---\nname: {skill_id}\ndescription: test\ncapabilities: {capabilities}\n"
+                f"extensions: [{extensions}]\n---\n\n# {skill_id}\n"
+            )
+        
+        parsed = []
+        original_parse = registry_module.parse_skill_file
+        registry_module.parse_skill_file = lambda path: parsed.append(path) or original_parse(path)
+        try:
+            registry = InMemorySkillRegistry.load(tmp)
+            assert len(parsed) == 3 and (Path(tmp) / registry_module.INDEX_FILE).exists()
+            
+            reloaded = InMemorySkillRegistry.load(tmp)
+            assert len(parsed) == 3  # 未變更的技能直接取自持久化索引
+            
+            (Path(tmp) / "summarizer" / "SKILL.md").write_text(
+                "---\nname: summarizer\ncapabilities: [summarize, read_pdf]\n---\n"
+            )
+            reloaded = InMemorySkillRegistry.load(tmp)
+            assert len(parsed) == 4
+        finally:
+            registry_module.parse_skill_file = original_parse
+        
+        assert [s["id"] for s in registry.find_skills_by_capability("READ_TEXT")] == ["pdf-reader", "text-reader"]
+        assert [s["id"] for s in registry.find_skills_by_extension("pdf")] == ["pdf-reader"]
+        ranked = reloaded.rank_skills(["read_pdf", "summarize"])
+        assert [(s["id"], covered) for s, covered in ranked] == [
+            ("summarizer", ["read_pdf", "summarize"]), ("pdf-reader", ["read_pdf"]),
+        ]
+        
+        result = asyncio.run(NodeResolverService(reloaded).resolve(
+            {"capabilities": ["read_pdf", "summarize"]}, {},
+        ))
+        assert result["skill_id"] == "summarizer" and result["confidence"] == 0.8
+        result = asyncio.run(NodeResolverService(reloaded).resolve({}, {"input_file": "x.PDF"}))
+        assert result["skill_id"] == "pdf-reader"
+    print("   ✅ Skill registry inverted index / persisted index")
+    
     # 測試 Prompt Generator
     print("\n2. Prompt Generator:")
     
@@ -434,7 +647,7 @@ def main():
         print("\n" + "=" * 60)
         print(" 🎉 所有測試通過！DDD 架構運作正常")
         print("=" * 60)
-        
+    
     except Exception as e:
         print(f"\n❌ 測試失敗: {e}")
         import traceback
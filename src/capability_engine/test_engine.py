@@ -10,6 +10,10 @@ from capability_engine.graph import (
 )
 from capability_engine.adaptive import AdaptiveGraphEngine, SkillExecutor, InteractionHandler
 from capability_engine.fallback import create_standard_fallback_chain
+from capability_engine.domain.services.statistics import SkillStatsStore
+from capability_engine.resolver import (
+    AbstractNodeResolver, ConditionMatcher, ResolutionContext, TypeDetector, sniff_cache
+)
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -319,6 +323,1024 @@ async def test_metrics():
         print(f"   抽象節點: {metrics.abstract_nodes}")
         print(f"   複雜度分數: {metrics.complexity_score}")
         print(f"   複雜度等級: {metrics.complexity_level.value}")
+        
+        # 增量維護的指標須與整批重建一致
+        graph.add_node(GraphNode(id="retry", type=NodeType.LOOP_START, max_iterations=7))
+        graph.add_edge(GraphEdge(from_node=graph.get_start_node().id, to_node="retry"))
+        rebuilt = CapabilityGraph(
+            id=graph.id, name=graph.name,
+            nodes=list(graph.nodes), edges=list(graph.edges),
+        )
+        assert graph.calculate_metrics() == rebuilt.calculate_metrics()
+        assert graph.calculate_metrics().max_iterations == 7
+
+
+async def test_graph_indexes():
+    """測試圖索引（前驅、邊、類型分桶）"""
+    print("\n" + "=" * 60)
+    print("測試 6: 圖索引")
+    print("=" * 60)
+    
+    graph = create_branch_graph()
+    
+    assert sorted(graph.get_predecessors("merge")) == ["read_pdf", "read_text", "read_web"]
+    assert graph.get_edge("merge", "write") is graph.edges[4]
+    assert graph.get_edge("write", "merge") is None
+    assert graph.get_start_node().id == "start"
+    assert [n.id for n in graph.get_end_nodes()] == ["end"]
+    
+    # 增量維護
+    graph.add_node(GraphNode(id="review", type=NodeType.ABSTRACT, implementations=[
+        Implementation(id="default", skill_id="text-reader"),
+    ]))
+    graph.add_edge(GraphEdge(from_node="write", to_node="review"))
+    assert graph.get_predecessors("review") == ["write"]
+    graph.get_predecessors("review").append("merge")  # 回傳副本，不影響索引
+    assert graph.get_predecessors("review") == ["write"]
+    assert graph.get_edge("write", "review") is graph.edges[-1]
+    assert [n.id for n in graph.get_abstract_nodes()] == ["review"]
+    
+    # 內容指紋：與順序無關、隨增量更新
+    reordered = CapabilityGraph(
+        id=graph.id, name=graph.name,
+        nodes=graph.nodes[::-1], edges=graph.edges[::-1],
+    )
+    assert reordered.fingerprint == graph.fingerprint
+    before = graph.fingerprint
+    graph.add_edge(GraphEdge(from_node="review", to_node="end"))
+    assert graph.fingerprint != before
+    assert graph.to_dict()["fingerprint"] == graph.fingerprint
+    
+    # 重新指定節點欄位同樣更新指紋，改回後指紋還原
+    before = graph.fingerprint
+    write = graph.get_node("write")
+    skill_id, write.skill_id = write.skill_id, "doc-writer"
+    assert graph.fingerprint != before
+    write.skill_id = skill_id
+    assert graph.fingerprint == before
+    graph.get_node("review").type = NodeType.SKILL
+    assert graph.get_abstract_nodes() == [] and graph.fingerprint != before
+    graph.get_node("review").type = NodeType.ABSTRACT
+    assert [n.id for n in graph.get_abstract_nodes()] == ["review"]
+    assert graph.fingerprint == before
+    
+    # 同 ID 重新加入時取代舊節點，不重複分桶
+    replacement = GraphNode(id="review", type=NodeType.ABSTRACT, implementations=[
+        Implementation(id="default", skill_id="pdf-reader"),
+    ])
+    graph.add_node(replacement)
+    assert graph.get_abstract_nodes() == [replacement]
+    
+    # 驗證：不可達節點與死路（分支條件目標視為可達）
+    report = create_branch_graph().validate_report()
+    assert report.valid and not report.unreachable and not report.dead_ends
+    graph.add_node(GraphNode(id="island", type=NodeType.SKILL, skill_id="text-reader"))
+    graph.add_node(GraphNode(id="sink", type=NodeType.SKILL, skill_id="text-reader"))
+    graph.add_edge(GraphEdge(from_node="start", to_node="sink"))
+    report = graph.validate_report()
+    assert report.valid
+    assert report.unreachable == ("island",)
+    assert report.dead_ends == ("island", "sink")
+    assert graph.validate_report() is report  # 依指紋記憶化
+    graph.get_node("sink").skill_id = None  # 原地修改節點後不得取用舊結果
+    assert graph.validate() == (False, ["Skill node sink must have skill_id"])
+    graph.get_node("sink").skill_id = "text-reader"
+    assert graph.validate_report() is report
+    
+    # 二進位快照與 to_dict 完全對應
+    restored = CapabilityGraph.from_bytes(graph.to_bytes())
+    assert restored.to_dict() == graph.to_dict()
+    assert restored.fingerprint == CapabilityGraph.from_dict(graph.to_dict()).fingerprint
+    
+    print("\n✅ 索引查詢正確")
+
+
+def create_diamond_stack_graph(layers: int) -> CapabilityGraph:
+    """建立堆疊的菱形分支/合併圖（簡單路徑數為 2^layers）"""
+    graph = CapabilityGraph(id=f"diamonds-{layers}", name="菱形堆疊")
+    graph.add_node(GraphNode(id="start", type=NodeType.START))
+    previous = "start"
+    for i in range(layers):
+        for suffix in ("a", "b"):
+            graph.add_node(GraphNode(id=f"s{i}{suffix}", type=NodeType.SKILL, skill_id="text-reader"))
+            graph.add_edge(GraphEdge(from_node=previous, to_node=f"s{i}{suffix}"))
+        graph.add_node(GraphNode(id=f"m{i}", type=NodeType.MERGE))
+        graph.add_edge(GraphEdge(from_node=f"s{i}a", to_node=f"m{i}"))
+        graph.add_edge(GraphEdge(from_node=f"s{i}b", to_node=f"m{i}"))
+        previous = f"m{i}"
+    graph.add_node(GraphNode(id="end", type=NodeType.END))
+    graph.add_edge(GraphEdge(from_node=previous, to_node="end"))
+    return graph
+
+
+async def test_max_depth_scaling():
+    """測試最大深度在大量分支下仍為線性時間"""
+    print("\n" + "=" * 60)
+    print("測試 7: 最大深度（30 層菱形）")
+    print("=" * 60)
+    
+    graph = create_diamond_stack_graph(30)
+    metrics = graph.calculate_metrics()
+    assert metrics.max_depth == 30 * 2 + 1
+    
+    # 迴圈縮點：m0 -> s0a 形成環
+    graph = create_diamond_stack_graph(1)
+    graph.add_edge(GraphEdge(from_node="m0", to_node="s0a", type=EdgeType.ITERATION))
+    assert graph.calculate_metrics().max_depth == 4
+    assert [sorted(c) for c in graph.find_cycles()] == [["m0", "s0a"]]
+    assert not create_branch_graph().has_cycle()
+    
+    print(f"\n✅ max_depth = {metrics.max_depth}")
+
+
+async def test_condition_matcher():
+    """測試條件表達式（編譯快取、不使用 eval）"""
+    print("\n" + "=" * 60)
+    print("測試 8: 條件表達式")
+    print("=" * 60)
+    
+    context = ResolutionContext(
+        input_type="application/pdf",
+        input_path="/tmp/report.pdf",
+        variables={"mode": "fast", "quote": "it's", **{f"v{i}": i for i in range(40)}},
+    )
+    assert ConditionMatcher.match("input_type == 'application/pdf'", context)
+    assert ConditionMatcher.match("mode != 'slow' and v7 == 7", context)
+    assert ConditionMatcher.match("quote == \"it's\"", context)  # 舊版字串替換會破壞引號
+    assert not ConditionMatcher.match("missing == 1", context)
+    assert not ConditionMatcher.match("__import__('os') == 1", context)
+    
+    before = ConditionMatcher.cache_stats()
+    for _ in range(3):
+        assert ConditionMatcher.match("mode != 'slow' and v7 == 7", context)
+    after = ConditionMatcher.cache_stats()
+    assert after["hits"] == before["hits"] + 3 and after["misses"] == before["misses"]
+    
+    print(f"\n✅ 快取統計: {after}")
+
+
+async def test_expressions():
+    """測試共用表達式引擎（分支、迴圈退出條件）"""
+    print("\n" + "=" * 60)
+    print("測試 9: 表達式引擎")
+    print("=" * 60)
+    
+    from capability_engine.domain.services import ExpressionError, compile_expression
+    
+    scope = {"result": {"status": "ok", "pages": [3, 5]}, "count": 4}
+    assert compile_expression("result.status == 'ok' and result.pages[-1] * 2 > count + 5").evaluate(scope)
+    assert compile_expression("result['pages'][0:1] == [3] and -count % 3 == 2").evaluate(scope)
+    assert compile_expression("count // 3 == 1 and count / 8 == 0.5").names == {"count"}
+    for unsafe in ("count.__class__", "__import__('os')", "2 ** 100", "lambda: 1"):
+        try:
+            compile_expression(unsafe)
+        except ExpressionError:
+            continue
+        raise AssertionError(f"accepted unsafe expression: {unsafe}")
+    
+    # 迴圈邊的 exit_condition
+    graph = CapabilityGraph(id="loop", name="迴圈")
+    graph.add_node(GraphNode(id="start", type=NodeType.START))
+    graph.add_node(GraphNode(id="loop", type=NodeType.LOOP_START, max_iterations=10))
+    graph.add_node(GraphNode(id="body", type=NodeType.SKILL, skill_id="text-reader"))
+    graph.add_node(GraphNode(id="loop_end", type=NodeType.LOOP_END))
+    graph.add_node(GraphNode(id="end", type=NodeType.END))
+    graph.add_edge(GraphEdge(from_node="start", to_node="loop"))
+    graph.add_edge(GraphEdge(from_node="loop", to_node="body"))
+    graph.add_edge(GraphEdge(from_node="body", to_node="loop_end"))
+    graph.add_edge(GraphEdge(
+        from_node="loop_end", to_node="loop", type=EdgeType.ITERATION,
+        exit_condition="_iteration_count >= 3",
+    ))
+    graph.add_edge(GraphEdge(from_node="loop", to_node="end"))
+    assert CapabilityGraph.from_dict(graph.to_dict()).edges[3].exit_condition == "_iteration_count >= 3"
+    
+    executor = MockSkillExecutor()
+    trace = await AdaptiveGraphEngine(graph, executor).execute()
+    assert trace.success
+    assert len(executor.execution_log) == 3
+    
+    print("\n✅ 迴圈於第 3 次迭代後退出")
+
+
+async def test_decision_index():
+    """測試決策索引（與逐一比對條件的結果一致）"""
+    print("\n" + "=" * 60)
+    print("測試 10: 決策索引")
+    print("=" * 60)
+    
+    import random
+    rng = random.Random(13)
+    conditions = [
+        "*.pdf", "*.PDF", "*.tar.gz", "*.gz", "*.doc?", "*/raw/*", "http://", "https://example.com/*",
+        "https://example.com/docs*", "text/html", "text/*", "image/*", "application/pdf",
+        "*/json", "default", "mode == 'fast'", "mode != 'fast' and v == 1", "input_type == 'text/html'",
+        "unknown", "",
+    ]
+    paths = [
+        None, "/tmp/report.pdf", "/tmp/REPORT.PDF", "a.tar.gz", "x.docx", "/data/raw/f.bin",
+        "https://example.com/docs/a.html", "http://host/x.pdf", "C:\\dir\\file.Pdf", "dir.pdf/", "",
+    ]
+    types = [None, "text/html", "text/plain", "image/png", "application/pdf", "application/json", "TEXT/HTML"]
+    
+    def reference(impls, context):
+        candidates = sorted(
+            (impl for impl in impls if impl.skill_id not in context.previous_attempts),
+            key=lambda impl: impl.priority,
+        )
+        for impl in candidates:
+            if not impl.conditions or any(ConditionMatcher.match(c, context) for c in impl.conditions):
+                return impl
+        return candidates[0] if candidates else None
+    
+    resolver = AbstractNodeResolver()
+    for trial in range(40):
+        impls = [
+            Implementation(
+                id=f"impl-{trial}-{i}",
+                skill_id=f"skill-{i % 20}",  # 部分實現共用 skill_id
+                priority=rng.randint(1, 6),  # 大量同優先級，驗證穩定排序
+                conditions=rng.sample(conditions, rng.randint(0, 3)) if rng.random() > 0.1 else [],
+            )
+            for i in range(25)
+        ]
+        node = GraphNode(id=f"n{trial}", type=NodeType.ABSTRACT, implementations=impls)
+        for _ in range(30):
+            context = ResolutionContext(
+                input_type=rng.choice(types),
+                input_path=rng.choice(paths),
+                previous_attempts=rng.sample([f"skill-{i}" for i in range(20)], rng.randint(0, 19)),
+                variables={"mode": rng.choice(["fast", "slow"]), "v": rng.randint(0, 1)},
+            )
+            expected = reference(impls, context)
+            assert resolver.resolve(node, context) is expected, (trial, context)
+            assert resolver.resolve_memoized(node, context, "fp")[0] is expected, (trial, context)
+    
+    # 實現列表被替換時自動重建
+    node = GraphNode(id="swap", type=NodeType.ABSTRACT, implementations=[
+        Implementation(id="a", skill_id="a", conditions=["*.pdf"]),
+    ])
+    context = ResolutionContext(input_path="x.pdf")
+    assert resolver.resolve(node, context).id == "a"
+    node.implementations = [Implementation(id="b", skill_id="b", conditions=["*.pdf"])]
+    assert resolver.resolve(node, context).id == "b"
+    
+    print(f"\n✅ 索引快取: {resolver._indexes.stats()}")
+
+
+async def test_resolution_cache():
+    """測試抽象節點解析快取（迴圈中重複解析）"""
+    print("\n" + "=" * 60)
+    print("測試 11: 解析快取")
+    print("=" * 60)
+    
+    reader = create_abstract_node_graph().get_node("read_document")
+    graph = CapabilityGraph(id="loop-abstract", name="迴圈抽象節點")
+    graph.add_node(GraphNode(id="start", type=NodeType.START))
+    graph.add_node(GraphNode(id="loop", type=NodeType.LOOP_START, max_iterations=5))
+    graph.add_node(reader)
+    graph.add_node(GraphNode(id="loop_end", type=NodeType.LOOP_END))
+    graph.add_node(GraphNode(id="end", type=NodeType.END))
+    graph.add_edge(GraphEdge(from_node="start", to_node="loop"))
+    graph.add_edge(GraphEdge(from_node="loop", to_node="read_document"))
+    graph.add_edge(GraphEdge(from_node="read_document", to_node="loop_end"))
+    graph.add_edge(GraphEdge(from_node="loop_end", to_node="loop", type=EdgeType.ITERATION))
+    graph.add_edge(GraphEdge(from_node="loop", to_node="end"))
+    
+    executor = MockSkillExecutor()
+    engine = AdaptiveGraphEngine(graph, executor)
+    trace = await engine.execute({"input_path": "a.pdf"})
+    assert (trace.resolution_cache_hits, trace.resolution_cache_misses) == (4, 1)
+    assert trace.resolution_cache_hit_rate == 0.8
+    
+    # 不同檔名但相同副檔名仍命中
+    context = ResolutionContext(input_path="b.pdf", available_skills=sorted(executor.available_skills))
+    impl, hit = engine.resolver.resolve_memoized(reader, context, graph.fingerprint)
+    assert impl.skill_id == "pdf-reader" and hit
+    
+    # 技能可用性改變時清除快取
+    context.available_skills.remove("docx-reader")
+    impl, hit = engine.resolver.resolve_memoized(reader, context, graph.fingerprint)
+    assert impl.skill_id == "pdf-reader" and not hit
+    
+    # 實現列表替換後重建索引，即使指紋未變也不套用舊位置
+    assert engine.resolver.resolve_memoized(reader, context, "pinned")[0].skill_id == "pdf-reader"
+    reader.implementations = [
+        Implementation(id="web-v2", skill_id="web-reader", priority=0, conditions=["http*"]),
+        Implementation(id="pdf-v2", skill_id="pdf-reader", priority=1, conditions=["*.pdf"]),
+    ]
+    impl, hit = engine.resolver.resolve_memoized(reader, context, "pinned")
+    assert impl.id == "pdf-v2" and not hit
+    
+    print(f"\n✅ 命中率: {trace.resolution_cache_hit_rate:.0%}, 快取: {engine.resolver.resolution_stats()}")
+
+
+async def test_content_sniffing():
+    """測試檔案來源的標頭檢測（不讀取整個檔案）"""
+    print("\n" + "=" * 60)
+    print("測試 12: 內容檢測")
+    print("=" * 60)
+    
+    import io
+    import os
+    import tempfile
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # 300 MB 稀疏檔案：只有開頭有內容
+        big = os.path.join(tmp, "big.bin")
+        with open(big, "wb") as f:
+            f.write(b"%PDF-1.7\n")
+            f.truncate(300 * 1024 * 1024)
+        empty = os.path.join(tmp, "empty.bin")
+        open(empty, "wb").close()
+        
+        assert TypeDetector.sniff(big) == "application/pdf"
+        hits = sniff_cache.hits
+        assert TypeDetector.sniff(big) == "application/pdf"
+        assert sniff_cache.hits == hits + 1
+        assert TypeDetector.sniff(empty) is None
+        assert TypeDetector.sniff(io.BytesIO(b"  \n {\"a\": 1}")) == "application/json"
+        assert TypeDetector.sniff(os.path.join(tmp, "missing.bin")) is None
+        
+        node = GraphNode(id="read", type=NodeType.ABSTRACT, implementations=[
+            Implementation(id="pdf", skill_id="pdf-reader", conditions=["application/pdf"]),
+            Implementation(id="text", skill_id="text-reader", priority=99, conditions=["default"]),
+        ])
+        resolver = AbstractNodeResolver()
+        calls = []
+        resolver.register_type_detector("application/pdf", lambda b: calls.append(len(b)) or b[:4] == b"%PDF")
+        
+        for _ in range(3):
+            context = ResolutionContext(input_file=big)
+            assert resolver.resolve(node, context).skill_id == "pdf-reader"
+            assert context.input_type == "application/pdf"
+        assert calls == [8192]  # 只讀取一次標頭，其後使用 (路徑, 大小, mtime) 快取
+        
+        # 檔案物件：從目前位置讀取，讀取後回到原位置
+        stream = io.BytesIO(b"xx%PDF-1.4 ...")
+        stream.seek(2)
+        context = ResolutionContext(input_file=stream)
+        assert resolver.resolve(node, context).skill_id == "pdf-reader"
+        assert stream.tell() == 2
+    
+    print("\n✅ 標頭檢測與快取正常")
+
+
+async def test_zip_container_detection():
+    """測試 OOXML 容器檢測（只讀取中央目錄）"""
+    print("\n" + "=" * 60)
+    print("測試 13: ZIP 容器檢測")
+    print("=" * 60)
+    
+    import io
+    import os
+    import tempfile
+    import zipfile
+    
+    class CountingStream(io.BytesIO):
+        bytes_read = 0
+        
+        def read(self, size=-1):
+            data = super().read(size)
+            self.bytes_read += len(data)
+            return data
+    
+    def archive(*names, payload=b"", comment=b""):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as z:
+            z.writestr("[Content_Types].xml", "<Types/>")
+            for name in names:
+                z.writestr(name, payload)
+            z.comment = comment
+        return buffer.getvalue()
+    
+    docx = archive("word/document.xml", payload=os.urandom(4 * 1024 * 1024))
+    stream = CountingStream(docx)
+    assert TypeDetector.sniff(stream) == TypeDetector.EXTENSION_MAP[".docx"]
+    assert stream.bytes_read < 16 * 1024, stream.bytes_read  # 與封存大小無關
+    
+    assert TypeDetector.from_content(archive("xl/workbook.xml")) == TypeDetector.EXTENSION_MAP[".xlsx"]
+    assert TypeDetector.from_content(archive("ppt/presentation.xml", comment=b"x" * 500)) == (
+        TypeDetector.EXTENSION_MAP[".pptx"]
+    )
+    assert TypeDetector.from_content(archive("notes.txt")) == "application/zip"
+    assert TypeDetector.from_content(docx[:4096]) == "application/zip"  # 只有標頭時無法判斷
+    
+    # 中央目錄超過掃描上限時類型未知，而非一般 ZIP
+    crowded = archive(*(f"customXml/item{i}.xml" for i in range(3000)), "xl/workbook.xml")
+    assert TypeDetector.zip_container_type(crowded) is None
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "report.bin")
+        with open(path, "wb") as f:
+            f.write(archive("xl/workbook.xml"))
+        assert TypeDetector.sniff(path) == TypeDetector.EXTENSION_MAP[".xlsx"]
+        context = ResolutionContext(input_file=path)
+        AbstractNodeResolver().resolve(create_abstract_node_graph().get_node("read_document"), context)
+        assert context.input_type == TypeDetector.EXTENSION_MAP[".xlsx"]
+    
+    print(f"\n✅ 4 MB DOCX 只讀取 {stream.bytes_read} 位元組")
+
+
+async def test_batch_resolution():
+    """測試批次解析（與逐一解析結果相同）"""
+    print("\n" + "=" * 60)
+    print("測試 14: 批次解析")
+    print("=" * 60)
+    
+    import os
+    import tempfile
+    
+    node = GraphNode(id="read", type=NodeType.ABSTRACT, implementations=[
+        Implementation(id="pdf", skill_id="pdf-reader", priority=1, conditions=["application/pdf"]),
+        Implementation(id="md", skill_id="markdown-reader", priority=2, conditions=["*.md"]),
+        Implementation(id="web", skill_id="web-reader", priority=3, conditions=["https://*"]),
+        Implementation(id="json", skill_id="json-reader", priority=4, conditions=["mode == 'json'"]),
+        Implementation(id="text", skill_id="text-reader", priority=99, conditions=["default"]),
+    ])
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = []
+        for i in range(60):
+            path = os.path.join(tmp, f"f{i}" + (".md", ".bin", ".txt")[i % 3])
+            with open(path, "wb") as f:
+                f.write(b"%PDF-1.7" if i % 4 == 0 else b"plain text")
+            inputs.append(path)
+        inputs.append("https://example.com/page")
+        inputs.append(ResolutionContext(input_path="x.txt", variables={"mode": "json"}))
+        
+        batch = AbstractNodeResolver().resolve_batch(node, inputs, max_workers=4)
+        single = AbstractNodeResolver()
+        expected = [
+            single.resolve(node, item if isinstance(item, ResolutionContext)
+                           else ResolutionContext(input_path=item, input_file=None if "://" in item else item))
+            for item in inputs
+        ]
+        assert [i.id for i in batch] == [i.id for i in expected]
+        assert batch[0].id == "pdf" and batch[-2].id == "web" and batch[-1].id == "json"
+    
+    print(f"\n✅ {len(inputs)} 個輸入: {dict((i.id, [b.id for b in batch].count(i.id)) for i in node.implementations)}")
+
+
+async def test_stats_ranking():
+    """測試依延遲與成功率排序實現"""
+    print("\n" + "=" * 60)
+    print("測試 15: 統計排序")
+    print("=" * 60)
+    
+    import random
+    
+    store = SkillStatsStore(window=20)
+    for latency in (0.1, 0.2, 0.3, 0.4, 2.0):
+        store.record("probe", True, latency)
+    stats = store.get("probe")
+    assert (stats.p50, stats.p95, stats.success_rate) == (0.3, 2.0, 1.0)
+    
+    node = GraphNode(id="read", type=NodeType.ABSTRACT, implementations=[
+        Implementation(id="fast", skill_id="fast-pdf", priority=1, conditions=["application/pdf"]),
+        Implementation(id="solid", skill_id="solid-pdf", priority=2, conditions=["*.pdf"]),
+        Implementation(id="text", skill_id="text-reader", priority=99, conditions=["default"]),
+    ])
+    pdf = ResolutionContext(input_path="a.pdf", input_type="application/pdf")
+    
+    # 沒有觀測資料：與靜態優先級相同
+    skill_stats = SkillStatsStore()
+    resolver = AbstractNodeResolver(skill_stats=skill_stats)
+    assert resolver.resolve(node, pdf).id == "fast"
+    assert resolver.resolve(node, ResolutionContext(input_path="a.txt")).id == "text"
+    
+    # 高優先級實現緩慢且三成失敗 -> 改選另一個匹配的實現（catch-all 不參與）
+    for i in range(30):
+        skill_stats.record("fast-pdf", i % 10 >= 3, 1.5)
+        skill_stats.record("solid-pdf", True, 0.2)
+    assert resolver.resolve(node, pdf).id == "solid"
+    assert resolver.resolve_memoized(node, pdf, "fp")[0].id == "solid"
+    assert resolver.resolve_batch(node, [pdf])[0].id == "solid"
+    
+    # priority 策略同樣依統計排序未嘗試的實現
+    node.resolution_strategy = "priority"
+    assert resolver.resolve(node, ResolutionContext()).id == "solid"
+    # 未觀測的實現以基準延遲為先驗，優於已知緩慢且常失敗的實現
+    assert resolver.resolve(node, ResolutionContext(previous_attempts=["solid-pdf"])).id == "text"
+    node.resolution_strategy = "auto_detect"
+    
+    # 探索：以 exploration_rate 的機率選擇其他候選
+    explorer = AbstractNodeResolver(skill_stats=skill_stats, exploration_rate=0.5, rng=random.Random(7))
+    picks = [explorer.resolve(node, pdf).id for _ in range(200)]
+    assert set(picks) == {"fast", "solid"} and 60 < picks.count("fast") < 140
+    
+    # 引擎記錄每個步驟的延遲並回寫統計
+    engine_stats = SkillStatsStore()
+    engine = AdaptiveGraphEngine(create_abstract_node_graph(), MockSkillExecutor(), skill_stats=engine_stats)
+    trace = await engine.execute({"input_path": "document.pdf"})
+    timed = [step for step in trace.steps if step.latency is not None]
+    assert timed and all(engine_stats.get(step.skill_id).samples == 1 for step in timed)
+    
+    print(f"\n✅ 統計: {skill_stats.get('fast-pdf').to_dict()}")
+
+
+async def test_fallback_dispatch():
+    """測試 Fallback 規則分派表（與逐條比對結果相同）"""
+    print("\n" + "=" * 60)
+    print("測試 16: Fallback 規則分派")
+    print("=" * 60)
+    
+    from capability_engine.fallback import (
+        ErrorType, ExecutionError, FallbackChain, FallbackRule, FallbackStrategy,
+        create_aggressive_fallback_chain, create_conservative_fallback_chain,
+    )
+    
+    def legacy_matches(rule, error, retries):
+        trigger = rule.trigger.lower()
+        if trigger in ("default", "any"):
+            return True
+        if trigger.startswith("retries >="):
+            return retries >= int(trigger.split(">=")[1].strip())
+        return error.type.value.lower() in trigger
+    
+    def legacy_find(chain, error, retries):
+        return next((r for r in chain.rules if legacy_matches(r, error, retries)), None)
+    
+    chains = [
+        create_standard_fallback_chain(),
+        create_aggressive_fallback_chain(),
+        create_conservative_fallback_chain(),
+        FallbackChain(),
+        FallbackChain(rules=[FallbackRule(trigger="retries >= 2", strategy=FallbackStrategy.SKIP)]),
+    ]
+    checked = 0
+    for chain in chains:
+        for error_type in ErrorType:
+            error = ExecutionError(type=error_type, message="boom", node_id="n")
+            for retries in range(8):
+                expected = legacy_find(chain, error, retries)
+                rule = chain._find_matching_rule(error, retries)
+                if expected is None:
+                    assert rule.strategy == FallbackStrategy.ABORT
+                else:
+                    assert rule is expected
+                checked += 1
+    
+    # 表達式觸發條件
+    chain = FallbackChain(rules=[
+        FallbackRule(trigger="error.type == 'Timeout' and retries < 2", strategy=FallbackStrategy.RETRY),
+        FallbackRule(trigger="'quota' in error.message", strategy=FallbackStrategy.SKIP),
+        FallbackRule(trigger="default", strategy=FallbackStrategy.ASK_USER),
+    ])
+    timeout = ExecutionError(type=ErrorType.TIMEOUT, message="slow", node_id="n")
+    quota = ExecutionError(type=ErrorType.UNKNOWN, message="quota exceeded", node_id="n")
+    assert chain._find_matching_rule(timeout, 1).strategy == FallbackStrategy.RETRY
+    assert chain._find_matching_rule(timeout, 2).strategy == FallbackStrategy.ASK_USER
+    assert chain._find_matching_rule(quota, 5).strategy == FallbackStrategy.SKIP
+    
+    # 分派表只編譯一次，規則列表變更時重新編譯
+    compiled = chain.compiled_rules
+    assert chain.compiled_rules is compiled
+    chain.rules.insert(0, FallbackRule(trigger="any", strategy=FallbackStrategy.ABORT))
+    assert chain.compiled_rules is not compiled
+    assert chain._find_matching_rule(quota, 0).strategy == FallbackStrategy.ABORT
+    
+    print(f"\n✅ {checked} 個 (錯誤類型, 重試次數) 組合與逐條比對一致")
+
+
+async def test_backoff_and_budget():
+    """測試退避策略與共用重試預算"""
+    print("\n" + "=" * 60)
+    print("測試 17: 退避與重試預算")
+    print("=" * 60)
+    
+    import random
+    from capability_engine.fallback import (
+        BackoffKind, BackoffPolicy, FallbackChain, FallbackRule, FallbackStrategy,
+        RetryBudget, set_default_retry_budget,
+    )
+    
+    rng = random.Random(3)
+    exponential = BackoffPolicy(BackoffKind.EXPONENTIAL, max_delay=5.0, jitter=False)
+    assert [exponential.delay(0.5, n, None, rng) for n in range(1, 6)] == [0.5, 1.0, 2.0, 4.0, 5.0]
+    jittered = BackoffPolicy(BackoffKind.EXPONENTIAL, max_delay=5.0)
+    delays = [jittered.delay(0.5, 4, None, rng) for _ in range(100)]
+    assert all(0 <= d <= 4.0 for d in delays) and len(set(delays)) > 90
+    decorrelated = BackoffPolicy(BackoffKind.DECORRELATED, max_delay=10.0)
+    previous = None
+    for n in range(1, 20):
+        delay = decorrelated.delay(0.5, n, previous, rng)
+        assert 0.5 <= delay <= min(10.0, max(0.5, (previous or 0.5) * 3))
+        previous = delay
+    assert BackoffPolicy(BackoffKind.FIXED, max_delay=1.0).delay(2.0, 3, None, rng) == 1.0
+    
+    # 令牌桶：以假時鐘驗證補充
+    now = [0.0]
+    budget = RetryBudget(capacity=3, refill_rate=1.0, success_credit=0.5, clock=lambda: now[0])
+    assert all(budget.try_acquire() for _ in range(3)) and not budget.try_acquire()
+    now[0] += 1.5
+    assert budget.try_acquire() and not budget.try_acquire()
+    budget.record_success()
+    assert abs(budget.available - 1.0) < 1e-9 and budget.exhausted == 2
+    
+    # 共用預算耗盡時，各鏈的重試改為立即失敗
+    calls = 0
+    
+    async def always_fail():
+        nonlocal calls
+        calls += 1
+        raise ConnectionError("network unreachable")
+    
+    rules = [FallbackRule(trigger="error.type == 'NetworkError'", strategy=FallbackStrategy.RETRY,
+                          max_retries=5, retry_delay=0)]
+    shared = RetryBudget(capacity=4, refill_rate=0)
+    set_default_retry_budget(shared)
+    try:
+        results = await asyncio.gather(*(
+            FallbackChain(rules=list(rules)).execute_with_fallback(always_fail) for _ in range(3)
+        ))
+    finally:
+        set_default_retry_budget(None)
+    assert all(not r.success and r.budget_exhausted for r in results)
+    assert calls == 3 + 4 and shared.exhausted == 3
+    
+    # 沒有預算時維持原本的重試次數
+    calls = 0
+    result = await FallbackChain(rules=list(rules)).execute_with_fallback(always_fail)
+    assert not result.success and not result.budget_exhausted and calls == 10
+    
+    print(f"\n✅ 預算 4 個令牌，3 條鏈共執行 7 次後立即失敗")
+
+
+async def test_circuit_breakers():
+    """測試技能斷路器"""
+    print("\n" + "=" * 60)
+    print("測試 18: 斷路器")
+    print("=" * 60)
+    
+    from capability_engine.fallback import (
+        CircuitBreaker, CircuitBreakerRegistry, CircuitState, ErrorType,
+        FallbackChain, FallbackRule, FallbackStrategy,
+    )
+    
+    # 狀態轉換：關閉 -> 開啟 -> 半開 -> 關閉 / 重新開啟
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=0.5, window=4, min_calls=4, cooldown=10, clock=lambda: now[0])
+    for ok in (True, False, True, False):
+        assert breaker.allow()
+        breaker.record_success() if ok else breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN and not breaker.allow()
+    now[0] += 10
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert breaker.allow() and not breaker.allow()  # 只允許一次探測
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+    now[0] += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED and breaker.allow()
+    
+    # Fallback 鏈：斷路器開啟後不再執行該技能
+    calls = []
+    
+    async def attempt():
+        calls.append("call")
+        raise ConnectionError("network down")
+    
+    registry = CircuitBreakerRegistry(min_calls=3, window=3, cooldown=60)
+    rules = [FallbackRule(trigger="error.type == 'NetworkError'", strategy=FallbackStrategy.RETRY,
+                          max_retries=10, retry_delay=0)]
+    chain = FallbackChain(rules=rules, circuit_breakers=registry)
+    result = await chain.execute_with_fallback(attempt, skill_id="flaky")
+    assert len(calls) == 3 and result.error.type is ErrorType.CIRCUIT_OPEN
+    assert registry.states() == {"flaky": "open"}
+    
+    calls.clear()
+    result = await chain.execute_with_fallback(attempt, skill_id="flaky")
+    assert not calls and not result.success
+    
+    ran = []
+    
+    async def run_skill(skill_id):
+        ran.append(skill_id)
+        return "ok"
+    
+    result = await chain.execute_with_fallback(
+        None, skill_id="flaky", available_implementations=["flaky", "backup"],
+        implementation_factory=run_skill,
+    )
+    assert result.success and result.final_skill == "backup" and ran == ["backup"]
+    
+    # 半開：切換實現時不佔用探測，探測在實際嘗試前才取得並一定會結算
+    class ParseFailure(Exception):
+        pass
+    
+    async def parse_or_run(skill_id):
+        if skill_id == "broken":
+            raise ParseFailure("unreadable")
+        return await run_skill(skill_id)
+    
+    now[0] = 0.0
+    probing = CircuitBreakerRegistry(min_calls=1, window=1, cooldown=10, clock=lambda: now[0])
+    probing.record("recovering", False)
+    now[0] += 10
+    switching = FallbackChain(
+        rules=[FallbackRule(trigger="error.type == 'ParseError'", strategy=FallbackStrategy.NEXT_IMPLEMENTATION)],
+        circuit_breakers=probing,
+    )
+    ran.clear()
+    result = await switching.execute_with_fallback(
+        None, skill_id="broken", available_implementations=["broken", "recovering"],
+        implementation_factory=parse_or_run,
+    )
+    assert result.success and ran == ["recovering"]
+    assert probing.get("recovering").state is CircuitState.CLOSED
+    
+    # 被取消的探測歸還許可，斷路器不會永久停在半開
+    probing.record("stalled", False)
+    now[0] += 10
+    
+    async def hang(skill_id):
+        await asyncio.sleep(30)
+    
+    task = asyncio.ensure_future(switching.execute_with_fallback(
+        None, skill_id="stalled", implementation_factory=hang,
+    ))
+    await asyncio.sleep(0.01)
+    assert not probing.allow("stalled")  # 探測進行中
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert probing.get("stalled").state is CircuitState.HALF_OPEN and probing.allow("stalled")
+    
+    # 引擎：斷路器開啟的實現不參與抽象節點解析
+    for _ in range(3):
+        registry.record("pdf-reader", False)
+    engine = AdaptiveGraphEngine(create_abstract_node_graph(), MockSkillExecutor(), circuit_breakers=registry)
+    trace = await engine.execute({"input_path": "document.pdf"})
+    chosen = [s.skill_id for s in trace.steps if s.node_id == "read_document"]
+    assert chosen == ["text-reader"], chosen
+    
+    # 共用的 Fallback 鏈已掛有其他註冊表時不會被靜默取代
+    AdaptiveGraphEngine(
+        create_abstract_node_graph(), MockSkillExecutor(), fallback_chain=chain, circuit_breakers=registry,
+    )
+    try:
+        AdaptiveGraphEngine(
+            create_abstract_node_graph(), MockSkillExecutor(), fallback_chain=chain,
+            circuit_breakers=CircuitBreakerRegistry(),
+        )
+    except ValueError:
+        assert chain.circuit_breakers is registry
+    else:
+        raise AssertionError("replaced the shared chain's circuit breakers")
+    
+    print(f"\n✅ 斷路器狀態: {registry.states()}")
+
+
+async def test_hedged_execution():
+    """測試對沖執行"""
+    print("\n" + "=" * 60)
+    print("測試 19: 對沖執行")
+    print("=" * 60)
+    
+    class TimedExecutor:
+        def __init__(self, delays: dict, failing: set = frozenset()):
+            self.delays = delays
+            self.failing = failing
+            self.started, self.finished, self.cancelled = [], [], []
+        
+        async def execute(self, skill_id: str, inputs: dict, context: dict) -> dict:
+            self.started.append(skill_id)
+            try:
+                await asyncio.sleep(self.delays.get(skill_id, 0))
+            except asyncio.CancelledError:
+                self.cancelled.append(skill_id)
+                raise
+            if skill_id in self.failing:
+                raise ValueError(f"{skill_id} 無法解析")
+            self.finished.append(skill_id)
+            return {"content": skill_id}
+        
+        def is_available(self, skill_id: str) -> bool:
+            return True
+    
+    graph = CapabilityGraph(
+        id="hedge-test", version="1.0", name="對沖測試",
+        nodes=[
+            GraphNode(id="start", type=NodeType.START),
+            GraphNode(id="read", type=NodeType.ABSTRACT, resolution_strategy="hedge", implementations=[
+                Implementation(id="a", skill_id="reader-a", priority=1, conditions=["*.pdf"]),
+                Implementation(id="b", skill_id="reader-b", priority=2, conditions=["*.pdf"]),
+                Implementation(id="text", skill_id="text-reader", priority=99, conditions=["default"]),
+            ]),
+            GraphNode(id="end", type=NodeType.END),
+        ],
+        edges=[GraphEdge(from_node="start", to_node="read"), GraphEdge(from_node="read", to_node="end")],
+    )
+    
+    def read_step(trace):
+        return next(s for s in trace.steps if s.node_id == "read")
+    
+    # 首選實現緩慢：超過對沖延遲後啟動下一個，採用先完成者並取消首選
+    executor = TimedExecutor({"reader-a": 1.0, "reader-b": 0.01})
+    engine = AdaptiveGraphEngine(graph, executor, hedge_delay=0.05)
+    step = read_step(await engine.execute({"input_path": "doc.pdf"}))
+    assert step.hedged == ["reader-a", "reader-b"] and step.skill_id == "reader-b"
+    assert executor.cancelled == ["reader-a"] and executor.finished == ["reader-b"]
+    assert step.latency < 0.5
+    
+    # 首選及時完成：不啟動對沖
+    executor = TimedExecutor({"reader-a": 0.01})
+    engine = AdaptiveGraphEngine(graph, executor, hedge_delay=0.5)
+    step = read_step(await engine.execute({"input_path": "doc.pdf"}))
+    assert step.hedged == ["reader-a"] and step.skill_id == "reader-a"
+    
+    # 首選失敗：立即啟動下一個候選（catch-all 不參與對沖）
+    from capability_engine.fallback import FallbackChain, FallbackRule, FallbackStrategy
+    abort = FallbackChain(rules=[FallbackRule(trigger="default", strategy=FallbackStrategy.ABORT)])
+    executor = TimedExecutor({}, failing={"reader-a"})
+    engine = AdaptiveGraphEngine(graph, executor, fallback_chain=abort, hedge_delay=5.0)
+    step = read_step(await engine.execute({"input_path": "doc.pdf"}))
+    assert step.skill_id == "reader-b" and "text-reader" not in executor.started
+    
+    # 未指定對沖延遲時使用首選實現的歷史 p95
+    stats = SkillStatsStore()
+    for _ in range(10):
+        stats.record("reader-a", True, 0.02)
+    engine = AdaptiveGraphEngine(graph, TimedExecutor({}), skill_stats=stats)
+    assert engine._hedge_delay(graph.get_node("read").implementations[0]) == 0.02
+    
+    print(f"\n✅ 對沖勝出: {step.skill_id}")
+
+
+async def test_attempt_timeouts():
+    """測試單次嘗試逾時與全局期限"""
+    print("\n" + "=" * 60)
+    print("測試 20: 逾時與期限")
+    print("=" * 60)
+    
+    import time
+    from capability_engine.fallback import (
+        ErrorType, FallbackChain, FallbackRule, FallbackStrategy, remaining_time,
+    )
+    
+    calls = 0
+    
+    async def hang():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(30)
+    
+    # 單次嘗試逾時歸類為 Timeout，交由既有規則處理
+    chain = FallbackChain(rules=[
+        FallbackRule(trigger="retries >= 2", strategy=FallbackStrategy.ABORT),
+        FallbackRule(trigger="error.type == 'Timeout'", strategy=FallbackStrategy.RETRY, retry_delay=0),
+    ])
+    started = time.monotonic()
+    result = await chain.execute_with_fallback(hang, attempt_timeout=0.05)
+    assert not result.success and result.error.type is ErrorType.TIMEOUT and calls == 2
+    assert time.monotonic() - started < 1
+    
+    # 全局期限在嘗試進行中也會生效
+    calls = 0
+    started = time.monotonic()
+    result = await FallbackChain(global_timeout=0.05).execute_with_fallback(hang)
+    assert result.error.message == "Global timeout exceeded" and calls == 1
+    assert time.monotonic() - started < 1
+    
+    # 全局逾時的嘗試記為失敗：半開的探測會重新開啟斷路器
+    from capability_engine.fallback import CircuitBreakerRegistry, CircuitState
+    
+    now = [0.0]
+    breakers = CircuitBreakerRegistry(min_calls=1, window=1, cooldown=10, clock=lambda: now[0])
+    breakers.record("slow", False)
+    now[0] += 10
+    result = await FallbackChain(global_timeout=0.05, circuit_breakers=breakers).execute_with_fallback(
+        hang, skill_id="slow",
+    )
+    assert result.error.message == "Global timeout exceeded"
+    assert breakers.get("slow").state is CircuitState.OPEN
+    
+    # 剩餘時間：外層期限限制內層鏈
+    assert remaining_time() is None
+    seen = []
+    
+    async def inner():
+        seen.append(remaining_time())
+        return "ok"
+    
+    async def outer():
+        return await FallbackChain(global_timeout=60).execute_with_fallback(inner)
+    
+    await FallbackChain().execute_with_fallback(outer, attempt_timeout=2)
+    assert 1 < seen[0] <= 2
+    
+    # 引擎：節點 timeout 限制技能執行，剩餘時間經由 context 傳遞
+    contexts = []
+    
+    class RecordingExecutor(MockSkillExecutor):
+        async def execute(self, skill_id, inputs, context):
+            contexts.append(context)
+            return await super().execute(skill_id, inputs, context)
+    
+    graph = create_simple_graph()
+    for node in graph.nodes:
+        if node.type == NodeType.SKILL:
+            node.timeout = 5
+    await AdaptiveGraphEngine(graph, RecordingExecutor()).execute({"input_path": "a.pdf"})
+    assert contexts and all(4 < c["deadline_remaining"] <= 5 for c in contexts)
+    
+    # 逾時的嘗試記為該技能的一次失敗
+    class HangingExecutor(MockSkillExecutor):
+        async def execute(self, skill_id, inputs, context):
+            await asyncio.sleep(30)
+    
+    skill = next(node for node in graph.nodes if node.type == NodeType.SKILL)
+    skill.timeout = 0.05
+    stats = SkillStatsStore()
+    chain = FallbackChain(rules=[FallbackRule(trigger="any", strategy=FallbackStrategy.ABORT)])
+    try:
+        await AdaptiveGraphEngine(graph, HangingExecutor(), fallback_chain=chain, skill_stats=stats).execute({})
+    except Exception as e:
+        assert "Attempt timed out" in str(e)
+    else:
+        raise AssertionError("hanging skill should fail the execution")
+    assert stats.get(skill.skill_id).samples == 1 and stats.get(skill.skill_id).success_rate == 0.0
+    
+    print(f"\n✅ 節點剩餘時間: {[round(c['deadline_remaining'], 2) for c in contexts]}")
+
+
+async def test_next_implementation():
+    """測試 NEXT_IMPLEMENTATION 實際切換實現"""
+    print("\n" + "=" * 60)
+    print("測試 21: 切換實現")
+    print("=" * 60)
+    
+    from capability_engine.fallback import FallbackChain, FallbackRule, FallbackStrategy
+    
+    class ParseFailure(Exception):
+        pass
+    
+    ran = []
+    
+    async def run_skill(skill_id):
+        ran.append(skill_id)
+        if skill_id in ("a", "b"):
+            raise ParseFailure(f"{skill_id} cannot read this file")
+        return skill_id
+    
+    rules = [
+        FallbackRule(trigger="error.type == 'ParseError'", strategy=FallbackStrategy.NEXT_IMPLEMENTATION),
+        FallbackRule(trigger="default", strategy=FallbackStrategy.ABORT),
+    ]
+    result = await FallbackChain(rules=rules).execute_with_fallback(
+        None, skill_id="a", available_implementations=["a", "b", "a", "c"],
+        implementation_factory=run_skill,
+    )
+    assert ran == ["a", "b", "c"] and result.success and result.final_skill == "c" and result.retries == 2
+    
+    # 規則指定的 next_skill 優先
+    ran.clear()
+    rules[0].next_skill = "c"
+    result = await FallbackChain(rules=rules).execute_with_fallback(
+        None, skill_id="a", available_implementations=["a", "b", "c"],
+        implementation_factory=run_skill,
+    )
+    assert ran == ["a", "c"] and result.final_skill == "c"
+    
+    # 沒有更多實現：每個實現只執行一次，以最後的錯誤終止並回報最後執行的技能
+    from capability_engine.fallback import ErrorType, RetryBudget
+    
+    ran.clear()
+    rules[0].next_skill = None
+    budget = RetryBudget(capacity=10, refill_rate=0)
+    result = await FallbackChain(rules=rules, retry_budget=budget).execute_with_fallback(
+        None, skill_id="a", available_implementations=["a", "b"],
+        implementation_factory=run_skill,
+    )
+    assert ran == ["a", "b"] and not result.success and result.final_skill == "b"
+    assert result.error.type is ErrorType.PARSE_ERROR and result.error.skill_id == "b"
+    assert result.strategy_used is FallbackStrategy.ABORT and budget.available == 9  # 只有切換到 b 消耗令牌
+    
+    # 引擎：損壞的 PDF 改用實現指定的 fallback（ocr-reader）
+    executor = MockSkillExecutor()
+    chain = FallbackChain(rules=[FallbackRule(trigger="any", strategy=FallbackStrategy.NEXT_IMPLEMENTATION)])
+    engine = AdaptiveGraphEngine(create_abstract_node_graph(), executor, fallback_chain=chain)
+    trace = await engine.execute({"input_path": "report.corrupted.pdf"})
+    step = next(s for s in trace.steps if s.node_id == "read_document")
+    assert [e["skill_id"] for e in executor.execution_log][:2] == ["pdf-reader", "ocr-reader"]
+    assert step.skill_id == "ocr-reader" and step.retry_count == 1
+    assert engine._fallback_order(
+        engine.graph.get_node("read_document"), engine.compiled.implementations[1][0], []
+    ) == ["pdf-reader", "ocr-reader", "docx-reader", "web-reader", "text-reader"]
+    
+    # 統計逐次記錄：失敗的實現記為失敗，成功的實現只計自身耗時
+    stats = SkillStatsStore()
+    engine = AdaptiveGraphEngine(
+        create_abstract_node_graph(), MockSkillExecutor(), fallback_chain=chain, skill_stats=stats
+    )
+    trace = await engine.execute({"input_path": "report.corrupted.pdf"})
+    step = next(s for s in trace.steps if s.node_id == "read_document")
+    assert stats.get("pdf-reader").samples == 1 and stats.get("pdf-reader").success_rate == 0.0
+    assert stats.get("ocr-reader").samples == 1 and stats.get("ocr-reader").success_rate == 1.0
+    assert stats.get("ocr-reader").p50 < step.latency
+    
+    print(f"\n✅ 實際執行: {step.skill_id}")
 
 
 async def test_mermaid():
@@ -349,6 +1371,22 @@ async def main():
     await test_branch_graph()
     await test_metrics()
     await test_mermaid()
+    await test_graph_indexes()
+    await test_max_depth_scaling()
+    await test_condition_matcher()
+    await test_expressions()
+    await test_decision_index()
+    await test_resolution_cache()
+    await test_content_sniffing()
+    await test_zip_container_detection()
+    await test_batch_resolution()
+    await test_stats_ranking()
+    await test_fallback_dispatch()
+    await test_backoff_and_budget()
+    await test_circuit_breakers()
+    await test_hedged_execution()
+    await test_attempt_timeouts()
+    await test_next_implementation()
     
     print("\n" + "=" * 60)
     print("✅ 所有測試完成!")